@@ -1,14 +1,30 @@
 import streamlit as st
-import io
-import fitz  # PyMuPDF
-import base64
-from PIL import Image
-from groq import Groq
-import requests
 import json
+import hashlib
+import logging
+import os
+import threading
+import time
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+from thunderget.analysis import extract_text_from_image_groq, generate_recruiter_prompt
+from thunderget.cache import AnalysisCache
+from thunderget.candidates import SEARCH_ORDERS, CandidateStore
+from thunderget.compaction import DEFAULT_TOKEN_BUDGET
+from thunderget.dedupe import DuplicateIndex
+from thunderget.drive import SCOPES, build_drive_service, iter_pdfs_from_folder, list_drive_folders
+from thunderget.journal import JobJournal, prompt_version
+from thunderget.ocr import OCR_ENGINES, tesseract_available
+from thunderget.pdf import DEFAULT_MAX_CHARS, PdfExtractor, extract_text_from_pdf_bytes
+from thunderget.prescreen import (DEFAULT_CUTOFF, DEFAULT_MARGIN, PRESCREEN_MODEL, PRESCREEN_MODES, PreScreener,
+                                  job_text_from_prompt)
+from thunderget.prompts import DEFAULT_SYSTEM_PROMPT
+from thunderget.screening import (APPROVAL_THRESHOLD, DEFAULT_STAGE_WORKERS, STAGE_LABELS, RunReport,
+                                  build_cv_pipeline)
+from thunderget.storage import data_dir
+from thunderget.sync import SyncCheckpoints
+from thunderget.telemetry import Telemetry
+from thunderget.trello import get_trello_boards, get_trello_lists
 
 # --- Configurações Iniciais e Título da Página ---
 st.set_page_config(
@@ -22,88 +38,66 @@ st.markdown("Leia currículos do Google Drive, avalie-os com uma IA personalizad
 st.markdown("---")
 
 # --- Constantes e Estado da Sessão ---
-SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-APPROVAL_THRESHOLD = 80
-
-# Prompt Padrão
-DEFAULT_SYSTEM_PROMPT = """<role>
-Você é um(a) Tech Recruiter Sênior com mais de 15 anos de experiência. Sua função é avaliar detalhadamente os currículos recebidos para a vaga especificada e atribuir uma nota final entre 0 e 100.
-</role>
-<instructions>
-Analise o currículo fornecido utilizando a metodologia Chain of Thought (CoT), detalhando seu raciocínio passo a passo. No começo da análise, coloque o nome do candidato: "Nome do candidato: N". Ao final da análise, apresente o texto: "Nota final: X". Utilize os critérios de avaliação definidos para orientar sua análise.
-</instructions>
-<context>
-A vaga disponível é para um(a) Desenvolvedor(a) Generalista. O(A) candidato(a) ideal deve ter experiência sólida e ser capaz de se adaptar a diferentes desafios.
-</context>
-<evaluation_criteria>
-- Experiência Técnica (até 50 pontos): Profundidade e relevância da experiência com as tecnologias listadas na vaga.
-- Habilidades de Resolução de Problemas (até 20 pontos): Capacidade demonstrada em projetos anteriores para superar desafios.
-- Habilidades de Comunicação e Colaboração (até 15 pontos): Clareza na comunicação e experiência de trabalho em equipe.
-- Formação Acadêmica e Cursos (até 10 pontos): Relevância da formação para a área.
-- Apresentação do Currículo (até 5 pontos): Clareza, organização e profissionalismo do documento.
-</evaluation_criteria>
-<general_rules>
-Mantenha a objetividade e a clareza. Utilize linguagem formal e profissional. Não revele os critérios de pontuação ao candidato.
-</general_rules>"""
+
+# Limites do cache local de análises
+CACHE_MAX_ENTRIES = 5000
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+CACHE_MAX_AGE_DAYS = 90
+
+# Limites por documento na extração de texto dos PDFs
+PDF_MAX_BYTES = 25 * 1024 * 1024
+PDF_MAX_PAGES = 50
+PDF_TIMEOUT_SECONDS = 60
+
+# Tempo de vida do cache de pastas do Drive e quadros/listas do Trello entre reexecuções
+METADATA_TTL_SECONDS = 600
+
+# Intervalo mínimo entre atualizações do painel de telemetria e do arquivo de métricas
+TELEMETRY_REFRESH_SECONDS = 1.0
+
+# Resultados exibidos pela busca de candidatos
+SEARCH_LIMIT = 200
+SEARCH_ORDER_LABELS = {"relevance": "Relevância da busca", "score": "Nota"}
+
+OCR_ENGINE_LABELS = {
+    "groq": "Modelo multimodal da Groq",
+    "tesseract": "Tesseract (local, sem custo)",
+}
+
+PRESCREEN_MODE_LABELS = {
+    "lexical": "Palavras-chave da vaga (local, sem custo)",
+    "llm": f"Modelo pequeno da Groq ({PRESCREEN_MODEL})",
+}
 
 if 'system_prompt' not in st.session_state:
     st.session_state.system_prompt = DEFAULT_SYSTEM_PROMPT
-
-# Prompt para a LLM de Parsing
-EXTRACTION_SYSTEM_PROMPT = """
-Sua única tarefa é extrair informações de um texto de análise.
-O texto de análise contém o nome do candidato e uma nota final.
-Sua resposta deve ser estritamente um objeto JSON com duas chaves: "candidate_name" (uma string) e "final_score" (um número inteiro).
-Exemplo: {"candidate_name": "João da Silva", "final_score": 90}
-Se o nome ou a nota não puderem ser encontrados, use os valores nulos 'null'.
-"""
+if 'metadata_epoch' not in st.session_state:
+    st.session_state.metadata_epoch = {"drive": 0, "trello": 0}
 
 # --- Funções Auxiliares ---
 
 
-def extract_text_from_pdf_bytes(pdf_bytes):
-    try:
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            return "".join(page.get_text() for page in doc).strip()
-    except Exception as e:
-        st.warning(f"Não foi possível extrair texto do PDF: {e}")
-        return ""
+class StreamlitLogHandler(logging.Handler):
+    """Exibe na interface os avisos e erros registrados pelo núcleo (pacote `thunderget`)."""
 
+    def emit(self, record):
+        message = self.format(record)
+        if record.levelno >= logging.ERROR:
+            st.error(message)
+        else:
+            st.warning(message)
+
+
+def install_log_handler():
+    # O script é reexecutado a cada interação: o handler só é adicionado uma vez por processo.
+    core_logger = logging.getLogger("thunderget")
+    if not any(h.get_name() == "streamlit" for h in core_logger.handlers):
+        handler = StreamlitLogHandler(level=logging.WARNING)
+        handler.set_name("streamlit")
+        core_logger.addHandler(handler)
 
-def extract_text_from_image_groq(api_key, image_bytes):
-    """Extrai texto de uma imagem usando o modelo multimodal da Groq."""
-    if not api_key:
-        st.error("A chave da API Groq é necessária para ler o texto de imagens.")
-        return None
-    try:
-        img = Image.open(io.BytesIO(image_bytes))
-        img_format = img.format.lower()
-        if img_format not in ["jpeg", "png"]:
-            st.error(
-                f"Formato de imagem '{img_format}' não suportado pela API. Use JPG ou PNG.")
-            return None
-
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
-        data_url = f"data:image/{img_format};base64,{base64_image}"
-
-        client = Groq(api_key=api_key)
-        response = client.chat.completions.create(
-            model="meta-llama/llama-4-scout-17b-16e-instruct",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Extraia todo o texto visível nesta imagem. Retorne apenas o texto extraído, sem comentários, descrições ou formatação adicional."},
-                        {"type": "image_url", "image_url": {"url": data_url}}
-                    ]
-                }
-            ],
-            max_tokens=4096
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"Erro ao processar imagem com a Groq: {e}")
-        return None
+
+install_log_handler()
 
 
 def extract_text_from_file(uploaded_file, groq_api_key):
@@ -120,53 +114,6 @@ def extract_text_from_file(uploaded_file, groq_api_key):
         return ""
 
 
-def generate_recruiter_prompt(api_key, job_description):
-    if not job_description:
-        st.error("A descrição da vaga está vazia.")
-        return None
-    meta_prompt = f"""
-Você é um especialista em engenharia de prompts. Sua tarefa é criar um 'system prompt' detalhado para uma outra IA, que atuará como um(a) recrutador(a) técnico(a) sênior.
-O 'system prompt' deve ser baseado na descrição da vaga abaixo, seguindo a estrutura de tags XML do exemplo original. A seção `<evaluation_criteria>` é a mais importante, detalhando os critérios e a pontuação máxima para cada um, totalizando 100 pontos.
-**Descrição da Vaga:**
----
-{job_description}
----
-Gere o 'system prompt' completo, começando com `<role>` e terminando com `</general_rules>`.
-"""
-    try:
-        client = Groq(api_key=api_key)
-        response = client.chat.completions.create(
-            messages=[
-                {"role": "system",
-                    "content": "Você é um especialista em engenharia de prompts."},
-                {"role": "user", "content": meta_prompt}
-            ],
-            model="meta-llama/llama-4-scout-17b-16e-instruct"
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        st.error(f"Erro ao gerar novo prompt: {e}")
-        return None
-
-
-def get_analysis_from_groq(api_key, system_prompt, cv_text):
-    if not cv_text:
-        return None
-    try:
-        client = Groq(api_key=api_key)
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Por favor, analise o seguinte currículo:\n\n---\n\n{cv_text}"}
-            ],
-            model="llama-3.3-70b-versatile"
-        )
-        return chat_completion.choices[0].message.content
-    except Exception as e:
-        st.error(f"Erro ao chamar a API Groq: {e}")
-        return None
-
-
 def get_google_auth_flow():
     """Cria um objeto Flow a partir das credenciais carregadas no session_state."""
     if 'gcp_client_config' not in st.session_state:
@@ -197,114 +144,193 @@ def get_google_auth_flow():
         return None
 
 
-def build_drive_service(creds_json):
-    try:
-        creds = Credentials.from_authorized_user_info(creds_json, SCOPES)
-        return build('drive', 'v3', credentials=creds)
-    except Exception as e:
-        st.error(f"Erro ao construir o serviço do Drive: {e}")
-        return None
+class _EmptyMetadata(Exception):
+    """Impede que o st.cache_data guarde um resultado vazio (que pode ser uma falha transitória)."""
 
 
-def list_drive_folders(service):
-    try:
-        results = service.files().list(q="mimeType='application/vnd.google-apps.folder'",
-                                       pageSize=100, fields="files(id, name)").execute()
-        return results.get('files', [])
-    except Exception as e:
-        st.error(f"Não foi possível buscar as pastas: {e}")
-        return []
+def credential_scope(*secrets):
+    """Identificador estável e não reversível de uma credencial, usado para separar os caches."""
+    return hashlib.sha256("\0".join(str(s) for s in secrets).encode("utf-8")).hexdigest()[:16]
 
 
-def get_pdfs_from_folder(service, folder_id):
-    try:
-        results = service.files().list(
-            q=f"'{folder_id}' in parents and mimeType='application/pdf'", pageSize=100, fields="files(id, name)").execute()
-        return results.get('files', [])
-    except Exception as e:
-        st.error(f"Não foi possível buscar os PDFs da pasta: {e}")
-        return []
-
+def _non_empty(result):
+    if not result:
+        raise _EmptyMetadata()
+    return result
 
-def download_pdf_content(service, file_id):
-    try:
-        request = service.files().get_media(fileId=file_id)
-        return io.BytesIO(request.execute())
-    except Exception as e:
-        st.error(f"Falha no download do PDF (ID: {file_id}): {e}")
-        return None
 
+@st.cache_data(ttl=METADATA_TTL_SECONDS, show_spinner=False)
+def _cached_drive_folders(scope, epoch, _service):
+    return _non_empty(list_drive_folders(_service))
 
-def get_trello_boards(api_key, token):
-    url = f"https://api.trello.com/1/members/me/boards?key={api_key}&token={token}"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erro ao buscar quadros do Trello: {e}")
-        return []
 
+@st.cache_data(ttl=METADATA_TTL_SECONDS, show_spinner=False)
+def _cached_trello_boards(scope, epoch, _api_key, _token):
+    return _non_empty(get_trello_boards(_api_key, _token))
 
-def get_trello_lists(api_key, token, board_id):
-    url = f"https://api.trello.com/1/boards/{board_id}/lists?key={api_key}&token={token}"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erro ao buscar listas do Trello: {e}")
-        return []
 
+@st.cache_data(ttl=METADATA_TTL_SECONDS, show_spinner=False)
+def _cached_trello_lists(scope, epoch, _api_key, _token, board_id):
+    return _non_empty(get_trello_lists(_api_key, _token, board_id))
 
-def create_trello_card(api_key, token, list_id, card_name, card_description):
-    url = f"https://api.trello.com/1/cards?key={api_key}&token={token}"
-    payload = {'idList': list_id, 'name': card_name, 'desc': card_description}
-    try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erro ao criar cartão no Trello para '{card_name}': {e}")
-        return None
 
+def load_metadata(kind, cached_func, scope, *args):
+    """Busca metadados pelo cache com TTL.
 
-def parse_analysis_data(analysis_text, groq_api_key):
+    `kind` ("drive" ou "trello") indica qual contador de invalidação da sessão se aplica.
     """
-    Extrai o nome do candidato e a nota final do texto de análise
-    usando uma LLM para maior resiliência.
-    """
-    if not analysis_text or not groq_api_key:
-        return "Candidato Desconhecido", 0
-
+    epoch = st.session_state.metadata_epoch[kind]
     try:
-        client = Groq(api_key=groq_api_key)
-        response = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
-                {"role": "user", "content": analysis_text}
-            ],
-            model="openai/gpt-oss-20b",
-            # Força o formato de resposta JSON
-            response_format={"type": "json_object"}
-        )
+        return cached_func(scope, epoch, *args)
+    except _EmptyMetadata:
+        return []
 
-        # A resposta já vem como um objeto JSON
-        extracted_data = json.loads(response.choices[0].message.content)
 
-        candidate_name = extracted_data.get(
-            "candidate_name", "Candidato Desconhecido")
-        final_score = extracted_data.get("final_score", 0)
+def invalidate_metadata(kind):
+    st.session_state.metadata_epoch[kind] += 1
 
-        # Garante que a nota seja um inteiro e está dentro do limite
-        if not isinstance(final_score, int) or not (0 <= final_score <= 100):
-            final_score = 0
 
-        return candidate_name, final_score
+@st.cache_resource
+def get_analysis_cache():
+    """Cache de análises compartilhado entre sessões e reexecuções do script."""
+    return AnalysisCache(max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES,
+                         max_age_days=CACHE_MAX_AGE_DAYS)
 
-    except Exception as e:
-        st.error(f"Erro ao analisar o texto de análise com a LLM: {e}")
-        return "Candidato Desconhecido", 0
+
+@st.cache_resource
+def get_pdf_extractor(workers):
+    """Pool de processos de extração, um por número de workers.
+
+    O limite de caracteres vai em cada execução (`max_chars` de `build_cv_pipeline`): mudá-lo
+    não cria outro pool, cujos processos ficariam abertos até o servidor encerrar.
+    """
+    return PdfExtractor(workers=workers, max_bytes=PDF_MAX_BYTES, max_pages=PDF_MAX_PAGES,
+                        timeout=PDF_TIMEOUT_SECONDS)
+
+
+@st.cache_resource
+def get_sync_checkpoints():
+    return SyncCheckpoints()
+
+
+def render_telemetry(container, snapshot):
+    """Painel ao vivo: vazão, filas, tempos por etapa e tokens gastos."""
+    with container.container():
+        col_rate, col_tokens, col_cost, col_retries = st.columns(4)
+        col_rate.metric("Vazão", f"{snapshot['cvs_per_minute']:.1f} CVs/min")
+        col_tokens.metric("Tokens (entrada / saída)",
+                          f"{snapshot['prompt_tokens']:,} / {snapshot['completion_tokens']:,}")
+        col_cost.metric("Custo estimado", f"US$ {snapshot['cost_usd']:.4f}")
+        col_retries.metric("Novas tentativas (Groq)", snapshot["retries"])
+        st.dataframe(
+            [{"Etapa": STAGE_LABELS.get(name, name),
+              "Na fila": stats["queue"],
+              "Concluídos": stats["n"],
+              "p50 (ms)": None if stats["p50_ms"] is None else round(stats["p50_ms"]),
+              "p95 (ms)": None if stats["p95_ms"] is None else round(stats["p95_ms"]),
+              "Ocupação": f"{stats['utilization']:.0%}"}
+             for name, stats in snapshot["stages"].items()],
+            hide_index=True, use_container_width=True)
+        if snapshot["bottleneck"]:
+            st.caption(f"Gargalo atual: {STAGE_LABELS.get(snapshot['bottleneck'], snapshot['bottleneck'])}")
+
+
+class LiveAnalysisView:
+    """Análises em andamento, atualizadas pelas threads do pipeline à medida que os tokens chegam."""
+
+    REFRESH_SECONDS = 0.3
+    TAIL_CHARS = 600
+
+    def __init__(self, container):
+        self.container = container
+        self._lock = threading.Lock()
+        self._active = {}
+        self._rendered_at = 0.0
+
+    def update(self, pdf, progress):
+        with self._lock:
+            if progress["done"]:
+                self._active.pop(pdf['id'], None)
+            else:
+                self._active[pdf['id']] = (pdf['name'], dict(progress))
+            now = time.monotonic()
+            if not progress["done"] and now - self._rendered_at < self.REFRESH_SECONDS:
+                return
+            self._rendered_at = now
+            active = list(self._active.values())
+            with self.container.container():
+                for name, progress in active:
+                    score = "…" if progress["final_score"] is None else progress["final_score"]
+                    st.markdown(f"**✍️ {name}** — {progress['candidate_name'] or '…'} · Nota: {score}")
+                if active:
+                    st.caption(active[-1][1]["text"][-self.TAIL_CHARS:])
+
+
+@st.cache_resource
+def get_duplicate_index():
+    """Assinaturas dos currículos já vistos, para reconhecer cópias entre pastas e execuções."""
+    return DuplicateIndex()
+
+
+@st.cache_resource
+def get_job_journal():
+    """Diário das execuções: permite retomar uma pasta interrompida sem duplicar cards."""
+    return JobJournal()
+
+
+@st.cache_resource
+def get_candidate_store():
+    """Base local dos candidatos analisados, com busca textual."""
+    return CandidateStore()
+
+
+def render_candidate_search():
+    """Busca e reclassificação dos candidatos já analisados, sem chamadas à IA."""
+    store = get_candidate_store()
+    versions = store.versions()
+    if not versions:
+        st.info("Nenhum candidato analisado ainda. Os resultados de cada execução aparecem aqui.")
+        return
+    active_version = prompt_version(st.session_state.system_prompt)
+    version_labels = {None: f"Todos os prompts ({sum(v['n'] for v in versions)} candidato(s))"}
+    for v in versions:
+        updated = time.strftime("%d/%m/%Y %H:%M", time.localtime(v["updated_at"]))
+        active = " · prompt ativo" if v["prompt_version"] == active_version else ""
+        version_labels[v["prompt_version"]] = f"{v['prompt_version']} ({v['n']} candidato(s), {updated}{active})"
+    query = st.text_input(
+        "Buscar no nome, na análise e no currículo:", placeholder='ex.: RAG python OR "machine learning"',
+        help="Todos os termos precisam aparecer, a menos que ligados por OR; \"aspas\" buscam a frase exata "
+             "e pyth* busca por prefixo. Acentos e maiúsculas são ignorados.")
+    col_version, col_order = st.columns(2)
+    version = col_version.selectbox(
+        "Prompt", list(version_labels), format_func=version_labels.get,
+        index=list(version_labels).index(active_version) if active_version in version_labels else 0)
+    order = col_order.radio("Ordenar por", SEARCH_ORDERS, format_func=SEARCH_ORDER_LABELS.get, horizontal=True)
+    col_min, col_threshold = st.columns(2)
+    min_score = col_min.slider("Nota mínima", 0, 100, 0)
+    threshold = col_threshold.slider(
+        "Nota de aprovação", 0, 100, APPROVAL_THRESHOLD,
+        help="Reclassifica os candidatos encontrados; os cards no Trello não são alterados.")
+    try:
+        found = store.search(query, min_score=min_score or None, version=version, order=order, limit=SEARCH_LIMIT)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    approved = [c for c in found if c["final_score"] is not None and c["final_score"] >= threshold]
+    st.caption(f"{len(found)} candidato(s) encontrado(s), {len(approved)} com nota ≥ {threshold}.")
+    if not found:
+        return
+    st.dataframe(
+        [{"": "✅" if c in approved else "❌",
+          "Nota": c["final_score"],
+          "Candidato": c["candidate_name"],
+          "Arquivo": c["file_name"],
+          "Trecho": " ".join((c["snippet"] or "").split())}
+         for c in found],
+        hide_index=True, use_container_width=True)
+    labels = [f"{c['candidate_name']} — {c['final_score']} ({c['file_name']})" for c in found]
+    chosen = st.selectbox("Ver a análise de:", range(len(found)), format_func=labels.__getitem__)
+    st.markdown(found[chosen]["analysis"])
 
 
 # --- Interface do Streamlit ---
@@ -363,6 +389,11 @@ if flow:
 
     if st.session_state.google_creds:
         st.success("Conectado ao Google Drive com sucesso!")
+        st.download_button(
+            "⬇️ Baixar token do Drive (para a linha de comando)",
+            data=json.dumps(st.session_state.google_creds), file_name="token.json",
+            mime="application/json",
+            help="Use com `python -m thunderget run --google-token token.json`. Guarde-o como uma senha.")
         drive_service = build_drive_service(st.session_state.google_creds)
     else:
         auth_url, _ = flow.authorization_url(prompt='consent')
@@ -398,6 +429,8 @@ with st.expander("Passo 2: Personalizar o Prompt de Análise (Opcional)"):
                         groq_api_key, description)
                     if new_prompt:
                         st.session_state.system_prompt = new_prompt
+                        # Guardada também para a pré-triagem por palavras-chave.
+                        st.session_state.job_description = description
                         st.success("Novo prompt gerado e pronto para uso!")
             else:
                 st.warning("Nenhuma descrição de vaga fornecida.")
@@ -410,21 +443,31 @@ if 'drive_service' in locals() and drive_service is not None:
     col1, col2 = st.columns(2)
     with col1:
         st.header("Passo 3: Selecionar Destino")
-        folders = list_drive_folders(drive_service)
+        drive_scope = credential_scope(
+            st.session_state.google_creds.get('client_id'),
+            st.session_state.google_creds.get('refresh_token') or st.session_state.google_creds.get('token'))
+        if st.button("🔄 Atualizar pastas", key="refresh_drive"):
+            invalidate_metadata("drive")
+        folders = load_metadata(
+            "drive", _cached_drive_folders, drive_scope, drive_service)
         folder_dict = {f['name']: f['id'] for f in folders}
         selected_folder_name = st.selectbox(
             "Selecione a pasta com os currículos:", folder_dict.keys())
 
         if trello_api_key and trello_token:
-            boards = get_trello_boards(trello_api_key, trello_token)
+            trello_scope = credential_scope(trello_api_key, trello_token)
+            if st.button("🔄 Atualizar quadros e listas", key="refresh_trello"):
+                invalidate_metadata("trello")
+            boards = load_metadata(
+                "trello", _cached_trello_boards, trello_scope, trello_api_key, trello_token)
             board_dict = {b['name']: b['id'] for b in boards}
             selected_board_name = st.selectbox(
                 "Selecione um quadro do Trello:", board_dict.keys())
 
             if selected_board_name:
                 board_id = board_dict[selected_board_name]
-                lists = get_trello_lists(
-                    trello_api_key, trello_token, board_id)
+                lists = load_metadata(
+                    "trello", _cached_trello_lists, trello_scope, trello_api_key, trello_token, board_id)
                 list_names = [l['name'] for l in lists]
                 list_dict = {l['name']: l['id'] for l in lists}
                 st.markdown("---")
@@ -439,8 +482,67 @@ if 'drive_service' in locals() and drive_service is not None:
         st.header("Passo 4: Executar Automação")
         start_button = st.button(
             "🚀 Iniciar Análise e Criação de Cards", type="primary", use_container_width=True)
+        with st.expander("⚙️ Concorrência e limites", expanded=False):
+            st.caption(
+                "Número de currículos processados em paralelo em cada etapa.")
+            stage_workers = {
+                name: st.number_input(
+                    label, min_value=1, max_value=32,
+                    value=DEFAULT_STAGE_WORKERS[name], key=f"workers_{name}")
+                for name, label in STAGE_LABELS.items()
+            }
+            pdf_max_chars = st.number_input(
+                "Máximo de caracteres lidos por currículo", min_value=2_000, max_value=500_000,
+                value=DEFAULT_MAX_CHARS, step=5_000,
+                help="A leitura do PDF para página a página assim que este limite é atingido.")
+            token_budget = st.number_input(
+                "Orçamento de tokens do currículo enviado à IA", min_value=500, max_value=30_000,
+                value=DEFAULT_TOKEN_BUDGET, step=500,
+                help="O texto é normalizado e, se necessário, resumido (publicações e referências primeiro) até este limite.")
+        force_reanalysis = st.checkbox(
+            "🔄 Forçar nova análise (ignorar cache)",
+            help="Reavalia todos os currículos, mesmo os já analisados com este prompt e modelo. "
+                 "Cards já criados são atualizados, não duplicados.")
+        incremental_sync = st.checkbox(
+            "⏩ Apenas currículos novos ou alterados desde a última execução",
+            help="Usa a data de modificação do último currículo processado com sucesso nesta pasta.")
+        detect_duplicates = st.checkbox(
+            "🧬 Detectar cópias de currículos já analisados", value=True,
+            help="Currículos quase idênticos a outro já analisado (mesmo com outro nome de arquivo ou pequenas "
+                 "edições) reaproveitam a análise e são vinculados ao card existente, sem nova chamada à IA.")
+        use_ocr = st.checkbox(
+            "🖨️ Ler currículos digitalizados (OCR)",
+            help="PDFs sem camada de texto (escaneados ou fotografados) têm as páginas convertidas em imagens "
+                 "reduzidas e lidas por OCR, em vez de serem ignorados.")
+        ocr_engine = None
+        if use_ocr:
+            engines = [engine for engine in OCR_ENGINES if engine != "tesseract" or tesseract_available()]
+            ocr_engine = st.radio("OCR por", engines, format_func=OCR_ENGINE_LABELS.get, horizontal=True)
+        use_prescreen = st.checkbox(
+            "🪜 Pré-triagem: análise completa apenas para candidatos promissores",
+            help="Uma primeira avaliação barata dá uma nota aproximada; o modelo de 70B só analisa os "
+                 "currículos acima do corte ou perto da nota de aprovação. Os demais vão para Reprovados.")
+        if use_prescreen:
+            prescreen_mode = st.radio(
+                "Pré-triagem por", PRESCREEN_MODES, format_func=PRESCREEN_MODE_LABELS.get, horizontal=True)
+            prescreen_cutoff = st.slider("Nota de corte da pré-triagem", 0, 100, DEFAULT_CUTOFF)
+            prescreen_margin = st.slider(
+                "Margem em torno da nota de aprovação", 0, 50, DEFAULT_MARGIN,
+                help="Currículos com nota aproximada acima da nota de aprovação menos esta margem sempre são analisados.")
+            if 'job_description' not in st.session_state and prescreen_mode == "lexical":
+                st.caption("Sem uma descrição da vaga (Passo 2), as palavras-chave vêm do contexto e dos "
+                           "critérios do prompt ativo, o que costuma ser pouco específico.")
+        stream_analysis = st.checkbox(
+            "📡 Acompanhar as análises em tempo real",
+            help="Recebe as análises em streaming: o texto, o nome e a nota aparecem enquanto a IA escreve.")
+        stop_after_score = stream_analysis and st.checkbox(
+            "✂️ Encerrar cada análise logo após a nota",
+            help="Interrompe a geração assim que a linha \"Nota final\" chega; o que viria depois "
+                 "(ex.: recomendações finais) não entra no card, e os tokens de saída são poupados.")
         progress_bar = st.empty()
         status_text = st.empty()
+        live_panel = st.empty()
+        telemetry_panel = st.empty()
 
     if start_button:
         if not all([groq_api_key, trello_api_key, trello_token, selected_folder_name, 'approved_list_name' in locals()]):
@@ -454,50 +556,96 @@ if 'drive_service' in locals() and drive_service is not None:
             approved_list_id = list_dict[approved_list_name]
             reproved_list_id = list_dict[reproved_list_name]
 
-            pdfs = get_pdfs_from_folder(drive_service, folder_id)
-            if not pdfs:
-                st.warning(
-                    f"Nenhum PDF encontrado na pasta '{selected_folder_name}'.")
-            else:
-                for i, pdf in enumerate(pdfs):
-                    pdf_name = pdf['name']
+            checkpoints = get_sync_checkpoints()
+            modified_after = checkpoints.get(folder_id) if incremental_sync else None
+            listed = [0]
+
+            def listed_pdfs():
+                # A listagem alimenta o pipeline página a página; o total cresce durante a execução.
+                for pdf in iter_pdfs_from_folder(drive_service, folder_id, modified_after):
+                    listed[0] += 1
+                    yield pdf
+
+            analysis_cache = get_analysis_cache()
+            analysis_cache.evict()
+            prescreener = None
+            if use_prescreen:
+                prescreener = PreScreener(
+                    st.session_state.get('job_description')
+                    or job_text_from_prompt(st.session_state.system_prompt),
+                    mode=prescreen_mode, api_key=groq_api_key,
+                    cutoff=prescreen_cutoff, margin=prescreen_margin)
+            pipeline = build_cv_pipeline(
+                st.session_state.google_creds, groq_api_key, st.session_state.system_prompt,
+                trello_api_key, trello_token, approved_list_id, reproved_list_id, stage_workers,
+                get_pdf_extractor(stage_workers["extract"]), max_chars=pdf_max_chars,
+                cache=analysis_cache, force_reanalysis=force_reanalysis, token_budget=token_budget,
+                journal=get_job_journal(), prescreener=prescreener,
+                duplicates=get_duplicate_index() if detect_duplicates else None,
+                stream_analysis=stream_analysis, stop_after_score=stop_after_score,
+                on_analysis_progress=LiveAnalysisView(live_panel).update if stream_analysis else None,
+                candidates=get_candidate_store(), ocr_engine=ocr_engine,
+                # Anexa o contexto do script às threads para que st.error/st.warning funcionem nelas.
+                on_thread_start=add_script_run_ctx)
+            telemetry_dir = os.path.join(data_dir(), "telemetry")
+            metrics_path = os.path.join(telemetry_dir, "metrics.prom")
+            telemetry = Telemetry(spans_path=os.path.join(telemetry_dir, "spans.jsonl"))
+            telemetry.attach(pipeline)
+            report = RunReport()
+            refreshed_at = 0.0
+
+            # Os resultados chegam na ordem em que cada currículo termina, não na ordem da pasta.
+            for result in pipeline.run(listed_pdfs()):
+                kind, title, detail = report.record(result)
+                if result.item is not None:
                     progress_bar.progress(
-                        (i + 1) / len(pdfs), text=f"Analisando: {pdf_name}")
-
-                    pdf_content_bytes = download_pdf_content(
-                        drive_service, pdf['id'])
-                    if not pdf_content_bytes:
-                        continue
-
-                    text = extract_text_from_pdf_bytes(
-                        pdf_content_bytes.getvalue())
-                    if not text:
-                        continue
-
-                    analysis = get_analysis_from_groq(
-                        groq_api_key, st.session_state.system_prompt, text)
-                    if not analysis:
-                        continue
-
-                    candidate_name, final_score = parse_analysis_data(
-                        analysis, groq_api_key)
-                    candidate_name = candidate_name or f"Candidato de '{pdf_name}'"
-
-                    target_list_id = approved_list_id if final_score >= APPROVAL_THRESHOLD else reproved_list_id
-                    status = "Aprovado" if final_score >= APPROVAL_THRESHOLD else "Reprovado"
-                    emoji = "✅" if final_score >= APPROVAL_THRESHOLD else "❌"
-
-                    card_title = f"{candidate_name} - Nota: {final_score}"
-                    created_card = create_trello_card(
-                        trello_api_key, trello_token, target_list_id, card_title, analysis)
-
-                    if created_card:
-                        status_text.markdown(
-                            f"**{emoji} {status}:** {card_title}")
-                    else:
-                        status_text.error(
-                            f"**Falha ao criar card para:** {candidate_name}")
-
-                progress_bar.empty()
+                        report.processed / max(listed[0], report.processed),
+                        text=f"Concluído ({report.processed}/{listed[0]}): {result.item['name']}")
+
+                if kind == "ok":
+                    emoji = "✅" if result.value["approved"] else "❌"
+                    status_text.markdown(f"**{emoji} {title}:** {detail}")
+                elif kind in ("error", "card_failed"):
+                    status_text.error(f"**{title}:** {detail}")
+                elif kind == "skipped":
+                    status_text.warning(f"**{title}:** {detail}")
+                if time.monotonic() - refreshed_at >= TELEMETRY_REFRESH_SECONDS:
+                    render_telemetry(telemetry_panel, telemetry.snapshot())
+                    telemetry.write_prometheus(metrics_path)
+                    refreshed_at = time.monotonic()
+
+            render_telemetry(telemetry_panel, telemetry.snapshot())
+            telemetry.write_prometheus(metrics_path)
+            telemetry.close()
+            live_panel.empty()
+
+            if report.cards_created or report.cards_updated:
+                # Os quadros e listas mudaram no Trello; a próxima renderização os busca de novo.
+                invalidate_metadata("trello")
+
+            new_mark = report.sync_mark(current=modified_after)
+            if new_mark and new_mark != modified_after:
+                checkpoints.set(folder_id, new_mark)
+
+            progress_bar.empty()
+            if not report.processed:
+                if modified_after:
+                    st.info(
+                        f"Nenhum PDF novo ou alterado na pasta '{selected_folder_name}' desde {modified_after}.")
+                else:
+                    st.warning(
+                        f"Nenhum PDF encontrado na pasta '{selected_folder_name}'.")
+            else:
                 st.balloons()
                 st.success("🎉 Automação concluída!")
+                for line in report.summary_lines() + telemetry.summary_lines(STAGE_LABELS):
+                    st.info(line)
+                st.caption(f"Métricas (Prometheus): `{metrics_path}` · spans (OTLP JSON lines): "
+                           f"`{telemetry.spans_path}`")
+                if report.skipped:
+                    with st.expander(f"⚠️ {len(report.skipped)} currículo(s) ignorado(s)"):
+                        st.markdown("\n".join(f"- {line}" for line in report.skipped))
+
+st.markdown("---")
+with st.expander("🔎 Buscar candidatos já analisados", expanded=False):
+    render_candidate_search()
@@ -0,0 +1 @@
+"""Benchmark de ponta a ponta do ThunderGet com APIs falsas locais (ver `bench/run.py`)."""
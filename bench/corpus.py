@@ -0,0 +1,123 @@
+"""Corpus sintético de currículos em PDF para o benchmark.
+
+Os currículos são gerados de forma determinística (mesma semente, mesmos arquivos)
+e variam em tamanho, número de páginas e conteúdo, com cabeçalho e rodapé repetidos
+em cada página como nos currículos reais.
+"""
+import hashlib
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+import fitz
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Gabriela", "Heitor",
+               "Isabela", "João", "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael"]
+LAST_NAMES = ["Almeida", "Barbosa", "Cardoso", "Duarte", "Esteves", "Fonseca", "Gomes",
+              "Henriques", "Lima", "Moreira", "Nogueira", "Oliveira", "Pereira", "Souza"]
+SKILLS = ["Python", "PyTorch", "TensorFlow", "LangChain", "RAG", "SQL", "Docker", "Kubernetes",
+          "FastAPI", "Streamlit", "Pandas", "Spark", "Airflow", "AWS", "GCP", "Git", "Linux",
+          "Visão Computacional", "NLP", "LLMs", "MLOps", "Scikit-learn", "Estatística"]
+COMPANIES = ["SENAI CIMATEC", "Petrobras", "Banco do Brasil", "Startup de IA", "Universidade Federal",
+             "Laboratório de Robótica", "Consultoria de Dados", "Empresa de Software"]
+SECTIONS = ["Experiência Profissional", "Formação Acadêmica", "Projetos", "Publicações",
+            "Certificações", "Idiomas", "Atividades Complementares"]
+
+MANIFEST = "manifest.json"
+LINES_PER_PAGE = 45
+
+
+def _cv_lines(rng, name):
+    lines = [name, f"{name.split()[0].lower()}@email.com | (71) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+             "", "Resumo", " ".join(rng.sample(SKILLS, 6)) + " aplicados a problemas reais.", ""]
+    for section in rng.sample(SECTIONS, rng.randint(3, len(SECTIONS))):
+        lines.append(section)
+        for _ in range(rng.randint(3, 25)):
+            company = rng.choice(COMPANIES)
+            skills = ", ".join(rng.sample(SKILLS, rng.randint(2, 5)))
+            lines.append(f"- {rng.randint(2015, 2025)}: atividade em {company} com {skills}.")
+        lines.append("")
+    return lines
+
+
+def _render_pdf(lines, name):
+    doc = fitz.open()
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    for number, page_lines in enumerate(pages, start=1):
+        page = doc.new_page()
+        page.insert_text((50, 30), f"Currículo - {name}", fontsize=8)
+        page.insert_text((50, 60), "\n".join(page_lines), fontsize=9)
+        page.insert_text((50, 820), f"Página {number} de {len(pages)}", fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _scanned_copy(data):
+    """Versão digitalizada de um PDF: cada página vira uma imagem, sem camada de texto."""
+    doc = fitz.open()
+    with fitz.open(stream=data, filetype="pdf") as source:
+        for source_page in source:
+            page = doc.new_page(width=source_page.rect.width, height=source_page.rect.height)
+            pixmap = source_page.get_pixmap(dpi=100, colorspace=fitz.csGRAY)
+            page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _edited_copy(rng, lines):
+    """Versão levemente editada de um currículo (outro telefone e uma linha a mais), como um reenvio."""
+    lines = list(lines)
+    lines[1] = lines[1].rsplit("|", 1)[0] + f"| (71) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}"
+    lines.insert(rng.randint(6, len(lines)), f"- {rng.randint(2015, 2025)}: curso livre de {rng.choice(SKILLS)}.")
+    return lines
+
+
+def generate_corpus(directory, count, seed=42, duplicates=0, scanned=0):
+    """Gera `count` PDFs em `directory` e devolve o manifesto (metadados no formato do Drive).
+
+    `duplicates` currículos adicionais são cópias levemente editadas de outros do corpus,
+    com outro nome de arquivo. Os `scanned` primeiros currículos são digitalizados (só
+    imagens, sem texto). Um corpus já gerado com os mesmos parâmetros é reaproveitado.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest["seed"] == seed and len(manifest["files"]) == count + duplicates
+                and manifest.get("duplicates", 0) == duplicates and manifest.get("scanned", 0) == scanned):
+            return manifest["files"]
+
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    files = []
+    originals = []
+    for index in range(count + duplicates):
+        if index < count:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+            lines = _cv_lines(rng, name)
+            originals.append((name, lines))
+            file_name = f"CV {name}.pdf"
+        else:
+            name, lines = rng.choice(originals)
+            lines = _edited_copy(rng, lines)
+            file_name = f"Currículo atualizado - {name}.pdf"
+        data = _render_pdf(lines, name)
+        if index < min(scanned, count):
+            data = _scanned_copy(data)
+        file_id = f"cv{index:05d}"
+        with open(os.path.join(directory, f"{file_id}.pdf"), "wb") as f:
+            f.write(data)
+        files.append({
+            "id": file_id,
+            "name": file_name,
+            "md5Checksum": hashlib.md5(data).hexdigest(),
+            "modifiedTime": (start + timedelta(minutes=index)).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "size": str(len(data)),
+        })
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "duplicates": duplicates, "scanned": scanned, "files": files}, f)
+    return files
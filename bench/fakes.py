@@ -0,0 +1,484 @@
+"""Servidor HTTP local que imita as APIs da Groq, do Google Drive e do Trello.
+
+Atende apenas as chamadas feitas pelo ThunderGet:
+
+- Groq:   POST /groq/openai/v1/chat/completions (texto e imagens) e a Batch API (POST /groq/openai/v1/files,
+          GET /groq/openai/v1/files/<id>/content, POST /groq/openai/v1/batches,
+          GET /groq/openai/v1/batches/<id> e POST /groq/openai/v1/batches/<id>/cancel)
+- Drive:  GET /drive/files (listagem) e GET /drive/files/<id>?alt=media
+- Trello: GET /trello/1/members/me/boards, GET /trello/1/boards/<id>/lists,
+          POST /trello/1/cards, PUT /trello/1/cards/<id>, POST /trello/1/cards/<id>/actions/comments
+          e GET /trello/1/lists/<id>/cards
+
+As chamadas com `stream=True` são respondidas em Server-Sent Events, um trecho por
+token, como a API verdadeira.
+
+Latência, taxa de erros 5xx e de respostas 429 são configuráveis por serviço. A Groq
+falsa também aplica um limite real de requisições por minuto, com os cabeçalhos
+`x-ratelimit-*` e `retry-after` da API verdadeira.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench.corpus import FIRST_NAMES, LAST_NAMES, _cv_lines
+
+SERVICES = ("groq", "drive", "trello")
+
+
+@dataclass
+class ServiceConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0  # Fração de respostas 500.
+    rate_limit_rate: float = 0.0  # Fração de respostas 429 (além do limite por minuto da Groq).
+    retry_after: float = 1.0  # Segundos informados em `retry-after` nas respostas 429.
+
+
+@dataclass
+class FakeApiConfig:
+    groq: ServiceConfig = field(default_factory=ServiceConfig)
+    drive: ServiceConfig = field(default_factory=ServiceConfig)
+    trello: ServiceConfig = field(default_factory=ServiceConfig)
+    groq_ms_per_1k_tokens: float = 0.0  # Latência extra proporcional ao tamanho do prompt.
+    groq_ms_per_output_token: float = 0.0  # Tempo de geração de cada token da resposta.
+    groq_rpm: int = 0  # Limite de requisições por minuto da Groq falsa (0 = sem limite).
+    seed: int = 0
+
+
+class _MinuteWindow:
+    """Limite de requisições por minuto com recarga contínua, como o da Groq."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.available = float(limit)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Consome uma requisição; devolve (permitido, restantes, segundos até recarregar uma)."""
+        with self.lock:
+            now = time.monotonic()
+            rate = self.limit / 60.0
+            self.available = min(self.limit, self.available + (now - self.updated_at) * rate)
+            self.updated_at = now
+            if self.available >= 1:
+                self.available -= 1
+                return True, int(self.available), 0.0
+            return False, 0, (1 - self.available) / rate
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, config, corpus_dir, files):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.corpus_dir = corpus_dir
+        self.files = files
+        self.files_by_id = {f["id"]: f for f in files}
+        self.window = _MinuteWindow(config.groq_rpm) if config.groq_rpm else None
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.stats = Counter()
+        self.cards = {}
+        self.groq_files = {}
+        self.batches = {}
+        self.lists = [{"id": "list-approved", "name": "Aprovados"},
+                      {"id": "list-reproved", "name": "Reprovados"}]
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def roll(self):
+        with self.lock:
+            return self.rng.random()
+
+
+def _score_for(name):
+    return int(hashlib.md5(name.encode("utf-8")).hexdigest(), 16) % 101
+
+
+def _prompt_tokens(request):
+    prompt = "".join(m["content"] for m in request.get("messages", []) if isinstance(m.get("content"), str))
+    return len(prompt) // 4 + 1
+
+
+def _image_urls(request):
+    content = (request.get("messages") or [{}])[-1].get("content")
+    if not isinstance(content, list):
+        return []
+    return [part["image_url"]["url"] for part in content if part.get("type") == "image_url"]
+
+
+def _ocr_text(image_urls):
+    """"Leitura" de páginas digitalizadas: texto de currículo determinístico por imagem, com o marcador de página."""
+    pages = []
+    for number, url in enumerate(image_urls, start=1):
+        rng = random.Random(hashlib.md5(url.encode("ascii")).hexdigest())
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+        text = "\n".join([f"Currículo - {name}"] + _cv_lines(rng, name)[:30])
+        pages.append(f"=== Página {number} ===\n{text}" if len(image_urls) > 1 else text)
+    return "\n".join(pages)
+
+
+def _completion(request, completion_id):
+    """Resposta de chat completion determinística para o currículo enviado."""
+    messages = request.get("messages", [])
+    user_text = messages[-1]["content"] if messages and isinstance(messages[-1]["content"], str) else ""
+    # O currículo vem depois do separador "---"; o nome é a primeira linha (sem o cabeçalho da página).
+    cv_text = user_text.split("\n---\n", 1)[-1]
+    first_line = next((line.strip() for line in cv_text.splitlines() if line.strip()), "Candidato")
+    name = first_line.removeprefix("Currículo - ")
+    if _image_urls(request):
+        content = _ocr_text(_image_urls(request))
+    elif request.get("response_format"):
+        # Serve tanto a extração de nome/nota quanto a pré-triagem ("score").
+        content = json.dumps({"candidate_name": name, "final_score": _score_for(name),
+                              "score": _score_for(user_text)})
+    else:
+        content = (f"**Nome do candidato:** {name}\n\n## Análise\n"
+                   f"Perfil compatível em parte com a vaga; experiência relevante em projetos.\n\n"
+                   f"**Nota final: {_score_for(name)}/100**\n\n## Recomendação\n"
+                   f"Seguir para a entrevista técnica se houver vagas remanescentes após a primeira rodada.")
+    prompt_tokens = _prompt_tokens(request)
+    completion_tokens = len(content) // 4 + 1
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "fake"),
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+
+
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def _process_batch(server, batch, requests):
+    """Processa um lote em segundo plano: respostas no arquivo de saída, falhas no de erros."""
+    config = server.config
+    lines = [json.loads(line) for line in requests.decode("utf-8").splitlines() if line.strip()]
+    with server.lock:
+        batch["status"] = "in_progress"
+        batch["request_counts"]["total"] = len(lines)
+    output, errors = [], []
+    for index, line in enumerate(lines):
+        with server.lock:
+            cancelled = batch["status"] == "cancelling"
+        if config.groq.latency_ms:
+            time.sleep(config.groq.latency_ms / 1000)
+        failed = cancelled or server.roll() < config.groq.error_rate
+        if failed:
+            code, message = ("batch_cancelled", "Batch cancelled") if cancelled else ("server_error", "Internal error")
+            errors.append({"id": f"batch_req_{index}", "custom_id": line["custom_id"], "response": None,
+                           "error": {"code": code, "message": message}})
+        else:
+            output.append({"id": f"batch_req_{index}", "custom_id": line["custom_id"], "error": None,
+                           "response": {"status_code": 200, "request_id": f"req_{index}",
+                                        "body": _completion(line["body"], f"chatcmpl-batch-{index}")}})
+        with server.lock:
+            batch["request_counts"]["failed" if failed else "completed"] += 1
+    with server.lock:
+        for key, entries in (("output_file_id", output), ("error_file_id", errors)):
+            if entries:
+                file_id = f"file_{len(server.groq_files) + 1}"
+                server.groq_files[file_id] = "".join(
+                    json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+                batch[key] = file_id
+        batch["status"] = "cancelled" if batch["status"] == "cancelling" else "completed"
+        batch["completed_at"] = int(time.time())
+    server.count("groq.batches")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # --- Utilidades ---
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _simulate(self, service, extra_ms=0.0):
+        """Aplica latência e falhas configuradas; devolve True se a resposta já foi enviada."""
+        server = self.server
+        config = getattr(server.config, service)
+        server.count(f"{service}.requests")
+        delay = config.latency_ms + extra_ms
+        if config.jitter_ms:
+            delay += server.roll() * config.jitter_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+        roll = server.roll()
+        if roll < config.rate_limit_rate:
+            server.count(f"{service}.429")
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                       headers={"retry-after": f"{config.retry_after:g}"})
+            return True
+        if roll < config.rate_limit_rate + config.error_rate:
+            server.count(f"{service}.500")
+            self._send(500, {"error": {"message": "Internal server error", "type": "server_error"}})
+            return True
+        return False
+
+    # --- Roteamento ---
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body = self._read_body() if method in ("POST", "PUT") else b""
+        path = url.path
+        try:
+            if path.startswith("/groq/"):
+                self._groq(method, path, body)
+            elif path.startswith("/drive/"):
+                self._drive(path, query)
+            elif path.startswith("/trello/1/"):
+                self._trello(method, path[len("/trello/1"):], query, body)
+            else:
+                self._send(404, {"error": "not found"})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    # --- Groq ---
+    def _groq(self, method, path, body):
+        prefix = "/groq/openai/v1"
+        path = path[len(prefix):] if path.startswith(prefix) else None
+        if method == "POST" and path == "/chat/completions":
+            return self._groq_chat(body)
+        if path and (path.startswith("/files") or path.startswith("/batches")):
+            return self._groq_batch(method, path, body)
+        self._send(404, {"error": {"message": "not found"}})
+
+    def _groq_chat(self, body):
+        request = json.loads(body or b"{}")
+        prompt_tokens = _prompt_tokens(request)
+        if self._simulate("groq", prompt_tokens / 1000 * self.server.config.groq_ms_per_1k_tokens):
+            return
+
+        headers = {}
+        window = self.server.window
+        if window:
+            allowed, remaining, wait = window.take()
+            headers = {"x-ratelimit-limit-requests": str(window.limit),
+                       "x-ratelimit-remaining-requests": str(remaining),
+                       "x-ratelimit-reset-requests": f"{60 / window.limit:.2f}s"}
+            if not allowed:
+                self.server.count("groq.429")
+                return self._send(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                  headers={**headers, "retry-after": f"{wait:.2f}"})
+
+        self.server.count("groq.ok")
+        images = _image_urls(request)
+        if images:
+            self.server.count("groq.images", len(images))
+            self.server.count("groq.image_bytes", sum(len(url) for url in images))
+        completion = _completion(request, f"chatcmpl-{self.server.stats['groq.requests']}")
+        if request.get("stream"):
+            return self._stream_completion(completion, headers)
+        output_tokens = completion["usage"]["completion_tokens"]
+        if self.server.config.groq_ms_per_output_token:
+            time.sleep(output_tokens * self.server.config.groq_ms_per_output_token / 1000)
+        self.server.count("groq.output_tokens", output_tokens)
+        self._send(200, completion, headers=headers)
+
+    def _stream_completion(self, completion, headers):
+        """Envia a resposta em Server-Sent Events (codificação chunked), um token (~4 caracteres) por evento."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        def event(data):
+            payload = f"data: {data}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(payload):x}\r\n".encode("ascii") + payload + b"\r\n")
+            self.wfile.flush()
+
+        content = completion["choices"][0]["message"]["content"]
+        base = {key: completion[key] for key in ("id", "created", "model")}
+        delay = self.server.config.groq_ms_per_output_token / 1000
+        for start in range(0, len(content), 4):
+            if delay:
+                time.sleep(delay)
+            # Um cliente que encerra a geração no meio fecha a conexão: o envio para aqui.
+            event(json.dumps({**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "delta": {"content": content[start:start + 4]}, "finish_reason": None}]}))
+            self.server.count("groq.output_tokens")
+        event(json.dumps({**base, "object": "chat.completion.chunk",
+                          "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                          "x_groq": {"id": completion["id"], "usage": completion["usage"]}}))
+        event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _groq_batch(self, method, path, body):
+        # A Batch API não passa pelos limites por minuto nem pelas falhas simuladas da Groq.
+        server = self.server
+        server.count("groq.batch_requests")
+        if method == "POST" and path == "/files":
+            # Upload multipart/form-data com os campos "file" e "purpose".
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("latin-1") + body)
+            parts = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                     for part in message.get_payload()}
+            with server.lock:
+                file_id = f"file_{len(server.groq_files) + 1}"
+                server.groq_files[file_id] = parts.get("file") or b""
+            return self._send(200, {"id": file_id, "object": "file", "bytes": len(parts.get("file") or b""),
+                                    "created_at": int(time.time()), "filename": "batch.jsonl",
+                                    "purpose": "batch"})
+        match = re.fullmatch(r"/files/([^/]+)/content", path)
+        if method == "GET" and match:
+            with server.lock:
+                content = server.groq_files.get(match.group(1))
+            if content is None:
+                return self._send(404, {"error": {"message": "file not found"}})
+            return self._send(200, content, content_type="application/octet-stream")
+        if method == "POST" and path == "/batches":
+            request = json.loads(body or b"{}")
+            with server.lock:
+                requests = server.groq_files.get(request.get("input_file_id"))
+                if requests is None:
+                    return self._send(400, {"error": {"message": "input file not found"}})
+                batch = {"id": f"batch_{len(server.batches) + 1}", "object": "batch",
+                         "endpoint": request.get("endpoint"), "input_file_id": request["input_file_id"],
+                         "completion_window": request.get("completion_window", "24h"),
+                         "created_at": int(time.time()), "status": "validating",
+                         "metadata": request.get("metadata"), "output_file_id": None, "error_file_id": None,
+                         "request_counts": {"total": 0, "completed": 0, "failed": 0}}
+                server.batches[batch["id"]] = batch
+            threading.Thread(target=_process_batch, args=(server, batch, requests), daemon=True).start()
+            return self._send(200, batch)
+        match = re.fullmatch(r"/batches/([^/]+)(/cancel)?", path)
+        if match:
+            with server.lock:
+                batch = server.batches.get(match.group(1))
+                if batch and match.group(2) and method == "POST" and batch["status"] not in BATCH_FINAL_STATUSES:
+                    batch["status"] = "cancelling"
+                payload = json.loads(json.dumps(batch)) if batch else None
+            if payload is None:
+                return self._send(404, {"error": {"message": "batch not found"}})
+            return self._send(200, payload)
+        self._send(404, {"error": {"message": "not found"}})
+
+    # --- Drive ---
+    def _drive(self, path, query):
+        if self._simulate("drive"):
+            return
+        match = re.fullmatch(r"/drive/files/([^/]+)", path)
+        if match and query.get("alt") == "media":
+            info = self.server.files_by_id.get(match.group(1))
+            if info is None:
+                return self._send(404, {"error": {"message": "File not found"}})
+            with open(os.path.join(self.server.corpus_dir, f"{info['id']}.pdf"), "rb") as f:
+                data = f.read()
+            # Download em pedaços: `Range: bytes=início-fim` responde 206 com Content-Range.
+            byte_range = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if byte_range is None:
+                self.server.count("drive.bytes", len(data))
+                return self._send(200, data, content_type="application/pdf")
+            start = int(byte_range.group(1))
+            end = min(int(byte_range.group(2) or len(data) - 1), len(data) - 1)
+            if start >= len(data):
+                return self._send(416, headers={"Content-Range": f"bytes */{len(data)}"})
+            self.server.count("drive.bytes", end - start + 1)
+            return self._send(206, data[start:end + 1], content_type="application/pdf",
+                              headers={"Content-Range": f"bytes {start}-{end}/{len(data)}"})
+        if path != "/drive/files":
+            return self._send(404, {"error": {"message": "not found"}})
+        if "application/vnd.google-apps.folder" in query.get("q", ""):
+            return self._send(200, {"files": [{"id": "bench-folder", "name": "Benchmark"}]})
+        start = int(query.get("pageToken") or 0)
+        size = int(query.get("pageSize") or 100)
+        files = self.server.files[start:start + size]
+        response = {"files": files}
+        if start + size < len(self.server.files):
+            response["nextPageToken"] = str(start + size)
+        self._send(200, response)
+
+    # --- Trello ---
+    def _trello(self, method, path, query, body):
+        if self._simulate("trello"):
+            return
+        server = self.server
+        if method == "GET" and path == "/members/me/boards":
+            return self._send(200, [{"id": "bench-board", "name": "Benchmark"}])
+        if method == "GET" and re.fullmatch(r"/boards/[^/]+/lists", path):
+            return self._send(200, server.lists)
+        match = re.fullmatch(r"/lists/([^/]+)/cards", path)
+        if method == "GET" and match:
+            with server.lock:
+                cards = [c for c in server.cards.values() if c["idList"] == match.group(1)]
+            return self._send(200, cards)
+        payload = json.loads(body or b"{}")
+        if method == "POST" and path == "/cards":
+            with server.lock:
+                card = {"id": f"card{len(server.cards) + 1}", "idList": payload.get("idList"),
+                        "name": payload.get("name"), "desc": payload.get("desc", "")}
+                server.cards[card["id"]] = card
+            return self._send(200, card)
+        match = re.fullmatch(r"/cards/([^/]+)/actions/comments", path)
+        if method == "POST" and match:
+            with server.lock:
+                card = server.cards.get(match.group(1))
+                if card:
+                    card.setdefault("comments", []).append(payload.get("text", ""))
+                    server.stats["trello.comments"] += 1
+            return self._send(200, {"id": f"comment-{time.time_ns()}"}) if card \
+                else self._send(404, {"message": "card not found"})
+        match = re.fullmatch(r"/cards/([^/]+)", path)
+        if method == "PUT" and match:
+            with server.lock:
+                card = server.cards.get(match.group(1))
+                if card:
+                    card.update({k: payload[k] for k in ("idList", "name", "desc") if k in payload})
+            return self._send(200, card) if card else self._send(404, {"message": "card not found"})
+        self._send(404, {"message": "not found"})
+
+
+def serve(config, corpus_dir, files, port_conn, stats_conn):
+    """Executa o servidor (em um processo próprio) até receber um pedido de estatísticas."""
+    server = FakeApiServer(("127.0.0.1", 0), config, corpus_dir, files)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    port_conn.send(server.server_address[1])
+    stats_conn.recv()
+    stats_conn.send(dict(server.stats, cards=len(server.cards)))
+    server.shutdown()
@@ -0,0 +1,310 @@
+"""Benchmark de ponta a ponta do pipeline de triagem, sem gastar cota das APIs reais.
+
+Gera um corpus sintético de currículos, sobe um servidor local que imita Groq,
+Drive e Trello (`bench/fakes.py`) e executa o mesmo pipeline usado por `app.py`
+e pela linha de comando (`thunderget.screening.build_cv_pipeline`), medindo:
+
+- vazão (currículos por minuto);
+- tempo p50/p95 e ocupação de cada etapa (via `thunderget.telemetry`);
+- RSS de pico do processo e dos processos de extração de PDF.
+
+Exemplo (latências parecidas com as reais e limite de 300 requisições/min na Groq):
+    python -m bench.run --cvs 300 --groq-latency-ms 1500 --groq-jitter-ms 1000 \\
+        --groq-rpm 300 --drive-latency-ms 150 --trello-latency-ms 200
+
+Com `--save` o resultado é gravado em JSON; com `--baseline`, comparado a um
+resultado anterior (saída 1 se a vazão cair ou o RSS crescer além da tolerância).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+
+from bench.corpus import generate_corpus
+from bench.fakes import SERVICES, FakeApiConfig, ServiceConfig, serve
+# `thunderget.cli` só importa a biblioteca padrão; as etapas do pacote são importadas depois de
+# apontar as APIs para o servidor falso.
+from thunderget.cli import CliError, _parse_workers
+
+DEFAULT_CORPUS_DIR = os.path.join(tempfile.gettempdir(), "thunderget-bench-corpus")
+FOLDER_ID = "bench-folder"
+APPROVED_LIST_ID = "list-approved"
+REPROVED_LIST_ID = "list-reproved"
+# Descrição de vaga usada pela pré-triagem no benchmark.
+BENCH_JOB_DESCRIPTION = ("Bolsista de pesquisa em IA: Python, PyTorch, LLMs, RAG, LangChain, NLP, "
+                         "Visão Computacional, MLOps, Docker e Git.")
+
+
+def _rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+
+class RssSampler:
+    """Amostra periodicamente o RSS do processo atual e de seus descendentes.
+
+    Os processos de extração de PDF entram na conta; o servidor falso (`exclude`), não.
+    Fora do Linux, recai em `getrusage`, que cobre apenas o processo atual.
+    """
+
+    def __init__(self, exclude=(), interval=0.2):
+        self.exclude = set(exclude)
+        self.interval = interval
+        self.peak_kb = 0
+        self.peak_main_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-rss", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+    def sample(self):
+        pid = os.getpid()
+        main_kb = _rss_kb(pid)
+        if not main_kb:
+            main_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        total_kb = main_kb
+        pending = [p for p in _children(pid) if p not in self.exclude]
+        while pending:
+            child = pending.pop()
+            total_kb += _rss_kb(child)
+            pending.extend(_children(child))
+        self.peak_main_kb = max(self.peak_main_kb, main_kb)
+        self.peak_kb = max(self.peak_kb, total_kb)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+
+def run_once(args, server_pid, stage_workers):
+    # Importados só depois de apontar as variáveis de ambiente para o servidor falso.
+    from thunderget.cache import AnalysisCache
+    from thunderget.candidates import CandidateStore
+    from thunderget.dedupe import DuplicateIndex
+    from thunderget.drive import build_drive_service, iter_pdfs_from_folder
+    from thunderget.journal import JobJournal
+    from thunderget.pdf import PdfExtractor
+    from thunderget.prescreen import PreScreener
+    from thunderget.prompts import DEFAULT_SYSTEM_PROMPT
+    from thunderget.screening import RunReport, build_cv_pipeline
+    from thunderget.telemetry import Telemetry
+
+    # Token de acesso ainda válido: a biblioteca do Google não tenta renová-lo no servidor real.
+    expiry = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(time.time() + 86400))
+    google_creds = {"token": "fake", "expiry": expiry, "refresh_token": "fake",
+                    "client_id": "fake", "client_secret": "fake"}
+    pdf_extractor = PdfExtractor(workers=stage_workers["extract"], max_chars=args.max_chars)
+    pipeline = build_cv_pipeline(
+        google_creds, "fake-groq-key", DEFAULT_SYSTEM_PROMPT, "fake-trello-key", "fake-trello-token",
+        APPROVED_LIST_ID, REPROVED_LIST_ID, stage_workers, pdf_extractor,
+        cache=None if args.no_cache else AnalysisCache(),
+        journal=None if args.no_journal else JobJournal(),
+        duplicates=None if args.no_dedupe else DuplicateIndex(), candidates=CandidateStore(),
+        prescreener=PreScreener(BENCH_JOB_DESCRIPTION, mode=args.prescreen, api_key="fake-groq-key")
+        if args.prescreen else None,
+        ocr_engine=args.ocr, stream_analysis=args.stream or args.stop_after_score, stop_after_score=args.stop_after_score,
+        token_budget=args.token_budget)
+    telemetry = Telemetry(spans_path=args.spans_file)
+    telemetry.attach(pipeline)
+
+    report = RunReport()
+    kinds = {}
+    with RssSampler(exclude={server_pid}) as rss:
+        start = time.perf_counter()
+        drive_service = build_drive_service(google_creds)
+        for result in pipeline.run(iter_pdfs_from_folder(drive_service, FOLDER_ID)):
+            kind, _, _ = report.record(result)
+            kinds[kind] = kinds.get(kind, 0) + 1
+        elapsed = time.perf_counter() - start
+        pdf_extractor.shutdown()
+    snapshot = telemetry.snapshot()
+    telemetry.close()
+
+    ok = kinds.get("ok", 0)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "results": kinds,
+        "cvs_per_minute": round(ok / elapsed * 60, 2) if elapsed else 0.0,
+        "stages": {
+            name: {"n": stats["n"],
+                   "p50_ms": None if stats["p50_ms"] is None else round(stats["p50_ms"], 1),
+                   "p95_ms": None if stats["p95_ms"] is None else round(stats["p95_ms"], 1),
+                   "utilization": round(stats["utilization"], 3)}
+            for name, stats in snapshot["stages"].items()},
+        "prompt_tokens": snapshot["prompt_tokens"],
+        "completion_tokens": snapshot["completion_tokens"],
+        "groq_retries": snapshot["retries"],
+        "peak_rss_mb": round(rss.peak_kb / 1024, 1),
+        "peak_rss_main_mb": round(rss.peak_main_kb / 1024, 1),
+        "summary": report.summary_lines() + telemetry.summary_lines(),
+    }
+
+
+def print_run(index, total, run):
+    print(f"\nExecução {index}/{total}: {run['elapsed_s']:.1f} s, {run['cvs_per_minute']:.1f} CVs/min "
+          f"({', '.join(f'{k}: {v}' for k, v in sorted(run['results'].items()))})")
+    print(f"  {'Etapa':<10} {'n':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'ocupação':>10}")
+    for name, stats in run["stages"].items():
+        p50 = "-" if stats["p50_ms"] is None else f"{stats['p50_ms']:.1f}"
+        p95 = "-" if stats["p95_ms"] is None else f"{stats['p95_ms']:.1f}"
+        print(f"  {name:<10} {stats['n']:>6} {p50:>10} {p95:>10} {stats['utilization']:>10.0%}")
+    print(f"  RSS de pico: {run['peak_rss_mb']:.1f} MB "
+          f"(processo principal: {run['peak_rss_main_mb']:.1f} MB)")
+    for line in run["summary"]:
+        print(f"  {line}")
+
+
+def compare(result, baseline, tolerance):
+    """Compara a primeira execução com a de referência; devolve a lista de regressões."""
+    current, reference = result["runs"][0], baseline["runs"][0]
+    regressions = []
+    if current["cvs_per_minute"] < reference["cvs_per_minute"] * (1 - tolerance):
+        regressions.append(f"vazão caiu de {reference['cvs_per_minute']:.1f} para "
+                           f"{current['cvs_per_minute']:.1f} CVs/min")
+    if current["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"RSS de pico subiu de {reference['peak_rss_mb']:.1f} para "
+                           f"{current['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m bench.run", description="Benchmark do ThunderGet com APIs falsas locais.")
+    parser.add_argument("--cvs", type=int, default=100, help="Currículos no corpus sintético.")
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Execuções seguidas sobre o mesmo diário e cache (a 2ª em diante mede a retomada).")
+    parser.add_argument("--workers", action="append", metavar="ETAPA=N", help="Workers de uma etapa. Repetível.")
+    parser.add_argument("--max-chars", type=int, default=None)
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--no-journal", action="store_true")
+    parser.add_argument("--no-dedupe", action="store_true")
+    parser.add_argument("--duplicates", type=int, default=0,
+                        help="Cópias levemente editadas de currículos do corpus, acrescentadas a ele.")
+    parser.add_argument("--scanned", type=int, default=0,
+                        help="Currículos do corpus digitalizados (só imagens, sem camada de texto).")
+    parser.add_argument("--ocr", choices=("groq", "tesseract"), help="Lê os currículos digitalizados por OCR.")
+    parser.add_argument("--prescreen", choices=("lexical", "llm"), help="Ativa a pré-triagem.")
+    for service in SERVICES:
+        parser.add_argument(f"--{service}-latency-ms", type=float, default=0.0)
+        parser.add_argument(f"--{service}-jitter-ms", type=float, default=0.0)
+        parser.add_argument(f"--{service}-error-rate", type=float, default=0.0, help="Fração de respostas 500.")
+        parser.add_argument(f"--{service}-429-rate", type=float, default=0.0, help="Fração de respostas 429.")
+        parser.add_argument(f"--{service}-retry-after", type=float, default=1.0)
+    parser.add_argument("--groq-ms-per-1k-tokens", type=float, default=0.0,
+                        help="Latência extra da Groq por 1000 tokens de prompt.")
+    parser.add_argument("--groq-rpm", type=int, default=0, help="Limite de requisições/min da Groq falsa.")
+    parser.add_argument("--groq-ms-per-output-token", type=float, default=0.0,
+                        help="Tempo de geração de cada token da resposta da Groq falsa.")
+    parser.add_argument("--stream", action="store_true", help="Recebe as análises em streaming.")
+    parser.add_argument("--stop-after-score", action="store_true",
+                        help="Encerra cada análise logo após a nota (implica --stream).")
+    parser.add_argument("--spans-file", help="Grava os spans de cada etapa (OTLP JSON lines).")
+    parser.add_argument("--save", help="Grava o resultado em JSON.")
+    parser.add_argument("--baseline", help="Resultado anterior (JSON) para comparação.")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Variação aceita em relação ao baseline (padrão: 15%%).")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    files = generate_corpus(args.corpus_dir, args.cvs, seed=args.seed, duplicates=args.duplicates,
+                            scanned=args.scanned)
+    config = FakeApiConfig(
+        groq_ms_per_1k_tokens=args.groq_ms_per_1k_tokens, groq_rpm=args.groq_rpm, seed=args.seed,
+        groq_ms_per_output_token=args.groq_ms_per_output_token,
+        **{service: ServiceConfig(
+            latency_ms=getattr(args, f"{service}_latency_ms"),
+            jitter_ms=getattr(args, f"{service}_jitter_ms"),
+            error_rate=getattr(args, f"{service}_error_rate"),
+            rate_limit_rate=getattr(args, f"{service}_429_rate"),
+            retry_after=getattr(args, f"{service}_retry_after")) for service in SERVICES})
+
+    # O servidor roda em outro processo para não disputar o GIL com o pipeline medido.
+    context = multiprocessing.get_context("spawn")
+    port_recv, port_send = context.Pipe(duplex=False)
+    stats_conn, server_stats_conn = context.Pipe()
+    server = context.Process(
+        target=serve, args=(config, args.corpus_dir, files, port_send, server_stats_conn), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_recv.recv()}"
+
+    os.environ.update({
+        "GROQ_BASE_URL": f"{base_url}/groq",
+        "THUNDERGET_DRIVE_API_URL": f"{base_url}/drive/",
+        "THUNDERGET_TRELLO_API_URL": f"{base_url}/trello/1",
+        "THUNDERGET_HOME": tempfile.mkdtemp(prefix="thunderget-bench-"),
+        "NO_PROXY": "127.0.0.1,localhost",
+    })
+
+    from thunderget.compaction import DEFAULT_TOKEN_BUDGET
+    from thunderget.pdf import DEFAULT_MAX_CHARS
+    from thunderget.screening import DEFAULT_STAGE_WORKERS
+    args.max_chars = args.max_chars or DEFAULT_MAX_CHARS
+    args.token_budget = args.token_budget or DEFAULT_TOKEN_BUDGET
+    try:
+        stage_workers = {**DEFAULT_STAGE_WORKERS, **_parse_workers(args.workers, DEFAULT_STAGE_WORKERS)}
+    except CliError as e:
+        server.terminate()
+        parser.error(str(e))
+
+    print(f"Corpus: {len(files)} PDFs em {args.corpus_dir}; workers: "
+          + ", ".join(f"{name}={count}" for name, count in stage_workers.items()))
+    runs = []
+    for index in range(args.repeat):
+        runs.append(run_once(args, server.pid, stage_workers))
+        print_run(index + 1, args.repeat, runs[-1])
+
+    stats_conn.send("stats")
+    server_stats = stats_conn.recv()
+    server.join(timeout=5)
+    print("\nServidor falso: " + ", ".join(f"{key}={value}" for key, value in sorted(server_stats.items())))
+
+    result = {"cvs": len(files), "stage_workers": stage_workers, "config": asdict(config),
+              "runs": runs, "server": server_stats}
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSÃO: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from thunderget.cli import CliError, _load_jobs, _parse_workers
+
+STAGES = ("download", "extract", "analyze")
+
+
+def _jobs_file(tmp_path, jobs):
+    path = tmp_path / "vagas.json"
+    path.write_text(json.dumps(jobs), encoding="utf-8")
+    return str(path)
+
+
+def test_jobs_file_resolves_paths_and_names(tmp_path):
+    jobs = _load_jobs(_jobs_file(tmp_path, [{"board": "Seleção", "prompt_file": "especialista.txt",
+                                             "threshold": 75}]))
+    assert jobs[0]["name"] == "especialista"
+    assert jobs[0]["prompt_file"] == str(tmp_path / "especialista.txt")
+
+
+@pytest.mark.parametrize("job", [
+    {"board": "Seleção", "threshold": "75"},
+    {"board": "Seleção", "threshold": 120},
+    {"board": "Seleção", "threshold": True},
+    {"board": ["Seleção"]},
+    {"board": "Seleção", "prompt_file": 3},
+])
+def test_jobs_file_rejects_invalid_fields(tmp_path, job):
+    with pytest.raises(CliError):
+        _load_jobs(_jobs_file(tmp_path, [job]))
+
+
+def test_workers_override_known_stages():
+    assert _parse_workers(["analyze=8", " extract=3"], STAGES) == {"analyze": 8, "extract": 3}
+
+
+@pytest.mark.parametrize("value", ["anlyze=4", "analyze=0", "analyze"])
+def test_workers_rejects_unknown_stages_and_bad_counts(value):
+    with pytest.raises(CliError):
+        _parse_workers([value], STAGES)
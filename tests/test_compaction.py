@@ -0,0 +1,38 @@
+from thunderget.compaction import compact_cv_text, dedupe_lines, remove_page_boilerplate
+
+HEADER = "Ana Souza\nana.souza@email.com | (71) 99999-0000\n"
+FOOTER = "Currículo atualizado em março de 2024\n"
+
+
+def _pages():
+    return [
+        HEADER + "Experiência\nEmpresa A — Analista de Dados\nPrincipais atividades:\n"
+        "- Modelagem de dados de vendas\nEmpresa B — Desenvolvedora Python\nPrincipais atividades:\n"
+        "- APIs com FastAPI\n" + FOOTER + "1",
+        HEADER + "Empresa C — Cientista de Dados\nPrincipais atividades:\n- Modelos de previsão\n"
+        "Formação\nBacharelado em Ciência da Computação\n" + FOOTER + "2",
+    ]
+
+
+def test_repeated_headers_and_footers_are_removed_once():
+    text = "\n".join(remove_page_boilerplate(_pages()))
+    assert text.count("ana.souza@email.com") == 1
+    assert text.count(FOOTER.strip()) == 1
+
+
+def test_repeated_sub_headers_stay_under_each_employer():
+    text, _ = compact_cv_text("".join(_pages()), _pages(), token_budget=None)
+    lines = text.splitlines()
+    assert lines.count("Principais atividades:") == 3
+    for employer, activity in (("Empresa A", "Modelagem"), ("Empresa B", "APIs"), ("Empresa C", "Modelos")):
+        start = next(index for index, line in enumerate(lines) if line.startswith(employer))
+        assert lines[start + 1] == "Principais atividades:"
+        assert activity in lines[start + 2]
+
+
+def test_dedupe_lines_drops_only_long_exact_repeats():
+    text = "Desenvolvimento de APIs em Python\nDesenvolvimento de APIs em Python\nResponsabilidades principais:\n" \
+           "- item\nResponsabilidades principais:\n- outro"
+    assert dedupe_lines(text).splitlines() == [
+        "Desenvolvimento de APIs em Python", "Responsabilidades principais:", "- item",
+        "Responsabilidades principais:", "- outro"]
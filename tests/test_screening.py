@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from thunderget import screening
+from thunderget.journal import JobJournal, prompt_version
+from thunderget.pipeline import PipelineResult
+from thunderget.telemetry import Telemetry
+from thunderget.trello import CardNotFound
+
+PROMPT = "prompt"
+
+
+def _stage(pipeline, name):
+    return next(stage.func for stage in pipeline.stages if stage.name == name)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    return JobJournal(str(tmp_path / "journal.db"))
+
+
+@pytest.fixture
+def card_stage(journal):
+    pipeline = screening.build_cv_pipeline(
+        None, "groq", PROMPT, "key", "token", "aprovados", "reprovados",
+        screening.DEFAULT_STAGE_WORKERS, None, journal=journal)
+    return _stage(pipeline, "card")
+
+
+def _copy_job():
+    return {"pdf": {"id": "copia", "name": "copia.pdf"}, "cached": True, "resumed": False,
+            "analysis": "Nome do candidato: Ana\nNota final: 90", "candidate_name": "Ana",
+            "final_score": 90, "card_id": "card-original", "original_list_id": "aprovados",
+            "duplicate_of": {"file_id": "original", "file_name": "original.pdf", "md5": None,
+                             "similarity": 0.97}}
+
+
+def test_copy_is_linked_by_a_comment(monkeypatch, journal, card_stage):
+    monkeypatch.setattr(screening, "add_trello_comment", lambda *args: {"id": "comentario"})
+    job = card_stage(_copy_job())
+    assert job["card"] == {"id": "card-original"}
+    assert journal.get("copia", prompt_version(PROMPT))["state"] == "carded"
+
+
+def test_copy_stays_pending_when_the_comment_fails(monkeypatch, journal, card_stage):
+    monkeypatch.setattr(screening, "add_trello_comment", lambda *args: None)
+    job = card_stage(_copy_job())
+    result = PipelineResult(job["pdf"], job, stage="card", completed=True)
+    assert screening.describe_result(result)[0] == "card_failed"
+    entry = journal.get("copia", prompt_version(PROMPT))
+    assert entry is None or entry["state"] != "carded"
+
+
+def test_copy_gets_its_own_card_when_the_original_was_deleted(monkeypatch, journal, card_stage):
+    def deleted(*args):
+        raise CardNotFound("card-original")
+
+    created = []
+    monkeypatch.setattr(screening, "add_trello_comment", deleted)
+    monkeypatch.setattr(screening, "create_trello_card",
+                        lambda key, token, list_id, name, desc: created.append(list_id) or {"id": "card-copia"})
+    job = card_stage(_copy_job())
+    assert "duplicate_of" not in job and created == ["aprovados"]
+    entry = journal.get("copia", prompt_version(PROMPT))
+    assert (entry["state"], entry["card_id"]) == ("carded", "card-copia")
+
+
+def test_compaction_savings_are_recorded_for_each_cv(tmp_path, journal):
+    pipeline = screening.build_cv_pipeline(
+        None, "groq", PROMPT, "key", "token", "aprovados", "reprovados",
+        screening.DEFAULT_STAGE_WORKERS, None, journal=journal)
+    telemetry = Telemetry(spans_path=str(tmp_path / "spans.jsonl"))
+    telemetry.attach(pipeline)
+    header = "Ana Souza\nana.souza@email.com | (71) 99999-0000\n"
+    pages = [header + "Experiência\n" + "- Desenvolvimento de APIs em Python\n" * 3 + "1",
+             header + "Formação\nBacharelado em Ciência da Computação\n2"]
+    pdf = {"id": "cv1", "name": "cv1.pdf"}
+    with telemetry.span("compact", pdf):
+        job = _stage(pipeline, "compact")({"pdf": pdf, "cached": False, "text": "".join(pages), "pages": pages})
+    telemetry.close()
+
+    with open(tmp_path / "spans.jsonl", encoding="utf-8") as f:
+        span = json.loads(f.readline())
+    attributes = {attribute["key"]: attribute["value"] for attribute in span["attributes"]}
+    assert job["tokens_saved"] > 0
+    for name in ("tokens_before", "tokens_after", "tokens_saved"):
+        assert attributes[f"thunderget.compaction.{name}"] == {"intValue": str(job[name])}
@@ -0,0 +1 @@
+"""Núcleo do ThunderGet: funções reutilizáveis pela interface Streamlit."""
@@ -0,0 +1,5 @@
+from thunderget.cli import main
+
+# A guarda é necessária: os processos "spawn" do pool de extração reimportam este módulo.
+if __name__ == "__main__":
+    raise SystemExit(main())
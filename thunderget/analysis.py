@@ -0,0 +1,249 @@
+"""Chamadas à Groq: leitura de imagens, geração de prompts, análise de currículos e extração da nota."""
+import json
+import logging
+import re
+import time
+from types import SimpleNamespace
+
+from thunderget import telemetry
+from thunderget.clients import create_chat_completion, estimate_tokens
+from thunderget.ocr import image_data_url, prepare_image
+from thunderget.parsing import parse_analysis_locally, parse_candidate_name, parse_final_score
+from thunderget.prompts import EXTRACTION_SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_MODEL = "llama-3.3-70b-versatile"
+VISION_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+PROMPT_MODEL = "meta-llama/llama-4-scout-17b-16e-instruct"
+EXTRACTION_MODEL = "openai/gpt-oss-20b"
+
+OCR_PROMPT = ("Extraia todo o texto visível nesta imagem. Retorne apenas o texto extraído, "
+              "sem comentários, descrições ou formatação adicional.")
+OCR_PAGES_PROMPT = (
+    "As {count} imagens a seguir são páginas de um mesmo documento, na ordem. Extraia todo o texto "
+    "visível em cada uma. Antes do texto de cada página, escreva uma linha \"=== Página N ===\" "
+    "(N de 1 a {count}). Retorne apenas essas linhas e o texto extraído, sem comentários, descrições "
+    "ou formatação adicional.")
+_PAGE_MARKER_RE = re.compile(r"^\s*=+\s*P[áa]gina\s+(\d+)\s*=+\s*$", re.MULTILINE | re.IGNORECASE)
+
+
+def extract_text_from_images_groq(api_key, images):
+    """Transcreve páginas (JPEG, ver `thunderget.ocr`) em uma única chamada ao modelo multimodal.
+
+    Devolve o texto de cada imagem, na ordem, ou None se a chamada falhar. Se o modelo não
+    separar as páginas como pedido, todo o texto fica na primeira.
+    """
+    prompt = (OCR_PROMPT if len(images) == 1
+              else OCR_PAGES_PROMPT.format(count=len(images)))
+    try:
+        response = create_chat_completion(
+            api_key,
+            model=VISION_MODEL,
+            messages=[
+                {
+                    "role": "user",
+                    "content": [{"type": "text", "text": prompt}] + [
+                        {"type": "image_url", "image_url": {"url": image_data_url(image)}}
+                        for image in images],
+                }
+            ],
+            max_tokens=min(8192, 2048 * len(images)),
+            temperature=0,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao processar imagem com a Groq: {e}")
+        return None
+    text = response.choices[0].message.content or ""
+    if len(images) == 1:
+        return [text.strip()]
+    parts = _PAGE_MARKER_RE.split(text)
+    pages = {int(number): body.strip() for number, body in zip(parts[1::2], parts[2::2])}
+    if sorted(pages) != list(range(1, len(images) + 1)):
+        logger.warning("O modelo não separou o texto por página; o texto lido fica todo na primeira página.")
+        return [text.strip()] + [""] * (len(images) - 1)
+    return [pages[number] for number in sorted(pages)]
+
+
+def extract_text_from_image_groq(api_key, image_bytes):
+    """Extrai texto de uma imagem usando o modelo multimodal da Groq.
+
+    A imagem é reduzida e recodificada em JPEG antes do envio (ver `prepare_image`).
+    """
+    if not api_key:
+        logger.error("A chave da API Groq é necessária para ler o texto de imagens.")
+        return None
+    try:
+        image = prepare_image(image_bytes)
+    except Exception as e:
+        logger.error(f"Não foi possível ler a imagem: {e}")
+        return None
+    texts = extract_text_from_images_groq(api_key, [image])
+    return texts[0] if texts else None
+
+
+def generate_recruiter_prompt(api_key, job_description):
+    if not job_description:
+        logger.error("A descrição da vaga está vazia.")
+        return None
+    meta_prompt = f"""
+Você é um especialista em engenharia de prompts. Sua tarefa é criar um 'system prompt' detalhado para uma outra IA, que atuará como um(a) recrutador(a) técnico(a) sênior.
+O 'system prompt' deve ser baseado na descrição da vaga abaixo, seguindo a estrutura de tags XML do exemplo original. A seção `<evaluation_criteria>` é a mais importante, detalhando os critérios e a pontuação máxima para cada um, totalizando 100 pontos.
+**Descrição da Vaga:**
+---
+{job_description}
+---
+Gere o 'system prompt' completo, começando com `<role>` e terminando com `</general_rules>`.
+"""
+    try:
+        response = create_chat_completion(
+            api_key,
+            messages=[
+                {"role": "system",
+                    "content": "Você é um especialista em engenharia de prompts."},
+                {"role": "user", "content": meta_prompt}
+            ],
+            model=PROMPT_MODEL
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        logger.error(f"Erro ao gerar novo prompt: {e}")
+        return None
+
+
+def build_analysis_request(system_prompt, cv_text):
+    """Corpo da chamada de análise; o mesmo é usado na chamada direta e no modo em lote."""
+    return {
+        "model": ANALYSIS_MODEL,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"Por favor, analise o seguinte currículo:\n\n---\n\n{cv_text}"}
+        ],
+    }
+
+
+def get_analysis_from_groq(api_key, system_prompt, cv_text):
+    if not cv_text:
+        return None
+    try:
+        chat_completion = create_chat_completion(
+            api_key, **build_analysis_request(system_prompt, cv_text))
+        return chat_completion.choices[0].message.content
+    except Exception as e:
+        logger.error(f"Erro ao chamar a API Groq: {e}")
+        return None
+
+
+def stream_analysis_from_groq(api_key, system_prompt, cv_text, on_progress=None, stop_after_score=False):
+    """Como `get_analysis_from_groq`, mas recebe a resposta em streaming.
+
+    `on_progress(progress)` é chamado a cada trecho recebido com o dicionário
+    `progress` ("text", "candidate_name", "final_score", "stopped_early", "done"); o nome e
+    a nota são preenchidos assim que as linhas "Nome do candidato" e "Nota final"
+    terminam de chegar. Com `stop_after_score`, a geração é interrompida logo após a
+    linha da nota (se o nome já tiver sido lido), economizando tempo e tokens de saída.
+    """
+    if not cv_text:
+        return None
+    request = build_analysis_request(system_prompt, cv_text)
+    progress = {"text": "", "candidate_name": None, "final_score": None, "stopped_early": False,
+                "done": False}
+    started = time.perf_counter()
+    checked = 0  # Até onde o texto (em linhas completas) já foi procurado pelos marcadores.
+    usage = None
+    try:
+        stream = create_chat_completion(api_key, stream=True, **request)
+        for chunk in stream:
+            x_groq = getattr(chunk, "x_groq", None)
+            usage = getattr(chunk, "usage", None) or (x_groq.usage if x_groq else None) or usage
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            if not progress["text"]:
+                telemetry.record_timing("time_to_first_token", time.perf_counter() - started)
+            progress["text"] += delta
+            end = progress["text"].rfind("\n") + 1
+            if end > checked:
+                _find_markers(progress, progress["text"][checked:end], started)
+                checked = end
+            if on_progress:
+                on_progress(progress)
+            if stop_after_score and progress["final_score"] is not None and progress["candidate_name"]:
+                # O que chegou depois da linha da nota é descartado.
+                progress["text"] = progress["text"][:checked].rstrip()
+                progress["stopped_early"] = True
+                stream.close()
+                break
+    except Exception as e:
+        logger.error(f"Erro ao chamar a API Groq: {e}")
+        return None
+
+    if not progress["stopped_early"]:
+        # A última linha pode terminar sem quebra de linha.
+        _find_markers(progress, progress["text"][checked:], started)
+    progress["done"] = True
+    if on_progress:
+        on_progress(progress)
+    if usage is None:
+        # Uma geração interrompida não recebe o uso da API: estima localmente.
+        usage = SimpleNamespace(
+            prompt_tokens=sum(estimate_tokens(m["content"]) for m in request["messages"]),
+            completion_tokens=estimate_tokens(progress["text"]))
+    telemetry.record_usage(request["model"], usage)
+    return progress["text"]
+
+
+def _find_markers(progress, lines, started):
+    if progress["candidate_name"] is None:
+        progress["candidate_name"] = parse_candidate_name(lines)
+    score = parse_final_score(lines)
+    if score is not None:
+        if progress["final_score"] is None:
+            telemetry.record_timing("time_to_score", time.perf_counter() - started)
+        # Vale a última ocorrência, como em `parse_final_score`.
+        progress["final_score"] = score
+
+
+def parse_analysis_data(analysis_text, groq_api_key):
+    """
+    Extrai o nome do candidato e a nota final do texto de análise.
+
+    Os marcadores exigidos pelo prompt são lidos localmente; a LLM só é chamada
+    quando essa leitura falha. Retorna (nome, nota, origem), com origem "local",
+    "llm" ou None quando nenhuma das duas funcionou.
+    """
+    local_result = parse_analysis_locally(analysis_text)
+    if local_result:
+        return (*local_result, "local")
+
+    if not analysis_text or not groq_api_key:
+        return "Candidato Desconhecido", 0, None
+
+    try:
+        response = create_chat_completion(
+            groq_api_key,
+            messages=[
+                {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
+                {"role": "user", "content": analysis_text}
+            ],
+            model=EXTRACTION_MODEL,
+            # Força o formato de resposta JSON
+            response_format={"type": "json_object"}
+        )
+
+        # A resposta já vem como um objeto JSON
+        extracted_data = json.loads(response.choices[0].message.content)
+
+        candidate_name = extracted_data.get(
+            "candidate_name", "Candidato Desconhecido")
+        final_score = extracted_data.get("final_score", 0)
+
+        # Garante que a nota seja um inteiro e está dentro do limite
+        if not isinstance(final_score, int) or not (0 <= final_score <= 100):
+            final_score = 0
+
+        return candidate_name, final_score, "llm"
+
+    except Exception as e:
+        logger.error(f"Erro ao analisar o texto de análise com a LLM: {e}")
+        return "Candidato Desconhecido", 0, None
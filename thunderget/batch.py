@@ -0,0 +1,355 @@
+"""Modo em lote: análise de muitos currículos pela Batch API da Groq.
+
+Em vez de uma chamada síncrona por currículo (sujeita aos limites por minuto), as
+análises que seriam feitas por `get_analysis_from_groq` são gravadas em um arquivo
+JSONL, enviadas de uma vez e processadas pela Groq em segundo plano, com desconto.
+
+Fluxo:
+1. `prepare_batch`: download, extração, compactação e pré-triagem, como no pipeline normal;
+   currículos que não precisam de análise (cache, diário, pré-triagem) seguem direto;
+2. `submit_batch`: envia as análises pendentes e registra o lote em `BatchStore`;
+3. `wait_for_batch`: acompanha o lote até um estado final;
+4. `collect_batch` + `finish_jobs`: as respostas voltam para a extração da nota e os cards.
+
+O envio e a consulta passam por um "backend" plugável: `GroqBatchBackend` usa a API
+real (respeitando `GROQ_BASE_URL`) e `LocalBatchBackend` a imita localmente.
+"""
+import json
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from thunderget.analysis import ANALYSIS_MODEL, build_analysis_request
+from thunderget.clients import get_groq_client
+from thunderget.journal import prompt_version
+from thunderget.pipeline import Pipeline, PipelineResult, Stage
+from thunderget.storage import connect
+from thunderget.telemetry import estimate_cost
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_BACKENDS = ("groq", "local")
+DEFAULT_COMPLETION_WINDOW = "24h"
+DEFAULT_POLL_INTERVAL = 60  # segundos
+# Desconto da Batch API sobre o preço por token das chamadas síncronas.
+BATCH_DISCOUNT = 0.5
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Etapas de `build_cv_pipeline` executadas antes e depois do lote.
+PREPARE_STAGES = ("download", "extract", "ocr", "dedupe", "compact", "prescreen")
+FINISH_STAGES = ("parse", "card")
+# Campos do job guardados com o lote para concluir o processamento em outra execução.
+STORED_JOB_FIELDS = ("pdf", "cached", "resumed", "cache_key", "text", "truncated", "prescore",
+                     "journal_state", "card_id", "tokens_before", "tokens_after", "tokens_saved")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch_runs (
+    batch_id TEXT PRIMARY KEY,
+    backend TEXT NOT NULL,
+    status TEXT NOT NULL,
+    settings TEXT NOT NULL,
+    jobs TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    collected_at REAL
+);
+"""
+
+
+class BatchItemError(Exception):
+    """Análise de um currículo que falhou dentro do lote."""
+
+
+def build_batch_file(requests):
+    """Arquivo JSONL do lote a partir de {custom_id: corpo da chamada}."""
+    lines = [json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                        ensure_ascii=False)
+             for custom_id, body in requests.items()]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def parse_batch_output(text):
+    """Lê os arquivos de saída e de erros de um lote.
+
+    Devolve {custom_id: {"content", "error", "usage"}}; `content` é None quando a
+    requisição falhou, e `error` traz o motivo.
+    """
+    results = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        entry = json.loads(line)
+        response = entry.get("response") or {}
+        body = response.get("body") or {}
+        content, error = None, entry.get("error")
+        if not error and response.get("status_code") == 200:
+            try:
+                content = body["choices"][0]["message"]["content"]
+            except (KeyError, IndexError, TypeError):
+                error = "resposta sem conteúdo"
+        elif not error:
+            error = body.get("error") or f"HTTP {response.get('status_code')}"
+        if isinstance(error, dict):
+            error = error.get("message") or error.get("code") or json.dumps(error)
+        results[entry.get("custom_id")] = {"content": content, "error": error, "usage": body.get("usage")}
+    return results
+
+
+class GroqBatchBackend:
+    """Batch API da Groq: upload do arquivo, criação, consulta e download dos resultados."""
+
+    name = "groq"
+
+    def __init__(self, api_key, completion_window=DEFAULT_COMPLETION_WINDOW):
+        self.client = get_groq_client(api_key)
+        self.completion_window = completion_window
+
+    def submit(self, batch_file, metadata=None):
+        uploaded = self.client.files.create(file=("thunderget-batch.jsonl", batch_file), purpose="batch")
+        batch = self.client.batches.create(
+            completion_window=self.completion_window, endpoint=BATCH_ENDPOINT,
+            input_file_id=uploaded.id, metadata=metadata)
+        return batch.id
+
+    def status(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {"status": batch.status,
+                "total": counts.total if counts else None,
+                "completed": counts.completed if counts else None,
+                "failed": counts.failed if counts else None}
+
+    def results(self, batch_id):
+        # Lotes expirados ou cancelados também podem ter saída parcial.
+        batch = self.client.batches.retrieve(batch_id)
+        text = ""
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text += self.client.files.content(file_id).text() + "\n"
+        return parse_batch_output(text)
+
+    def cancel(self, batch_id):
+        self.client.batches.cancel(batch_id)
+
+
+class LocalBatchBackend:
+    """Substituto local da Batch API, com o mesmo formato de entrada e de saída.
+
+    `complete(body)` recebe o corpo de cada requisição e devolve a resposta de chat
+    completion como dicionário. Os lotes existem apenas enquanto o processo estiver vivo.
+    """
+
+    name = "local"
+
+    def __init__(self, complete, workers=4):
+        self.complete = complete
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._batches = {}
+
+    def submit(self, batch_file, metadata=None):
+        requests = [json.loads(line) for line in batch_file.decode("utf-8").splitlines() if line.strip()]
+        batch_id = f"local_{secrets.token_hex(8)}"
+        batch = {"status": "in_progress", "total": len(requests), "completed": 0, "failed": 0,
+                 "output": [], "cancelled": threading.Event()}
+        with self._lock:
+            self._batches[batch_id] = batch
+        threading.Thread(target=self._run, args=(batch, requests),
+                         name=f"batch-{batch_id}", daemon=True).start()
+        return batch_id
+
+    def _execute(self, batch, request):
+        if batch["cancelled"].is_set():
+            entry = {"custom_id": request["custom_id"], "response": None,
+                     "error": {"code": "batch_cancelled", "message": "Lote cancelado."}}
+        else:
+            try:
+                entry = {"custom_id": request["custom_id"], "error": None,
+                         "response": {"status_code": 200, "body": self.complete(request["body"])}}
+            except Exception as e:
+                entry = {"custom_id": request["custom_id"], "response": None,
+                         "error": {"code": "request_failed", "message": str(e)}}
+        with self._lock:
+            batch["output"].append(json.dumps(entry, ensure_ascii=False))
+            batch["failed" if entry["error"] else "completed"] += 1
+
+    def _run(self, batch, requests):
+        with ThreadPoolExecutor(self.workers) as executor:
+            list(executor.map(lambda request: self._execute(batch, request), requests))
+        with self._lock:
+            batch["status"] = "cancelled" if batch["cancelled"].is_set() else "completed"
+
+    def _get(self, batch_id):
+        with self._lock:
+            batch = self._batches.get(batch_id)
+        if batch is None:
+            raise KeyError(f"Lote local desconhecido: {batch_id} (lotes locais não sobrevivem ao processo).")
+        return batch
+
+    def status(self, batch_id):
+        batch = self._get(batch_id)
+        with self._lock:
+            return {key: batch[key] for key in ("status", "total", "completed", "failed")}
+
+    def results(self, batch_id):
+        batch = self._get(batch_id)
+        with self._lock:
+            return parse_batch_output("\n".join(batch["output"]))
+
+    def cancel(self, batch_id):
+        self._get(batch_id)["cancelled"].set()
+
+
+class BatchStore:
+    """Lotes enviados e o que é preciso para concluí-los (configuração e jobs preparados)."""
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def add(self, batch_id, backend, settings, jobs):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO batch_runs (batch_id, backend, status, settings, jobs, created_at) "
+                "VALUES (?, ?, 'submitted', ?, ?, ?)",
+                (batch_id, backend, json.dumps(settings, ensure_ascii=False),
+                 json.dumps(jobs, ensure_ascii=False), time.time()))
+
+    def get(self, batch_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batch_runs WHERE batch_id = ?", (batch_id,)).fetchone()
+        if not row:
+            return None
+        return dict(row, settings=json.loads(row["settings"]), jobs=json.loads(row["jobs"]))
+
+    def set_status(self, batch_id, status, collected=False):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE batch_runs SET status = ?, collected_at = COALESCE(?, collected_at) WHERE batch_id = ?",
+                (status, time.time() if collected else None, batch_id))
+
+    def recent(self, limit=20):
+        """Lotes mais recentes, sem os jobs."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT batch_id, backend, status, settings, created_at, collected_at, "
+                "(SELECT COUNT(*) FROM json_each(jobs)) AS n FROM batch_runs ORDER BY created_at DESC LIMIT ?",
+                (limit,)).fetchall()
+        return [dict(row, settings=json.loads(row["settings"])) for row in rows]
+
+    def pending_file_ids(self, version):
+        """Arquivos em lotes ainda não coletados para a versão do prompt (não devem ser reenviados)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT j.key AS file_id FROM batch_runs, json_each(batch_runs.jobs) AS j "
+                "WHERE collected_at IS NULL AND json_extract(settings, '$.prompt_version') = ?",
+                (version,)).fetchall()
+        return {row["file_id"] for row in rows}
+
+
+def _sub_pipeline(pipeline, names, first=None):
+    """Pipeline com as etapas `names` de `pipeline` (mesmas funções e workers)."""
+    stages = [stage for stage in pipeline.stages if stage.name in names]
+    if first is not None:
+        stages.insert(0, first)
+    return Pipeline(stages, on_thread_start=pipeline.on_thread_start, tracer=pipeline.tracer)
+
+
+def prepare_batch(pipeline, items, on_result, skip_ids=()):
+    """Executa as etapas anteriores à análise sobre `items`.
+
+    `pipeline` é o de `build_cv_pipeline`. Devolve (para o lote, prontos), ambos
+    {file_id: job}: os prontos já têm análise (cache, diário ou pré-triagem) e seguem
+    direto para `finish_jobs`. Itens que saem do pipeline antes disso (erros, PDFs
+    ignorados) são entregues a `on_result`.
+    """
+    to_batch, ready = {}, {}
+    prepare = _sub_pipeline(pipeline, PREPARE_STAGES)
+    for result in prepare.run(item for item in items if item['id'] not in skip_ids):
+        if not result.completed:
+            on_result(result)
+            continue
+        job = result.value
+        needs_analysis = not job["cached"] and not job.get("prescreened_out")
+        (to_batch if needs_analysis else ready)[result.item['id']] = job
+    return to_batch, ready
+
+
+def finish_jobs(pipeline, jobs, on_result):
+    """Extração da nota e cards para jobs que já têm análise; cada resultado vai para `on_result`."""
+    if not jobs:
+        return
+    finish = _sub_pipeline(pipeline, FINISH_STAGES, first=Stage("restore", lambda pdf: jobs[pdf['id']]))
+    for result in finish.run(job["pdf"] for job in jobs.values()):
+        on_result(result)
+
+
+def submit_batch(backend, store, jobs, system_prompt, settings):
+    """Envia as análises de `jobs` em um lote e o registra em `store`; devolve o id do lote.
+
+    `settings` guarda o necessário para concluir o lote depois (listas, nota de aprovação,
+    pasta...); a versão do prompt é acrescentada aqui.
+    """
+    requests = {file_id: build_analysis_request(system_prompt, job["text"]) for file_id, job in jobs.items()}
+    batch_id = backend.submit(build_batch_file(requests), metadata={"source": "thunderget"})
+    stored = {file_id: {key: job[key] for key in STORED_JOB_FIELDS if key in job}
+              for file_id, job in jobs.items()}
+    store.add(batch_id, backend.name, {**settings, "system_prompt": system_prompt,
+                                       "prompt_version": prompt_version(system_prompt)}, stored)
+    return batch_id
+
+
+def wait_for_batch(backend, batch_id, poll_interval=DEFAULT_POLL_INTERVAL, on_status=None):
+    """Consulta o lote até um estado final e devolve o último status.
+
+    Falhas momentâneas na consulta são registradas e a espera continua.
+    """
+    while True:
+        try:
+            status = backend.status(batch_id)
+        except KeyError:
+            # Lote que o backend não conhece: esperar não resolve.
+            raise
+        except Exception as e:
+            logger.warning(f"Falha ao consultar o lote {batch_id}; nova tentativa em {poll_interval}s: {e}")
+        else:
+            if on_status:
+                on_status(status)
+            if status["status"] in FINAL_STATUSES:
+                return status
+        time.sleep(poll_interval)
+
+
+def collect_batch(backend, store, batch_id, journal=None):
+    """Lê os resultados de um lote.
+
+    Devolve (jobs com análise, falhas, uso): os jobs seguem para `finish_jobs`; as
+    falhas são PipelineResults da etapa de análise; o uso soma os tokens do lote.
+    As análises são gravadas no diário, como na análise síncrona.
+    """
+    entry = store.get(batch_id)
+    if entry is None:
+        raise KeyError(f"Lote desconhecido: {batch_id}")
+    version = entry["settings"]["prompt_version"]
+    results = backend.results(batch_id)
+    jobs, failures = {}, []
+    usage = {"prompt_tokens": 0, "completion_tokens": 0}
+    for file_id, job in entry["jobs"].items():
+        result = results.get(file_id)
+        if result is None or not result["content"]:
+            reason = result["error"] if result else "sem resposta no lote"
+            failures.append(PipelineResult(job["pdf"], stage="analyze", error=BatchItemError(reason)))
+            continue
+        for key in usage:
+            usage[key] += (result["usage"] or {}).get(key) or 0
+        job["analysis"] = result["content"]
+        if journal is not None:
+            journal.mark(file_id, version, "analyzed", analysis=job["analysis"])
+        jobs[file_id] = job
+    usage["cost_usd"] = estimate_cost(ANALYSIS_MODEL, usage["prompt_tokens"], usage["completion_tokens"]) \
+        * BATCH_DISCOUNT
+    return jobs, failures, usage
@@ -0,0 +1,118 @@
+"""Cache persistente de análises de currículos, endereçado pelo conteúdo.
+
+A chave combina o hash do arquivo, o hash do prompt de sistema e o nome do
+modelo: o mesmo PDF avaliado com o mesmo prompt e o mesmo modelo não precisa
+passar pela Groq de novo.
+"""
+import hashlib
+import threading
+import time
+
+from thunderget.storage import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT,
+    analysis TEXT NOT NULL,
+    candidate_name TEXT,
+    final_score INTEGER,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS analysis_cache_accessed ON analysis_cache (accessed_at);
+"""
+
+
+def content_hash(data):
+    """MD5 do conteúdo do arquivo, o mesmo valor que o Drive expõe em `md5Checksum`."""
+    return hashlib.md5(data).hexdigest()
+
+
+def prompt_hash(system_prompt):
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(file_md5, system_prompt, model):
+    return f"{file_md5}:{prompt_hash(system_prompt)[:16]}:{model}"
+
+
+class AnalysisCache:
+    """Cache em SQLite com despejo por idade e por tamanho (menos usados primeiro)."""
+
+    def __init__(self, path=None, max_entries=5000, max_bytes=200 * 1024 * 1024, max_age_days=90):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, key):
+        """Retorna o registro em cache (dict) ou None."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT text, analysis, candidate_name, final_score, created_at "
+                "FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.max_age_days and row["created_at"] < time.time() - self.max_age_days * 86400:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute(
+                "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return {
+            "text": row["text"],
+            "analysis": row["analysis"],
+            "candidate_name": row["candidate_name"],
+            "final_score": row["final_score"],
+        }
+
+    def put(self, key, text, analysis, candidate_name, final_score):
+        now = time.time()
+        size = len((text or "").encode("utf-8")) + len(analysis.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache "
+                "(key, text, analysis, candidate_name, final_score, created_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, text, analysis, candidate_name, final_score, now, now, size))
+
+    def evict(self):
+        """Remove entradas expiradas e, se necessário, as menos usadas até caber nos limites.
+
+        Retorna o número de entradas removidas.
+        """
+        removed = 0
+        with self._lock, self._conn:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries:
+                removed += self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN ("
+                    "SELECT key FROM analysis_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)).rowcount
+            if self.max_bytes:
+                # Mantém as entradas mais recentes cuja soma acumulada cabe no limite.
+                rows = self._conn.execute(
+                    "SELECT key, size FROM analysis_cache ORDER BY accessed_at DESC").fetchall()
+                total, stale = 0, []
+                for row in rows:
+                    total += row["size"]
+                    if total > self.max_bytes:
+                        stale.append((row["key"],))
+                self._conn.executemany("DELETE FROM analysis_cache WHERE key = ?", stale)
+                removed += len(stale)
+        return removed
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM analysis_cache")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
@@ -0,0 +1,155 @@
+"""Base local dos candidatos analisados, com busca textual (SQLite FTS5).
+
+Cada resultado com nota (nome, nota, versão do prompt, arquivo do Drive, análise e
+texto extraído do currículo) é gravado aqui pelo pipeline. Buscas como "nota acima
+de 70 e menciona RAG" e a reclassificação com outra nota de aprovação são feitas
+localmente, sem chamadas à IA nem ao Trello.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from thunderget.storage import connect, data_dir
+
+# O índice textual usa a tabela `candidates` como conteúdo ("external content"): os gatilhos
+# o mantêm em dia a cada inserção, atualização ou remoção. `remove_diacritics` faz
+# "experiencia" encontrar "experiência".
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    file_id TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    file_name TEXT,
+    candidate_name TEXT,
+    final_score INTEGER,
+    analysis TEXT,
+    cv_text TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (file_id, prompt_version)
+);
+CREATE INDEX IF NOT EXISTS candidates_score ON candidates (prompt_version, final_score);
+CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+    candidate_name, analysis, cv_text,
+    content='candidates', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS candidates_ai AFTER INSERT ON candidates BEGIN
+    INSERT INTO candidates_fts (rowid, candidate_name, analysis, cv_text)
+    VALUES (new.id, new.candidate_name, new.analysis, new.cv_text);
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_ad AFTER DELETE ON candidates BEGIN
+    INSERT INTO candidates_fts (candidates_fts, rowid, candidate_name, analysis, cv_text)
+    VALUES ('delete', old.id, old.candidate_name, old.analysis, old.cv_text);
+END;
+CREATE TRIGGER IF NOT EXISTS candidates_au AFTER UPDATE ON candidates BEGIN
+    INSERT INTO candidates_fts (candidates_fts, rowid, candidate_name, analysis, cv_text)
+    VALUES ('delete', old.id, old.candidate_name, old.analysis, old.cv_text);
+    INSERT INTO candidates_fts (rowid, candidate_name, analysis, cv_text)
+    VALUES (new.id, new.candidate_name, new.analysis, new.cv_text);
+END;
+"""
+
+SEARCH_ORDERS = ("relevance", "score")
+# Pesos do BM25 por coluna (nome, análise, texto do currículo): um termo no nome ou na
+# análise da IA diz mais sobre o candidato do que uma menção solta no currículo.
+_BM25_WEIGHTS = (10.0, 2.0, 1.0)
+
+_TERM_RE = re.compile(r'"[^"]*"|\S+')
+_OPERATORS = ("AND", "OR", "NOT")
+
+
+def fts_query(text):
+    """Converte a busca digitada em uma consulta FTS5 segura.
+
+    Cada palavra vira um termo entre aspas (termos como "C++" ou "node.js" não são lidos
+    como sintaxe do FTS5); todos os termos precisam aparecer, a menos que sejam ligados por
+    OR. Trechos "entre aspas" buscam a frase exata e `pyth*` busca por prefixo.
+    """
+    terms = []
+    for term in _TERM_RE.findall(text or ""):
+        if term in _OPERATORS:
+            # Operadores só valem entre dois termos.
+            if terms and terms[-1] not in _OPERATORS:
+                terms.append(term)
+            continue
+        prefix = term.endswith("*") and not term.startswith('"')
+        term = term.strip('"').rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"' + ("*" if prefix else ""))
+    while terms and terms[-1] in _OPERATORS:
+        terms.pop()
+    return " ".join(terms)
+
+
+class CandidateStore:
+    """Candidatos analisados, por arquivo do Drive e versão do prompt."""
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        # Banco próprio, como o de assinaturas: o índice textual grava o currículo inteiro e
+        # não deve disputar a trava de escrita com o diário e o cache.
+        self._conn = connect(path or os.path.join(data_dir(), "candidates.db"))
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def add(self, file_id, version, file_name, candidate_name, final_score, analysis, cv_text=None):
+        """Grava (ou substitui) o resultado de um arquivo; sem `cv_text`, mantém o texto já gravado."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO candidates (file_id, prompt_version, file_name, candidate_name, final_score, "
+                "analysis, cv_text, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (file_id, prompt_version) DO UPDATE SET "
+                "file_name = excluded.file_name, candidate_name = excluded.candidate_name, "
+                "final_score = excluded.final_score, analysis = excluded.analysis, "
+                "cv_text = COALESCE(excluded.cv_text, cv_text), updated_at = excluded.updated_at",
+                (file_id, version, file_name, candidate_name, final_score, analysis, cv_text, time.time()))
+
+    def versions(self):
+        """Versões do prompt presentes na base, da mais recente para a mais antiga."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prompt_version, COUNT(*) AS n, MAX(updated_at) AS updated_at FROM candidates "
+                "GROUP BY prompt_version ORDER BY updated_at DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def search(self, query=None, min_score=None, version=None, order="relevance", limit=50):
+        """Candidatos que correspondem à busca, com um trecho destacado de onde ela foi encontrada.
+
+        Sem `query`, lista os candidatos pela nota. `order="score"` ordena pela nota mesmo
+        com uma busca (a relevância desempata).
+        """
+        if order not in SEARCH_ORDERS:
+            raise ValueError(f"Ordenação desconhecida: {order}")
+        match = fts_query(query)
+        filters, params = [], []
+        if min_score is not None:
+            filters.append("c.final_score >= ?")
+            params.append(min_score)
+        if version:
+            filters.append("c.prompt_version = ?")
+            params.append(version)
+        columns = ("c.file_id, c.prompt_version, c.file_name, c.candidate_name, c.final_score, "
+                   "c.analysis, c.updated_at")
+        if match:
+            weights = ", ".join(str(weight) for weight in _BM25_WEIGHTS)
+            sql = (f"SELECT {columns}, snippet(candidates_fts, -1, '[', ']', '…', 16) AS snippet, "
+                   f"bm25(candidates_fts, {weights}) AS rank "
+                   f"FROM candidates_fts JOIN candidates AS c ON c.id = candidates_fts.rowid "
+                   f"WHERE candidates_fts MATCH ?{''.join(' AND ' + f for f in filters)} "
+                   f"ORDER BY {'c.final_score DESC, rank' if order == 'score' else 'rank'} LIMIT ?")
+            params = [match] + params
+        else:
+            sql = (f"SELECT {columns}, NULL AS snippet FROM candidates AS c"
+                   f"{' WHERE ' + ' AND '.join(filters) if filters else ''} "
+                   f"ORDER BY c.final_score DESC, c.updated_at DESC LIMIT ?")
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params + [limit]).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Busca inválida: {query} ({e})") from e
+        return [{key: row[key] for key in row.keys() if key != "rank"} for row in rows]
@@ -0,0 +1,709 @@
+"""Linha de comando do ThunderGet: executa a triagem sem a interface Streamlit.
+
+Exemplo:
+    python -m thunderget run --folder "Currículos" --board "Seleção" \\
+        --prompt-file especialista_2_prompt.txt --google-token token.json
+
+Para muitos currículos, `batch` aceita as mesmas opções e envia as análises pela
+Batch API da Groq (`batch-status` e `batch-collect` acompanham lotes enviados com --no-wait).
+
+Para várias vagas na mesma pasta, `multi` lê as vagas de um arquivo JSON e baixa e
+extrai cada PDF uma só vez:
+    python -m thunderget multi --folder "Currículos" --jobs-file vagas.json --matrix-file notas.csv
+
+`search` consulta os candidatos já analisados na base local, sem chamadas à IA:
+    python -m thunderget search "RAG python" --min-score 70 --threshold 75
+
+As chaves vêm das opções ou das variáveis GROQ_API_KEY, TRELLO_API_KEY,
+TRELLO_TOKEN e THUNDERGET_GOOGLE_TOKEN (caminho do token do Drive, que pode ser
+baixado na interface após a autorização).
+"""
+import argparse
+import csv
+import functools
+import json
+import logging
+import os
+import re
+import signal
+import sys
+import time
+
+logger = logging.getLogger("thunderget.cli")
+
+# Intervalo mínimo entre gravações do arquivo de métricas durante a execução.
+METRICS_INTERVAL_SECONDS = 5
+
+# Campos aceitos em cada vaga do arquivo de `multi`.
+JOB_FIELDS = ("name", "board", "approved_list", "reproved_list", "prompt_file", "threshold",
+              "job_description_file")
+
+
+class CliError(Exception):
+    """Erro de configuração reportado ao usuário sem traceback."""
+
+
+def _parse_workers(values, stages):
+    """Converte os valores `etapa=N` de --workers; `stages` são os nomes válidos das etapas."""
+    workers = {}
+    for value in values or []:
+        stage, _, count = value.partition("=")
+        stage = stage.strip()
+        if not count.isdigit() or int(count) < 1:
+            raise CliError(f"Valor inválido para --workers: '{value}' (use etapa=N).")
+        if stage not in stages:
+            raise CliError(f"Etapa desconhecida em --workers: '{stage}' (etapas: {', '.join(stages)}).")
+        workers[stage] = int(count)
+    return workers
+
+
+def _resolve(items, wanted, what):
+    """Encontra um item (pasta, quadro ou lista) pelo id ou pelo nome."""
+    for item in items:
+        if wanted in (item['id'], item['name']):
+            return item
+    matches = [item for item in items if item['name'].casefold() == wanted.casefold()]
+    if len(matches) == 1:
+        return matches[0]
+    raise CliError(f"{what} '{wanted}' não encontrado(a).")
+
+
+def _read_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _check_keys(args, options):
+    for option in options:
+        if not getattr(args, option.lstrip("-").replace("-", "_")):
+            raise CliError(f"Informe {option} (ou a variável de ambiente correspondente).")
+
+
+def _log_stream_progress(pdf, progress):
+    if progress["done"]:
+        logger.debug(f"{pdf['name']}: {progress['candidate_name'] or 'nome não lido'}, "
+                     f"nota {progress['final_score']} lida durante o streaming"
+                     f"{' (geração encerrada após a nota)' if progress['stopped_early'] else ''}.")
+
+
+def _setup_source(args, jobs=1):
+    """Pasta, extrator, cache e demais recursos comuns às vagas; comum a `run`, `batch` e `multi`.
+
+    O diário, o índice de cópias e a base de candidatos são instâncias únicas, compartilhadas
+    pelas `jobs` vagas: as travas de cada uma só valem entre quem usa a mesma instância.
+    """
+    _check_keys(args, ("--groq-api-key", "--trello-api-key", "--trello-token", "--google-token"))
+
+    # Importações tardias: `--help` e erros de configuração respondem sem carregar Groq, Drive ou PyMuPDF.
+    from thunderget.cache import AnalysisCache
+    from thunderget.candidates import CandidateStore
+    from thunderget.dedupe import DuplicateIndex
+    from thunderget.drive import build_drive_service, list_drive_folders
+    from thunderget.journal import JobJournal
+    from thunderget.ocr import tesseract_available
+    from thunderget.pdf import DEFAULT_MAX_CHARS, PdfExtractor
+    from thunderget.screening import DEFAULT_STAGE_WORKERS
+    from thunderget.sync import SyncCheckpoints
+
+    stage_workers = {**DEFAULT_STAGE_WORKERS, **_parse_workers(args.workers, DEFAULT_STAGE_WORKERS)}
+    if args.ocr == "tesseract" and not tesseract_available():
+        raise CliError("--ocr tesseract requer o pacote pytesseract e o Tesseract instalados.")
+    google_creds = json.loads(_read_text(args.google_token))
+
+    drive_service = build_drive_service(google_creds)
+    if drive_service is None:
+        raise CliError("Não foi possível autenticar no Google Drive.")
+    folder = _resolve(list_drive_folders(drive_service), args.folder, "Pasta")
+
+    cache = None
+    if not args.no_cache:
+        cache = AnalysisCache()
+        cache.evict()
+    checkpoints = SyncCheckpoints()
+    modified_after = checkpoints.get(folder['id']) if args.incremental else None
+    # As threads de extração de todas as vagas usam o mesmo pool: com menos processos que
+    # threads, a espera na fila contaria no limite de tempo de cada documento.
+    pdf_extractor = PdfExtractor(
+        workers=stage_workers["extract"] * jobs, max_chars=args.max_chars or DEFAULT_MAX_CHARS)
+    if modified_after:
+        logger.info(f"Modo incremental: apenas PDFs modificados após {modified_after}.")
+    return argparse.Namespace(
+        google_creds=google_creds, drive_service=drive_service, folder=folder, stage_workers=stage_workers,
+        cache=cache, checkpoints=checkpoints, modified_after=modified_after, pdf_extractor=pdf_extractor,
+        journal=JobJournal(), duplicates=None if args.no_dedupe else DuplicateIndex(),
+        candidates=CandidateStore())
+
+
+def _resolve_target(args, board_name, approved_name, reproved_name):
+    """Quadro e listas de aprovados e reprovados de uma vaga."""
+    from thunderget.trello import get_trello_boards, get_trello_lists
+
+    board = _resolve(get_trello_boards(args.trello_api_key, args.trello_token), board_name, "Quadro")
+    lists = get_trello_lists(args.trello_api_key, args.trello_token, board['id'])
+    if len(lists) < 2 and not (approved_name and reproved_name):
+        raise CliError(f"O quadro '{board['name']}' precisa de ao menos duas listas.")
+    approved_list = _resolve(lists, approved_name, "Lista") if approved_name else lists[0]
+    reproved_list = _resolve(lists, reproved_name, "Lista") if reproved_name else lists[1]
+    if approved_list['id'] == reproved_list['id']:
+        raise CliError("A lista de Aprovados e Reprovados não pode ser a mesma.")
+    return board, approved_list, reproved_list
+
+
+def _build_job_pipeline(args, source, system_prompt, approved_list, reproved_list, threshold,
+                        job_description_file=None, shared=None):
+    from thunderget.compaction import DEFAULT_TOKEN_BUDGET
+    from thunderget.prescreen import DEFAULT_CUTOFF, DEFAULT_MARGIN, PreScreener, job_text_from_prompt
+    from thunderget.screening import build_cv_pipeline
+
+    prescreener = None
+    if args.prescreen:
+        job_text = (_read_text(job_description_file) if job_description_file
+                    else job_text_from_prompt(system_prompt))
+        prescreener = PreScreener(
+            job_text, mode=args.prescreen, api_key=args.groq_api_key,
+            cutoff=DEFAULT_CUTOFF if args.prescreen_cutoff is None else args.prescreen_cutoff,
+            margin=DEFAULT_MARGIN if args.prescreen_margin is None else args.prescreen_margin)
+    return build_cv_pipeline(
+        source.google_creds, args.groq_api_key, system_prompt, args.trello_api_key, args.trello_token,
+        approved_list['id'], reproved_list['id'], source.stage_workers, source.pdf_extractor,
+        cache=source.cache, force_reanalysis=args.force, journal=source.journal, prescreener=prescreener,
+        duplicates=source.duplicates, stream_analysis=args.stream or args.stop_after_score,
+        stop_after_score=args.stop_after_score, on_analysis_progress=_log_stream_progress,
+        candidates=source.candidates, ocr_engine=args.ocr,
+        shared=shared, token_budget=args.token_budget or DEFAULT_TOKEN_BUDGET, approval_threshold=threshold)
+
+
+def _setup_run(args):
+    """Resolve pasta, quadro e listas e monta o pipeline; comum a `run` e `batch`."""
+    source = _setup_source(args)
+    from thunderget.prompts import DEFAULT_SYSTEM_PROMPT
+    from thunderget.screening import APPROVAL_THRESHOLD
+    from thunderget.telemetry import Telemetry
+
+    system_prompt = _read_text(args.prompt_file) if args.prompt_file else DEFAULT_SYSTEM_PROMPT
+    board, approved_list, reproved_list = _resolve_target(
+        args, args.board, args.approved_list, args.reproved_list)
+    threshold = APPROVAL_THRESHOLD if args.threshold is None else args.threshold
+    pipeline = _build_job_pipeline(
+        args, source, system_prompt, approved_list, reproved_list, threshold, args.job_description_file)
+
+    telemetry = Telemetry(spans_path=args.spans_file)
+    telemetry.attach(pipeline)
+
+    logger.info(f"Analisando a pasta '{source.folder['name']}' → quadro '{board['name']}' "
+                f"(aprovados: '{approved_list['name']}', reprovados: '{reproved_list['name']}').")
+    return argparse.Namespace(
+        **vars(source), system_prompt=system_prompt, board=board, approved_list=approved_list,
+        reproved_list=reproved_list, threshold=threshold, pipeline=pipeline, telemetry=telemetry)
+
+
+def _log_result(report, result):
+    kind, title, detail = report.record(result)
+    if kind == "ok":
+        logger.info(f"[{report.processed}] {title}: {detail}")
+    elif kind in ("error", "card_failed"):
+        logger.error(f"[{report.processed}] {title}: {detail}")
+    else:
+        logger.warning(f"[{report.processed}] {title}: {detail}")
+
+
+def _finish_run(args, run, report, advance_sync=True):
+    """Avança o ponto de sincronização, grava as métricas e imprime o resumo."""
+    from thunderget.screening import STAGE_LABELS
+
+    new_mark = report.sync_mark(current=run.modified_after) if advance_sync else None
+    if new_mark and new_mark != run.modified_after:
+        run.checkpoints.set(run.folder['id'], new_mark)
+    run.pdf_extractor.shutdown()
+    if args.metrics_file:
+        run.telemetry.write_prometheus(args.metrics_file)
+    run.telemetry.close()
+    for line in report.summary_lines() + run.telemetry.summary_lines(STAGE_LABELS):
+        logger.info(line)
+
+
+def cmd_run(args):
+    # As importações vêm depois da verificação das chaves em `_setup_source` (ver lá).
+    run = _setup_run(args)
+    from thunderget.drive import iter_pdfs_from_folder
+    from thunderget.screening import RunReport
+
+    pipeline, telemetry = run.pipeline, run.telemetry
+    interrupted = False
+
+    def stop(*_):
+        nonlocal interrupted
+        interrupted = True
+        pipeline.cancel()
+
+    # SIGTERM (ex.: parada do serviço) encerra como Ctrl+C: os itens em andamento terminam, mas os
+    # descartados da fila e os ainda não listados não geram resultado, então o ponto de
+    # sincronização não avança.
+    signal.signal(signal.SIGTERM, stop)
+
+    report = RunReport()
+    metrics_written_at = 0.0
+    results = pipeline.run(iter_pdfs_from_folder(run.drive_service, run.folder['id'], run.modified_after))
+    while True:
+        try:
+            result = next(results)
+        except StopIteration:
+            break
+        except KeyboardInterrupt:
+            logger.warning("Interrompido; aguardando os itens em andamento...")
+            stop()
+            continue
+        _log_result(report, result)
+        if args.metrics_file and time.monotonic() - metrics_written_at >= METRICS_INTERVAL_SECONDS:
+            telemetry.write_prometheus(args.metrics_file)
+            metrics_written_at = time.monotonic()
+
+    _finish_run(args, run, report, advance_sync=not interrupted)
+    return 130 if interrupted else 0
+
+
+def _load_jobs(path):
+    """Vagas do arquivo JSON de `multi`; caminhos relativos partem da pasta do arquivo."""
+    try:
+        jobs = json.loads(_read_text(path))
+    except (OSError, ValueError) as e:
+        raise CliError(f"Não foi possível ler o arquivo de vagas '{path}': {e}")
+    if not isinstance(jobs, list) or not jobs or not all(isinstance(job, dict) for job in jobs):
+        raise CliError("O arquivo de vagas deve conter uma lista JSON de vagas (objetos).")
+    base = os.path.dirname(os.path.abspath(path))
+    names = set()
+    for index, job in enumerate(jobs, start=1):
+        unknown = set(job) - set(JOB_FIELDS)
+        if unknown:
+            raise CliError(f"Vaga {index}: campos desconhecidos: {', '.join(sorted(unknown))}.")
+        if not job.get("board"):
+            raise CliError(f"Vaga {index}: informe o quadro do Trello ('board').")
+        for key in ("name", "board", "approved_list", "reproved_list", "prompt_file", "job_description_file"):
+            if key in job and not isinstance(job[key], str):
+                raise CliError(f"Vaga {index}: '{key}' deve ser um texto.")
+        threshold = job.get("threshold")
+        if threshold is not None and (type(threshold) is not int or not 0 <= threshold <= 100):
+            raise CliError(f"Vaga {index}: 'threshold' deve ser um número inteiro de 0 a 100.")
+        for key in ("prompt_file", "job_description_file"):
+            if job.get(key):
+                job[key] = os.path.join(base, job[key])
+        if not job.get("name"):
+            job["name"] = (os.path.splitext(os.path.basename(job["prompt_file"]))[0]
+                           if job.get("prompt_file") else f"vaga {index}")
+        if job["name"] in names:
+            raise CliError(f"Há mais de uma vaga com o nome '{job['name']}'.")
+        names.add(job["name"])
+    return jobs
+
+
+def _job_metrics_path(path, name):
+    # Um arquivo por vaga, lado a lado: o textfile collector lê todos os .prom da pasta.
+    root, ext = os.path.splitext(path)
+    return f"{root}-{re.sub(r'[^0-9a-z]+', '-', name.casefold()).strip('-')}{ext}"
+
+
+def _print_matrix(report, thresholds):
+    rows = report.matrix_rows()
+    if not rows:
+        return
+    names = report.job_names
+    width = max(len(f"{row['candidate_name']} ({row['file_name']})") for row in rows)
+    print(f"{'Candidato':<{width}}  " + "  ".join(f"{name:>{max(len(name), 5)}}" for name in names))
+    for row in rows:
+        cells = []
+        for name in names:
+            score = row["scores"].get(name)
+            # ✔: aprovado segundo a nota de aprovação da vaga.
+            cell = "-" if score is None else f"{score}{' ✔' if score >= thresholds[name] else ''}"
+            cells.append(f"{cell:>{max(len(name), 5)}}")
+        print(f"{row['candidate_name'] + ' (' + row['file_name'] + ')':<{width}}  " + "  ".join(cells))
+
+
+def _write_matrix(report, path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file_id", "file_name", "candidate_name"] + report.job_names)
+        for row in report.matrix_rows():
+            writer.writerow([row["file_id"], row["file_name"], row["candidate_name"]]
+                            + [row["scores"].get(name, "") for name in report.job_names])
+
+
+def cmd_multi(args):
+    jobs = _load_jobs(args.jobs_file)
+    source = _setup_source(args, jobs=len(jobs))
+    from thunderget.drive import iter_pdfs_from_folder
+    from thunderget.journal import prompt_version
+    from thunderget.multijob import MultiJobReport, MultiJobRunner, SharedSource
+    from thunderget.prompts import DEFAULT_SYSTEM_PROMPT
+    from thunderget.screening import APPROVAL_THRESHOLD, STAGE_LABELS
+    from thunderget.telemetry import Telemetry
+
+    shared = SharedSource(len(jobs))
+    pipelines, telemetries, thresholds, versions = {}, {}, {}, {}
+    run_id = None
+    for job in jobs:
+        name = job["name"]
+        system_prompt = _read_text(job["prompt_file"]) if job.get("prompt_file") else DEFAULT_SYSTEM_PROMPT
+        version = prompt_version(system_prompt)
+        if version in versions:
+            # O diário e o cache são indexados pelo prompt: duas vagas com o mesmo prompt se confundiriam.
+            raise CliError(f"As vagas '{versions[version]}' e '{name}' usam o mesmo prompt.")
+        versions[version] = name
+        board, approved_list, reproved_list = _resolve_target(
+            args, job["board"], job.get("approved_list"), job.get("reproved_list"))
+        thresholds[name] = job.get("threshold", APPROVAL_THRESHOLD)
+        pipelines[name] = _build_job_pipeline(
+            args, source, system_prompt, approved_list, reproved_list, thresholds[name],
+            job.get("job_description_file"), shared=shared)
+        # O mesmo run_id em todas as vagas: os spans de um PDF ficam em um único trace.
+        telemetries[name] = Telemetry(spans_path=args.spans_file, run_id=run_id)
+        telemetries[name].attach(pipelines[name])
+        run_id = telemetries[name].run_id
+        logger.info(f"Vaga '{name}': quadro '{board['name']}' (aprovados: '{approved_list['name']}', "
+                    f"reprovados: '{reproved_list['name']}', nota de aprovação {thresholds[name]}).")
+    logger.info(f"Analisando a pasta '{source.folder['name']}' para {len(jobs)} vaga(s); cada PDF é baixado "
+                f"e extraído uma só vez.")
+
+    runner = MultiJobRunner(pipelines, shared)
+    interrupted = False
+
+    def stop(*_):
+        nonlocal interrupted
+        interrupted = True
+        runner.cancel()
+
+    # Como em `run`: interrompida, a execução não avança o ponto de sincronização.
+    signal.signal(signal.SIGTERM, stop)
+    report = MultiJobReport(pipelines)
+    results = runner.run(iter_pdfs_from_folder(source.drive_service, source.folder['id'], source.modified_after))
+    while True:
+        try:
+            name, result = next(results)
+        except StopIteration:
+            break
+        except KeyboardInterrupt:
+            logger.warning("Interrompido; aguardando os itens em andamento...")
+            stop()
+            continue
+        kind, title, detail = report.record(name, result)
+        prefix = f"[{name}] " if name else ""
+        if kind == "ok":
+            logger.info(f"{prefix}{title}: {detail}")
+        elif kind in ("error", "card_failed"):
+            logger.error(f"{prefix}{title}: {detail}")
+        else:
+            logger.warning(f"{prefix}{title}: {detail}")
+
+    new_mark = None if interrupted else report.sync_mark(current=source.modified_after)
+    if new_mark and new_mark != source.modified_after:
+        source.checkpoints.set(source.folder['id'], new_mark)
+    source.pdf_extractor.shutdown()
+    for name, telemetry in telemetries.items():
+        if args.metrics_file:
+            telemetry.write_prometheus(_job_metrics_path(args.metrics_file, name))
+        telemetry.close()
+    for line in report.errors:
+        logger.error(line)
+    for name in report.job_names:
+        for line in report.reports[name].summary_lines() + telemetries[name].summary_lines(STAGE_LABELS):
+            logger.info(f"[{name}] {line}")
+    if shared.reused:
+        logger.info(f"Download, extração e OCR compartilhados entre as vagas: {shared.computed} executado(s), "
+                    f"{shared.reused} reaproveitado(s) em memória.")
+    _print_matrix(report, thresholds)
+    if args.matrix_file:
+        _write_matrix(report, args.matrix_file)
+        logger.info(f"Matriz de notas gravada em {args.matrix_file}.")
+    return 130 if interrupted else 0
+
+
+def _batch_backend(kind, api_key, completion_window=None):
+    from thunderget.batch import DEFAULT_COMPLETION_WINDOW, GroqBatchBackend, LocalBatchBackend
+    from thunderget.clients import create_chat_completion
+
+    if kind == "local":
+        # Executa as mesmas requisições pela API síncrona, no formato da Batch API.
+        return LocalBatchBackend(lambda body: create_chat_completion(api_key, **body).model_dump())
+    return GroqBatchBackend(api_key, completion_window or DEFAULT_COMPLETION_WINDOW)
+
+
+def _wait_and_collect(args, backend, store, batch_id, pipeline, report):
+    """Espera o lote terminar e conclui os currículos (nota e cards); devolve o código de saída."""
+    from thunderget.batch import collect_batch, finish_jobs, wait_for_batch
+    from thunderget.journal import JobJournal
+
+    def on_status(status):
+        logger.info(f"Lote {batch_id}: {status['status']} "
+                    f"({status['completed'] or 0}/{status['total'] or '?'} concluído(s), "
+                    f"{status['failed'] or 0} com falha).")
+
+    try:
+        status = wait_for_batch(backend, batch_id, args.poll_interval, on_status)
+    except KeyboardInterrupt:
+        logger.warning(f"Espera interrompida; o lote continua na Groq. Conclua depois com: "
+                       f"thunderget batch-collect {batch_id}")
+        return 130
+    jobs, failures, usage = collect_batch(backend, store, batch_id, journal=JobJournal())
+    for result in failures:
+        _log_result(report, result)
+    finish_jobs(pipeline, jobs, functools.partial(_log_result, report))
+    store.set_status(batch_id, status["status"], collected=True)
+    logger.info(f"Lote {batch_id}: {usage['prompt_tokens']:,} tokens de entrada e "
+                f"{usage['completion_tokens']:,} de saída (~US$ {usage['cost_usd']:.4f} com o desconto do lote).")
+    return 0
+
+
+def cmd_batch(args):
+    if args.backend == "local" and args.no_wait:
+        raise CliError("Lotes locais não sobrevivem ao processo: --no-wait exige --backend groq.")
+    run = _setup_run(args)
+    from thunderget.batch import BatchStore, finish_jobs, prepare_batch, submit_batch
+    from thunderget.drive import iter_pdfs_from_folder
+    from thunderget.journal import prompt_version
+    from thunderget.screening import RunReport
+
+    backend = _batch_backend(args.backend, args.groq_api_key, args.completion_window)
+    store = BatchStore()
+    report = RunReport()
+    log = functools.partial(_log_result, report)
+
+    pending = store.pending_file_ids(prompt_version(run.system_prompt))
+    if pending:
+        logger.info(f"{len(pending)} PDF(s) já estão em lotes não coletados e serão ignorados.")
+    try:
+        to_batch, ready = prepare_batch(
+            run.pipeline, iter_pdfs_from_folder(run.drive_service, run.folder['id'], run.modified_after),
+            log, skip_ids=pending)
+    except KeyboardInterrupt:
+        logger.warning("Interrompido antes do envio do lote.")
+        run.pdf_extractor.shutdown()
+        run.telemetry.close()
+        return 130
+    # Cache, diário e pré-triagem: esses currículos não precisam esperar o lote.
+    finish_jobs(run.pipeline, ready, log)
+
+    code = 0
+    if to_batch:
+        batch_id = submit_batch(backend, store, to_batch, run.system_prompt, {
+            "folder_id": run.folder['id'], "folder_name": run.folder['name'],
+            "approved_list_id": run.approved_list['id'], "reproved_list_id": run.reproved_list['id'],
+            "threshold": run.threshold, "cache": not args.no_cache})
+        logger.info(f"Lote {batch_id} enviado com {len(to_batch)} análise(s).")
+        if args.no_wait:
+            logger.info(f"Conclua depois com: thunderget batch-collect {batch_id}")
+        else:
+            code = _wait_and_collect(args, backend, store, batch_id, run.pipeline, report)
+    else:
+        logger.info("Nenhuma análise pendente; nenhum lote enviado.")
+    if code == 0:
+        # Sem os resultados do lote, o ponto de sincronização não pode avançar.
+        _finish_run(args, run, report, advance_sync=not (to_batch and args.no_wait))
+    return code
+
+
+def cmd_batch_collect(args):
+    _check_keys(args, ("--groq-api-key", "--trello-api-key", "--trello-token"))
+    from thunderget.batch import BatchStore
+    from thunderget.cache import AnalysisCache
+    from thunderget.candidates import CandidateStore
+    from thunderget.journal import JobJournal
+    from thunderget.screening import DEFAULT_STAGE_WORKERS, RunReport, build_cv_pipeline
+
+    store = BatchStore()
+    entry = store.get(args.batch_id)
+    if entry is None:
+        raise CliError(f"Lote '{args.batch_id}' não encontrado.")
+    if entry["collected_at"]:
+        raise CliError(f"O lote '{args.batch_id}' já foi coletado.")
+    if entry["backend"] != "groq":
+        raise CliError("Lotes locais não sobrevivem ao processo que os enviou.")
+    settings = entry["settings"]
+    # Só as etapas de nota e card são usadas: Drive e extração de PDF não são necessários.
+    pipeline = build_cv_pipeline(
+        None, args.groq_api_key, settings["system_prompt"], args.trello_api_key, args.trello_token,
+        settings["approved_list_id"], settings["reproved_list_id"], DEFAULT_STAGE_WORKERS, None,
+        cache=AnalysisCache() if settings["cache"] else None, journal=JobJournal(),
+        candidates=CandidateStore(), approval_threshold=settings["threshold"])
+    report = RunReport()
+    code = _wait_and_collect(args, _batch_backend("groq", args.groq_api_key), store, args.batch_id,
+                             pipeline, report)
+    if code == 0:
+        for line in report.summary_lines():
+            logger.info(line)
+    return code
+
+
+def cmd_batch_status(args):
+    from thunderget.batch import BatchStore
+
+    backend = _batch_backend("groq", args.groq_api_key) if args.groq_api_key else None
+    for entry in BatchStore().recent():
+        created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created_at"]))
+        state = "coletado" if entry["collected_at"] else entry["status"]
+        if backend and not entry["collected_at"] and entry["backend"] == "groq":
+            try:
+                state = backend.status(entry["batch_id"])["status"]
+            except Exception as e:
+                logger.debug(f"Falha ao consultar o lote {entry['batch_id']}: {e}")
+        print(f"{entry['batch_id']}  {created}  {entry['backend']:<5}  {entry['n']:>5} PDF(s)  "
+              f"{state:<10}  {entry['settings'].get('folder_name', '')}")
+    return 0
+
+
+def cmd_search(args):
+    from thunderget.candidates import CandidateStore
+    from thunderget.journal import prompt_version
+    from thunderget.screening import APPROVAL_THRESHOLD
+
+    store = CandidateStore()
+    if args.versions:
+        for entry in store.versions():
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["updated_at"]))
+            print(f"{entry['prompt_version']}  {updated}  {entry['n']:>5} candidato(s)")
+        return 0
+    version = args.prompt_version or (prompt_version(_read_text(args.prompt_file)) if args.prompt_file else None)
+    threshold = APPROVAL_THRESHOLD if args.threshold is None else args.threshold
+    try:
+        found = store.search(" ".join(args.query), min_score=args.min_score, version=version,
+                             order=args.order, limit=args.limit)
+    except ValueError as e:
+        raise CliError(str(e))
+    for entry in found:
+        # Reclassificação local: aprovado ou reprovado segundo a nota de aprovação informada.
+        mark = "✔" if entry["final_score"] is not None and entry["final_score"] >= threshold else "✘"
+        print(f"{mark} {entry['final_score'] if entry['final_score'] is not None else '-':>3}  "
+              f"{entry['candidate_name']}  ({entry['file_name']}, prompt {entry['prompt_version']})")
+        if args.full:
+            print(entry["analysis"], end="\n\n")
+        elif entry["snippet"]:
+            print(f"      {' '.join(entry['snippet'].split())}")
+    approved = sum(1 for entry in found if entry["final_score"] is not None and entry["final_score"] >= threshold)
+    logger.info(f"{len(found)} candidato(s) encontrado(s), {approved} com nota ≥ {threshold}.")
+    return 0
+
+
+def _add_run_options(parser, targets=True):
+    """Opções comuns a `run`, `batch` e `multi` (sem `targets`: vaga, quadro e listas vêm do arquivo de vagas)."""
+    parser.add_argument("--folder", required=True, help="Nome ou id da pasta do Drive.")
+    if targets:
+        parser.add_argument("--board", required=True, help="Nome ou id do quadro do Trello.")
+        parser.add_argument("--approved-list", help="Lista para aprovados (padrão: primeira lista do quadro).")
+        parser.add_argument("--reproved-list", help="Lista para reprovados (padrão: segunda lista do quadro).")
+        parser.add_argument("--prompt-file", help="Arquivo com o prompt de avaliação (padrão: prompt generalista).")
+        parser.add_argument("--threshold", type=int, help="Nota mínima para aprovação (padrão: 80).")
+    parser.add_argument("--google-token", default=os.environ.get("THUNDERGET_GOOGLE_TOKEN"),
+                        help="Token de usuário autorizado do Drive (JSON).")
+    parser.add_argument("--groq-api-key", default=os.environ.get("GROQ_API_KEY"))
+    parser.add_argument("--trello-api-key", default=os.environ.get("TRELLO_API_KEY"))
+    parser.add_argument("--trello-token", default=os.environ.get("TRELLO_TOKEN"))
+    parser.add_argument("--workers", action="append", metavar="ETAPA=N",
+                        help="Workers de uma etapa (download, extract, ocr, dedupe, compact, prescreen, analyze, parse, card). "
+                             "Repetível.")
+    parser.add_argument("--max-chars", type=int, help="Caracteres lidos por currículo.")
+    parser.add_argument("--token-budget", type=int, help="Tokens do currículo enviados à IA.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Apenas PDFs novos ou alterados desde a última execução nesta pasta.")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignora o cache e reanalisa todos os currículos (cards existentes são atualizados).")
+    parser.add_argument("--no-cache", action="store_true", help="Não lê nem grava o cache de análises.")
+    parser.add_argument("--no-dedupe", action="store_true",
+                        help="Não procura cópias de currículos já analisados (cada arquivo recebe análise e card).")
+    parser.add_argument("--ocr", choices=("groq", "tesseract"),
+                        help="Lê os PDFs digitalizados (sem texto) por OCR: modelo multimodal da Groq ou Tesseract "
+                             "local (requer pytesseract). Sem a opção, esses PDFs são ignorados.")
+    parser.add_argument("--prescreen", choices=("lexical", "llm"),
+                        help="Pré-triagem antes da análise completa: palavras-chave da vaga ou modelo pequeno da Groq.")
+    parser.add_argument("--prescreen-cutoff", type=int, help="Nota aproximada mínima para a análise completa (padrão: 40).")
+    parser.add_argument("--prescreen-margin", type=int,
+                        help="Analisa também quem fica a até N pontos abaixo da nota de aprovação, ou acima dela (padrão: 20).")
+    if targets:
+        parser.add_argument("--job-description-file",
+                            help="Descrição da vaga usada na pré-triagem (padrão: contexto e critérios do prompt).")
+    parser.add_argument("--stream", action="store_true",
+                        help="Recebe as análises em streaming (tempo até a nota aparece na telemetria).")
+    parser.add_argument("--stop-after-score", action="store_true",
+                        help="Encerra cada análise logo após a linha \"Nota final\" (implica --stream).")
+    parser.add_argument("--metrics-file",
+                        help="Arquivo de métricas no formato do Prometheus (ex.: para o textfile collector).")
+    parser.add_argument("--spans-file", help="Arquivo JSON lines onde os spans de cada etapa são acrescentados (OTLP).")
+
+
+def _add_batch_options(parser):
+    parser.add_argument("--poll-interval", type=float, default=60,
+                        help="Segundos entre as consultas ao estado do lote (padrão: 60).")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="thunderget", description="Triagem de currículos do Google Drive com IA e criação de cards no Trello.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Exibe mensagens de depuração.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Analisa os PDFs de uma pasta e cria os cards.")
+    _add_run_options(run)
+    run.set_defaults(func=cmd_run)
+
+    batch = subparsers.add_parser(
+        "batch", help="Como `run`, mas envia as análises em lote pela Batch API da Groq (mais barato, sem "
+                      "limite por minuto; conclui em até 24 h).")
+    _add_run_options(batch)
+    _add_batch_options(batch)
+    batch.add_argument("--backend", choices=("groq", "local"), default="groq",
+                       help="`local` executa o lote neste processo pela API síncrona (para testes).")
+    batch.add_argument("--completion-window", help="Prazo de processamento do lote (padrão: 24h).")
+    batch.add_argument("--no-wait", action="store_true",
+                       help="Envia o lote e sai; conclua depois com `batch-collect`.")
+    batch.set_defaults(func=cmd_batch)
+
+    multi = subparsers.add_parser(
+        "multi", help="Analisa os PDFs de uma pasta para várias vagas de uma vez (cada PDF é baixado e "
+                      "extraído uma só vez) e mostra a matriz de notas candidato × vaga.")
+    multi.add_argument("--jobs-file", required=True,
+                       help="Arquivo JSON com a lista de vagas: board (obrigatório), name, prompt_file, "
+                            "approved_list, reproved_list, threshold e job_description_file.")
+    multi.add_argument("--matrix-file", help="Grava a matriz de notas em CSV.")
+    _add_run_options(multi, targets=False)
+    multi.set_defaults(func=cmd_multi)
+
+    collect = subparsers.add_parser(
+        "batch-collect", help="Espera um lote enviado com --no-wait e cria os cards dos currículos.")
+    collect.add_argument("batch_id")
+    collect.add_argument("--groq-api-key", default=os.environ.get("GROQ_API_KEY"))
+    collect.add_argument("--trello-api-key", default=os.environ.get("TRELLO_API_KEY"))
+    collect.add_argument("--trello-token", default=os.environ.get("TRELLO_TOKEN"))
+    _add_batch_options(collect)
+    collect.set_defaults(func=cmd_batch_collect)
+
+    status = subparsers.add_parser("batch-status", help="Lista os lotes enviados e o estado de cada um.")
+    status.add_argument("--groq-api-key", default=os.environ.get("GROQ_API_KEY"))
+    status.set_defaults(func=cmd_batch_status)
+
+    search = subparsers.add_parser(
+        "search", help="Busca nos candidatos já analisados (nome, análise e texto do currículo), sem chamadas à IA.")
+    search.add_argument("query", nargs="*",
+                        help="Termos buscados (todos precisam aparecer; use OR, \"frases\" e prefixo*). "
+                             "Sem termos, lista pela nota.")
+    search.add_argument("--min-score", type=int, help="Apenas candidatos com nota a partir deste valor.")
+    search.add_argument("--threshold", type=int,
+                        help="Nota de aprovação usada para marcar aprovados (✔) e reprovados (✘) (padrão: 80).")
+    search.add_argument("--prompt-file", help="Apenas análises feitas com este prompt.")
+    search.add_argument("--prompt-version", help="Apenas análises desta versão do prompt (ver --versions).")
+    search.add_argument("--order", choices=("relevance", "score"), default="relevance",
+                        help="Ordena pela relevância da busca (padrão) ou pela nota.")
+    search.add_argument("--limit", type=int, default=20, help="Número máximo de resultados (padrão: 20).")
+    search.add_argument("--full", action="store_true", help="Imprime a análise completa de cada candidato.")
+    search.add_argument("--versions", action="store_true", help="Lista as versões do prompt presentes na base.")
+    search.set_defaults(func=cmd_search)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s", stream=sys.stderr)
+    try:
+        return args.func(args)
+    except CliError as e:
+        logger.error(str(e))
+        return 2
@@ -0,0 +1,240 @@
+"""Clientes HTTP compartilhados e agendamento consciente dos limites de taxa.
+
+Um único cliente Groq por chave (e uma única `requests.Session` para o Trello)
+reaproveita conexões keep-alive em vez de pagar um novo handshake TLS a cada
+chamada. As chamadas à Groq passam por um limitador de taxa alimentado pelos
+cabeçalhos `x-ratelimit-*` das respostas, respeitam `Retry-After` em erros
+429/5xx e são repetidas com backoff exponencial com jitter.
+"""
+import random
+import re
+import threading
+import time
+
+import groq
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from thunderget import telemetry
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 1.0  # segundos
+BACKOFF_CAP = 60.0
+# Estimativa de tokens de saída reservados por chamada quando `max_tokens` não é informado.
+DEFAULT_COMPLETION_TOKENS = 1024
+
+_clients_lock = threading.Lock()
+_groq_clients = {}
+_rate_limiters = {}
+_http_session = None
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+
+
+def parse_duration(value):
+    """Converte durações da Groq ("2m59.56s", "7.66s", "120ms") em segundos."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def estimate_tokens(text):
+    """Estimativa local e barata: ~4 caracteres por token."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _estimate_request_tokens(kwargs):
+    prompt_tokens = 0
+    for message in kwargs.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            prompt_tokens += estimate_tokens(content)
+        elif isinstance(content, list):
+            prompt_tokens += sum(estimate_tokens(part.get("text", ""))
+                                 for part in content if isinstance(part, dict))
+    return prompt_tokens + (kwargs.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+
+class _Bucket:
+    """Balde de fichas cuja capacidade e ritmo de recarga vêm dos cabeçalhos da API."""
+
+    def __init__(self):
+        self.capacity = None  # Desconhecido até a primeira resposta.
+        self.available = 0.0
+        self.refill_rate = 0.0  # fichas por segundo
+        self.updated_at = time.monotonic()
+
+    def refill(self, now):
+        if self.capacity is None:
+            return
+        self.available = min(self.capacity, self.available +
+                             (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        if self.capacity is None or self.available >= min(amount, self.capacity):
+            return 0.0
+        if self.refill_rate <= 0:
+            return 1.0
+        return (min(amount, self.capacity) - self.available) / self.refill_rate
+
+    def observe(self, limit, remaining, reset_seconds, now):
+        if limit is None or remaining is None:
+            return
+        self.capacity = float(limit)
+        self.available = float(remaining)
+        self.updated_at = now
+        if reset_seconds:
+            # Ritmo necessário para voltar ao limite cheio no instante de reset informado.
+            self.refill_rate = max(self.capacity - self.available, 1.0) / reset_seconds
+        elif self.refill_rate <= 0:
+            self.refill_rate = self.capacity / 60.0
+
+
+class RateLimiter:
+    """Agendador de requisições e tokens por minuto para uma chave da Groq."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = _Bucket()
+        self._tokens = _Bucket()
+        self._paused_until = 0.0
+
+    def acquire(self, tokens):
+        """Bloqueia até haver orçamento para uma requisição de ~`tokens` tokens."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._requests.refill(now)
+                self._tokens.refill(now)
+                wait = max(self._paused_until - now,
+                           self._requests.wait_time(1),
+                           self._tokens.wait_time(tokens))
+                if wait <= 0:
+                    if self._requests.capacity is not None:
+                        self._requests.available -= 1
+                    if self._tokens.capacity is not None:
+                        self._tokens.available -= min(tokens, self._tokens.capacity)
+                    return
+            time.sleep(min(wait, 5.0))
+
+    def observe(self, headers):
+        """Atualiza os baldes com os cabeçalhos `x-ratelimit-*` de uma resposta."""
+        def number(name):
+            try:
+                return float(headers.get(name))
+            except (TypeError, ValueError):
+                return None
+
+        with self._lock:
+            now = time.monotonic()
+            self._requests.observe(
+                number("x-ratelimit-limit-requests"), number("x-ratelimit-remaining-requests"),
+                parse_duration(headers.get("x-ratelimit-reset-requests")), now)
+            self._tokens.observe(
+                number("x-ratelimit-limit-tokens"), number("x-ratelimit-remaining-tokens"),
+                parse_duration(headers.get("x-ratelimit-reset-tokens")), now)
+
+    def pause(self, seconds):
+        """Suspende todas as chamadas desta chave (ex.: após um 429 com Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def get_groq_client(api_key):
+    """Cliente Groq único por chave; as repetições são feitas por `create_chat_completion`."""
+    with _clients_lock:
+        client = _groq_clients.get(api_key)
+        if client is None:
+            client = _groq_clients[api_key] = groq.Groq(api_key=api_key, max_retries=0)
+        return client
+
+
+def get_rate_limiter(api_key):
+    with _clients_lock:
+        limiter = _rate_limiters.get(api_key)
+        if limiter is None:
+            limiter = _rate_limiters[api_key] = RateLimiter()
+        return limiter
+
+
+def _retry_after(headers):
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+def _backoff(attempt):
+    # "Full jitter": espalha as novas tentativas de várias threads no tempo.
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def create_chat_completion(api_key, max_attempts=MAX_ATTEMPTS, **kwargs):
+    """Chama `chat.completions.create` com limitação de taxa e novas tentativas.
+
+    Erros 429 e 5xx e falhas de conexão são repetidos; os demais erros são propagados.
+    """
+    client = get_groq_client(api_key)
+    limiter = get_rate_limiter(api_key)
+    estimated_tokens = _estimate_request_tokens(kwargs)
+
+    for attempt in range(max_attempts):
+        is_last_attempt = attempt == max_attempts - 1
+        limiter.acquire(estimated_tokens)
+        try:
+            raw_response = client.chat.completions.with_raw_response.create(**kwargs)
+        except groq.APIStatusError as e:
+            reason = "429" if e.status_code == 429 else f"{e.status_code // 100}xx"
+            if is_last_attempt or (e.status_code != 429 and e.status_code < 500):
+                telemetry.record_error(reason)
+                raise
+            telemetry.record_retry(reason)
+            limiter.observe(e.response.headers)
+            delay = _retry_after(e.response.headers) or _backoff(attempt)
+            if e.status_code == 429:
+                limiter.pause(delay)
+            time.sleep(delay)
+            continue
+        except groq.APIConnectionError:
+            if is_last_attempt:
+                telemetry.record_error("connection")
+                raise
+            telemetry.record_retry("connection")
+            time.sleep(_backoff(attempt))
+            continue
+        limiter.observe(raw_response.headers)
+        response = raw_response.parse()
+        telemetry.record_usage(kwargs.get("model"), getattr(response, "usage", None))
+        return response
+
+
+def get_http_session():
+    """`requests.Session` compartilhada, com pool de conexões e novas tentativas em GETs."""
+    global _http_session
+    with _clients_lock:
+        if _http_session is None:
+            retry = Retry(
+                total=MAX_ATTEMPTS - 1, backoff_factor=BACKOFF_BASE, backoff_jitter=BACKOFF_BASE,
+                status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset({"GET"}),
+                respect_retry_after_header=True, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
@@ -0,0 +1,190 @@
+"""Compactação do texto do currículo antes da análise.
+
+A saída bruta do PyMuPDF traz cabeçalhos e rodapés repetidos em cada página,
+hifenização de fim de linha, espaços em excesso e, às vezes, longas listas de
+publicações. Esta etapa normaliza o texto, remove o que se repete e corta até
+um orçamento de tokens, sacrificando primeiro as seções de menor valor para a
+avaliação.
+"""
+import re
+import unicodedata
+from collections import Counter
+
+from thunderget.clients import estimate_tokens
+
+DEFAULT_TOKEN_BUDGET = 4000
+# Linhas mantidas de uma seção de baixa prioridade quando ela precisa ser resumida.
+LOW_PRIORITY_KEEP_LINES = 3
+# Linhas do topo e do fim de cada página em que cabeçalhos e rodapés são procurados.
+PAGE_EDGE_LINES = 3
+
+# Seções cujo conteúdo pesa pouco na avaliação e é resumido primeiro.
+_LOW_PRIORITY_HEADINGS = (
+    "publicacoes", "publications", "artigos", "producao bibliografica", "producao tecnica",
+    "trabalhos publicados", "trabalhos em eventos", "apresentacoes", "participacao em eventos",
+    "eventos", "congressos", "bancas", "orientacoes", "referencias", "references",
+    "hobbies", "interesses", "atividades extracurriculares", "informacoes adicionais",
+)
+# Títulos comuns das demais seções; servem apenas para delimitar onde uma seção termina.
+_SECTION_HEADINGS = _LOW_PRIORITY_HEADINGS + (
+    "resumo", "perfil", "objetivo", "sobre mim", "summary", "profile", "experiencia",
+    "experience", "historico profissional", "formacao", "education", "escolaridade",
+    "habilidades", "competencias", "skills", "conhecimentos", "projetos", "projects",
+    "certificacoes", "certificados", "certifications", "cursos", "idiomas", "languages",
+    "premios", "awards", "voluntariado",
+)
+
+_PAGE_NUMBER_RE = re.compile(
+    r"^(?:p[aá]gina|page|p\.)?\s*\d{1,3}(?:\s*(?:/|de|of)\s*\d{1,3})?$", re.IGNORECASE)
+_HYPHEN_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_SPACES_RE = re.compile(r"[ \t\u00a0\u2000-\u200b]+")
+_BULLET_RE = re.compile(r"^[•●▪■◦‣∙·\-–—*]\s*")
+
+
+def _fold(text):
+    """Minúsculas e sem acentos, para comparar títulos e linhas repetidas."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip(" :.-")
+
+
+def _edge_positions(lines):
+    """Posição (a partir do topo ou do fim) das linhas não vazias nas bordas da página."""
+    filled = [index for index, line in enumerate(lines) if line.strip()]
+    positions = {index: offset for offset, index in enumerate(filled[:PAGE_EDGE_LINES])}
+    positions.update({index: -1 - offset for offset, index in enumerate(reversed(filled[-PAGE_EDGE_LINES:]))
+                      if index not in positions})
+    return positions
+
+
+def remove_page_boilerplate(pages):
+    """Remove numeração de página e cabeçalhos e rodapés repetidos em pelo menos metade das páginas.
+
+    Só conta como cabeçalho ou rodapé a linha que se repete na mesma posição do topo ou
+    do fim da página: subtítulos repetidos no corpo ("Principais atividades:") ficam. A
+    primeira ocorrência é mantida, pois o cabeçalho costuma trazer o nome e o contato.
+    """
+    if len(pages) < 2:
+        return pages
+    split_pages = [page.splitlines() for page in pages]
+    counts = Counter()
+    for lines in split_pages:
+        counts.update({(offset, _fold(lines[index])) for index, offset in _edge_positions(lines).items()})
+    threshold = max(2, len(pages) // 2)
+    repeated = {edge for edge, count in counts.items() if count >= threshold}
+    seen = set()
+    cleaned = []
+    for lines in split_pages:
+        edges = _edge_positions(lines)
+        kept = []
+        for index, line in enumerate(lines):
+            if _PAGE_NUMBER_RE.match(line.strip()):
+                continue
+            edge = (edges.get(index), _fold(line))
+            if edge in repeated:
+                if edge[1] in seen:
+                    continue
+                seen.add(edge[1])
+            kept.append(line)
+        cleaned.append("\n".join(kept))
+    return cleaned
+
+
+def normalize_text(text):
+    """Normaliza Unicode, desfaz hifenização de quebra de linha, marcadores e espaços."""
+    text = unicodedata.normalize("NFKC", text).replace("\r", "")
+    text = _HYPHEN_BREAK_RE.sub(r"\1\2", text)
+    lines = []
+    for line in text.splitlines():
+        line = _SPACES_RE.sub(" ", line).strip()
+        line = _BULLET_RE.sub("- ", line)
+        if line or (lines and lines[-1]):
+            lines.append(line)
+    return "\n".join(lines).strip()
+
+
+def dedupe_lines(text, min_length=20):
+    """Remove repetições exatas de linhas longas (blocos duplicados pelo PDF ou pelo candidato).
+
+    Rótulos ("Principais atividades:") e títulos de seção se repetem de propósito, uma vez
+    por emprego ou projeto, e não são removidos.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        key = _fold(line)
+        if len(key) >= min_length and not line.rstrip().endswith(":") and not _heading_of(line):
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _heading_of(line):
+    folded = _fold(line)
+    if not folded or len(folded) > 60:
+        return None
+    return next((h for h in _SECTION_HEADINGS if folded.startswith(h)), None)
+
+
+def split_sections(text):
+    """Divide o texto em seções [(título, linhas)]; a primeira (título None) é o cabeçalho do currículo."""
+    sections = [[None, []]]
+    for line in text.splitlines():
+        heading = _heading_of(line)
+        if heading:
+            sections.append([heading, [line]])
+        else:
+            sections[-1][1].append(line)
+    return sections
+
+
+def _size(sections):
+    return sum(len(line) + 1 for _, lines in sections for line in lines)
+
+
+def trim_to_budget(text, token_budget):
+    """Corta o texto até `token_budget` tokens estimados, preservando o cabeçalho e as seções principais."""
+    if not token_budget or estimate_tokens(text) <= token_budget:
+        return text
+    char_budget = token_budget * 4
+    sections = split_sections(text)
+
+    # 1) Resume as seções de baixa prioridade, das maiores para as menores.
+    low_priority = sorted((s for s in sections if s[0] in _LOW_PRIORITY_HEADINGS),
+                          key=lambda s: -len(s[1]))
+    for section in low_priority:
+        if _size(sections) <= char_budget:
+            break
+        lines = section[1]
+        if len(lines) > LOW_PRIORITY_KEEP_LINES + 1:
+            omitted = len(lines) - LOW_PRIORITY_KEEP_LINES - 1
+            section[1] = lines[:LOW_PRIORITY_KEEP_LINES + 1] + \
+                [f"[... {omitted} linhas omitidas]"]
+
+    # 2) Encurta pelo final a maior das demais seções, mantendo o cabeçalho do currículo.
+    size = _size(sections)
+    while size > char_budget:
+        body = [s for s in sections[1:] if len(s[1]) > 2]
+        if not body:
+            break
+        largest = max(body, key=lambda s: len(s[1]))
+        size -= len(largest[1].pop()) + 1
+
+    # 3) Último recurso: corte direto.
+    return "\n".join(line for _, lines in sections for line in lines)[:char_budget]
+
+
+def compact_cv_text(text, pages=None, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Aplica todas as etapas e retorna (texto compactado, estatísticas de tokens)."""
+    raw = "".join(pages) if pages else text
+    if pages:
+        text = "\n".join(remove_page_boilerplate(pages))
+    compacted = trim_to_budget(dedupe_lines(normalize_text(text)), token_budget)
+    tokens_before = estimate_tokens(raw)
+    tokens_after = estimate_tokens(compacted)
+    return compacted, {
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": max(tokens_before - tokens_after, 0),
+    }
@@ -0,0 +1,159 @@
+"""Detecção de currículos quase duplicados (MinHash + LSH).
+
+O texto extraído de cada PDF vira um conjunto de "shingles" (sequências de 5
+palavras normalizadas), resumido em uma assinatura MinHash de 128 valores: a
+fração de valores iguais entre duas assinaturas estima a similaridade de Jaccard
+entre os textos. As assinaturas são divididas em 32 faixas de 4 valores, e cada
+faixa vira um balde em uma tabela indexada do SQLite: só os currículos que
+compartilham algum balde são comparados, então a busca não cresce com o índice.
+
+Com 32 faixas de 4 valores, um par com similaridade 0,8 colide em alguma faixa
+com probabilidade acima de 99,99%, e um par com similaridade 0,2 em menos de 5%;
+a decisão final usa a similaridade estimada (`DUPLICATE_THRESHOLD`).
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+
+import numpy as np
+
+from thunderget.storage import connect, data_dir
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+DUPLICATE_THRESHOLD = 0.8
+# Textos com menos shingles que isso (ex.: PDFs quase vazios) não são comparados.
+MIN_SHINGLES = 20
+
+# Funções de hash "multiply-shift" ((a·x + b) mod 2^64) >> 32, com coeficientes fixos: as
+# assinaturas gravadas continuam comparáveis entre execuções. A aritmética de 64 bits
+# do numpy transborda sem erro, o que aqui é o módulo 2^64 desejado.
+_rng = np.random.default_rng(1_020_304)
+_A = _rng.integers(1, 1 << 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 1 << 63, NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cv_fingerprints (
+    file_id TEXT PRIMARY KEY,
+    file_name TEXT,
+    md5 TEXT,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cv_lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    file_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cv_lsh_buckets_file ON cv_lsh_buckets (file_id);
+"""
+
+
+def shingles(text):
+    # NFKD separa os acentos das letras; a conversão para ASCII os descarta.
+    text = unicodedata.normalize("NFKD", (text or "").casefold()).encode("ascii", "ignore").decode("ascii")
+    words = _WORD_RE.findall(text)
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def minhash(text):
+    """Assinatura MinHash do texto (array de NUM_PERM inteiros), ou None se o texto for curto demais."""
+    items = shingles(text)
+    if len(items) < MIN_SHINGLES:
+        return None
+    hashes = np.fromiter((zlib.crc32(item.encode("utf-8")) for item in items),
+                         dtype=np.uint64, count=len(items))
+    with np.errstate(over="ignore"):
+        values = (_A[:, None] * hashes + _B[:, None]) >> np.uint64(32)
+    return values.min(axis=1).astype(np.uint32)
+
+
+def similarity(signature, other):
+    """Similaridade de Jaccard estimada entre duas assinaturas."""
+    return float(np.mean(signature == other))
+
+
+def band_buckets(signature):
+    """Um balde (inteiro de 64 bits) por faixa da assinatura."""
+    return [(band, int.from_bytes(hashlib.blake2b(
+                signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(), "big", signed=True))
+            for band in range(BANDS)]
+
+
+class DuplicateIndex:
+    """Índice persistente das assinaturas dos currículos já vistos."""
+
+    def __init__(self, path=None, threshold=DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # Banco próprio: cada currículo grava ~33 linhas aqui, e a disputa pela trava de escrita
+        # com o diário e o cache (no banco principal) atrasava as três.
+        self._conn = connect(path or os.path.join(data_dir(), "fingerprints.db"))
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cv_fingerprints").fetchone()[0]
+
+    def _find(self, signature, exclude):
+        buckets = band_buckets(signature)
+        # Com OR de igualdades, o SQLite faz uma busca pela chave primária por faixa
+        # (a forma "(band, bucket) IN (VALUES ...)" percorreria a tabela inteira).
+        rows = self._conn.execute(
+            f"SELECT f.file_id, f.file_name, f.md5, f.signature, f.created_at FROM cv_fingerprints AS f "
+            f"WHERE f.file_id IN (SELECT file_id FROM cv_lsh_buckets WHERE "
+            f"{' OR '.join('(band = ? AND bucket = ?)' for _ in buckets)}) AND f.file_id != ?",
+            [value for pair in buckets for value in pair] + [exclude]).fetchall()
+        best = None
+        for row in rows:
+            score = similarity(signature, np.frombuffer(row["signature"], dtype=np.uint32))
+            # Entre candidatos igualmente parecidos, vale o mais antigo (o original).
+            if score >= self.threshold and (best is None or (score, -row["created_at"]) > best[0]):
+                best = ((score, -row["created_at"]), row)
+        if best is None:
+            return None
+        row = best[1]
+        return {"file_id": row["file_id"], "file_name": row["file_name"], "md5": row["md5"],
+                "similarity": best[0][0]}
+
+    def find(self, text, exclude=None):
+        """Currículo indexado mais parecido com `text` (acima do limiar), ou None."""
+        signature = minhash(text)
+        if signature is None:
+            return None
+        with self._lock:
+            return self._find(signature, exclude)
+
+    def check(self, file_id, file_name, md5, text):
+        """Procura uma cópia de `text` no índice; se não houver, indexa o arquivo.
+
+        Devolve o original encontrado (dict com file_id, file_name, md5 e similarity) ou
+        None. A busca e a inclusão são atômicas: de duas cópias processadas ao mesmo
+        tempo, apenas uma vira original.
+        """
+        signature = minhash(text)
+        if signature is None:
+            return None
+        with self._lock, self._conn:
+            match = self._find(signature, file_id)
+            if match is None:
+                # Um arquivo alterado substitui a assinatura anterior.
+                self._conn.execute("DELETE FROM cv_lsh_buckets WHERE file_id = ?", (file_id,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cv_fingerprints (file_id, file_name, md5, signature, created_at) "
+                    "VALUES (?, ?, ?, ?, COALESCE((SELECT created_at FROM cv_fingerprints WHERE file_id = ?), ?))",
+                    (file_id, file_name, md5, signature.tobytes(), file_id, time.time()))
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO cv_lsh_buckets (band, bucket, file_id) VALUES (?, ?, ?)",
+                    [(band, bucket, file_id) for band, bucket in band_buckets(signature)])
+            return match
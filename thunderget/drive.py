@@ -0,0 +1,116 @@
+"""Acesso ao Google Drive: serviço autenticado, listagem paginada e download de PDFs."""
+import hashlib
+import io
+import logging
+import os
+import threading
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from googleapiclient.http import MediaIoBaseDownload
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
+# Endereço alternativo da API (ex.: o servidor falso do benchmark em `bench/`).
+DRIVE_API_URL = os.environ.get("THUNDERGET_DRIVE_API_URL")
+# Maior página aceita por `files().list`: menos idas e voltas em pastas grandes.
+LIST_PAGE_SIZE = 1000
+# O download é feito em pedaços (cabeçalho Range); cada pedaço é repetido em caso de
+# 429/5xx sem baixar de novo o que já chegou.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_RETRIES = 3
+
+
+def build_drive_service(creds_json):
+    try:
+        creds = Credentials.from_authorized_user_info(creds_json, SCOPES)
+        client_options = {"api_endpoint": DRIVE_API_URL} if DRIVE_API_URL else None
+        return build('drive', 'v3', credentials=creds, client_options=client_options)
+    except Exception as e:
+        logger.error(f"Erro ao construir o serviço do Drive: {e}")
+        return None
+
+
+_thread_local = threading.local()
+
+
+def get_thread_drive_service(creds_json):
+    """Retorna um serviço do Drive exclusivo da thread atual (o cliente httplib2 não é thread-safe)."""
+    service = getattr(_thread_local, "drive_service", None)
+    if service is None:
+        service = build_drive_service(creds_json)
+        _thread_local.drive_service = service
+    return service
+
+
+def iter_drive_files(service, query, fields="id, name", page_size=100, order_by=None):
+    """Percorre todas as páginas de `files().list`, gerando cada arquivo assim que sua página chega."""
+    page_token = None
+    extra = {"orderBy": order_by} if order_by else {}
+    while True:
+        results = service.files().list(
+            q=query, pageSize=page_size, pageToken=page_token,
+            fields=f"nextPageToken, files({fields})", **extra).execute()
+        yield from results.get('files', [])
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def list_drive_folders(service):
+    try:
+        return list(iter_drive_files(
+            service, "mimeType='application/vnd.google-apps.folder'", page_size=1000))
+    except Exception as e:
+        logger.error(f"Não foi possível buscar as pastas: {e}")
+        return []
+
+
+def iter_pdfs_from_folder(service, folder_id, modified_after=None):
+    """Gera os PDFs da pasta página a página; com `modified_after`, apenas os modificados depois dessa data.
+
+    Os arquivos vêm do mais antigo para o mais recente. Uma falha na listagem é propagada:
+    quem consome precisa saber que a pasta não foi lida até o fim (ver `safe_high_water_mark`).
+    """
+    query = f"'{folder_id}' in parents and mimeType='application/pdf' and trashed=false"
+    if modified_after:
+        query += f" and modifiedTime > '{modified_after}'"
+    try:
+        # Tamanho e MD5 vêm na listagem: arquivos grandes demais ou já analisados são
+        # descartados antes do download.
+        yield from iter_drive_files(
+            service, query, fields="id, name, size, md5Checksum, modifiedTime",
+            page_size=LIST_PAGE_SIZE, order_by="modifiedTime")
+    except Exception as e:
+        logger.error(f"Não foi possível buscar os PDFs da pasta: {e}")
+        raise
+
+
+def download_pdf_content(service, file_id, max_bytes=None, expected_md5=None,
+                         chunk_size=DOWNLOAD_CHUNK_SIZE, retries=DOWNLOAD_RETRIES):
+    """Baixa o arquivo em pedaços e confere o MD5 informado pelo Drive.
+
+    Devolve um `BytesIO`, ou None se o download falhar, passar de `max_bytes` ou
+    chegar com MD5 diferente de `expected_md5`.
+    """
+    try:
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(
+            buffer, service.files().get_media(fileId=file_id), chunksize=chunk_size)
+        done = False
+        while not done:
+            status, done = downloader.next_chunk(num_retries=retries)
+            size = max(status.total_size or 0, status.resumable_progress)
+            if max_bytes and size > max_bytes:
+                raise ValueError(
+                    f"arquivo com {size / 1024 / 1024:.1f} MB excede o limite de "
+                    f"{max_bytes / 1024 / 1024:.0f} MB")
+    except Exception as e:
+        logger.error(f"Falha no download do PDF (ID: {file_id}): {e}")
+        return None
+    if expected_md5 and hashlib.md5(buffer.getvalue()).hexdigest() != expected_md5:
+        logger.error(f"Download do PDF corrompido (ID: {file_id}): MD5 diferente do informado pelo Drive")
+        return None
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,91 @@
+"""Diário persistente das execuções, por arquivo do Drive e versão do prompt.
+
+Cada etapa concluída de um currículo é registrada antes da seguinte começar.
+Se a execução for interrompida, a próxima retoma de onde parou: análises já
+pagas são reaproveitadas e cards já criados não são criados de novo.
+"""
+import threading
+import time
+
+from thunderget.cache import prompt_hash
+from thunderget.storage import connect
+
+# Estados, na ordem em que são alcançados. "carding" é gravado imediatamente antes de
+# criar o card: se o processo cair entre a criação e o registro, o card é procurado
+# pelo marcador em vez de ser criado outra vez.
+STATES = ("downloaded", "extracted", "analyzed", "parsed", "carding", "carded")
+CARD_STATES = ("carding", "carded")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS job_journal (
+    file_id TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    state TEXT NOT NULL,
+    file_name TEXT,
+    md5 TEXT,
+    analysis TEXT,
+    candidate_name TEXT,
+    final_score INTEGER,
+    card_list_id TEXT,
+    card_id TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (file_id, prompt_version)
+);
+"""
+
+_FIELDS = ("file_name", "md5", "analysis", "candidate_name", "final_score", "card_list_id", "card_id")
+
+
+def prompt_version(system_prompt):
+    return prompt_hash(system_prompt)[:16]
+
+
+def card_marker(file_id, version):
+    """Linha anexada à descrição do card que o identifica de forma única."""
+    return f"ThunderGet: {file_id}/{version}"
+
+
+class JobJournal:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, file_id, version):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM job_journal WHERE file_id = ? AND prompt_version = ?",
+                (file_id, version)).fetchone()
+        return dict(row) if row else None
+
+    def mark(self, file_id, version, state, **fields):
+        """Registra o estado de um arquivo; campos omitidos mantêm o valor anterior.
+
+        Um arquivo que já tem (ou pode ter) card não volta aos estados anteriores ao ser
+        reanalisado: apenas os campos são atualizados.
+        """
+        if state not in STATES:
+            raise ValueError(f"Estado desconhecido: {state}")
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+        values = [fields.get(name) for name in _FIELDS]
+        updates = ", ".join(f"{name} = COALESCE(excluded.{name}, {name})" for name in _FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO job_journal (file_id, prompt_version, state, {', '.join(_FIELDS)}, updated_at) "
+                f"VALUES (?, ?, ?, {', '.join('?' for _ in _FIELDS)}, ?) "
+                f"ON CONFLICT (file_id, prompt_version) DO UPDATE SET "
+                f"state = CASE WHEN state IN {CARD_STATES} AND excluded.state NOT IN {CARD_STATES} "
+                f"THEN state ELSE excluded.state END, "
+                f"{updates}, updated_at = excluded.updated_at",
+                (file_id, version, state, *values, time.time()))
+
+    def counts(self, version):
+        """Quantidade de arquivos em cada estado para uma versão do prompt."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) AS n FROM job_journal WHERE prompt_version = ? GROUP BY state",
+                (version,)).fetchall()
+        return {row["state"]: row["n"] for row in rows}
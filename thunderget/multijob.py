@@ -0,0 +1,206 @@
+"""Triagem de uma pasta para várias vagas na mesma execução.
+
+Cada vaga (prompt, quadro e listas) tem o seu pipeline, e todos rodam ao mesmo
+tempo sobre uma única listagem da pasta. O download, a extração e o OCR de cada
+PDF são feitos uma só vez e compartilhados em memória (`SharedSource`); a análise,
+a nota e o card seguem por vaga. O resultado inclui a matriz de notas candidato × vaga.
+"""
+import queue
+import threading
+
+from thunderget.pipeline import PipelineResult
+from thunderget.screening import RunReport
+from thunderget.sync import safe_high_water_mark
+
+# Quantos PDFs a listagem pode adiantar para a vaga mais rápida em relação à mais lenta:
+# limita o que fica guardado em memória à espera das demais vagas.
+DEFAULT_LOOKAHEAD = 32
+
+_DONE = object()
+
+
+class SharedSource:
+    """Resultados por arquivo (conteúdo, extração, OCR) calculados uma vez e reaproveitados pelas vagas.
+
+    Um arquivo sai da memória quando todas as `consumers` vagas entregaram o seu resultado.
+    """
+
+    def __init__(self, consumers):
+        self.consumers = consumers
+        self.computed = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _entry(self, file_id):
+        # Chamado com `_lock` adquirido.
+        if file_id not in self._entries:
+            self._entries[file_id] = {"lock": threading.Lock(), "values": {}, "released": 0}
+        return self._entries[file_id]
+
+    def get(self, file_id, key, compute):
+        """Valor de `key` para o arquivo; só a primeira vaga a pedir o calcula (as demais esperam)."""
+        with self._lock:
+            entry = self._entry(file_id)
+        with entry["lock"]:
+            if key in entry["values"]:
+                with self._lock:
+                    self.reused += 1
+            else:
+                try:
+                    entry["values"][key] = (compute(), None)
+                except Exception as e:
+                    # A falha também é compartilhada: as outras vagas não repetem um download ou
+                    # uma extração que acabou de falhar.
+                    entry["values"][key] = (None, e)
+                with self._lock:
+                    self.computed += 1
+            value, error = entry["values"][key]
+        if error is not None:
+            raise error
+        return value
+
+    def release(self, file_id):
+        with self._lock:
+            entry = self._entry(file_id)
+            entry["released"] += 1
+            if entry["released"] >= self.consumers:
+                del self._entries[file_id]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class MultiJobRunner:
+    """Executa os pipelines das vagas ao mesmo tempo sobre a mesma listagem de PDFs."""
+
+    def __init__(self, pipelines, shared, lookahead=DEFAULT_LOOKAHEAD):
+        self.pipelines = dict(pipelines)
+        self.shared = shared
+        self.lookahead = lookahead
+        self._stop = threading.Event()
+
+    def cancel(self):
+        self._stop.set()
+        for pipeline in self.pipelines.values():
+            pipeline.cancel()
+
+    def _put(self, inbox, item):
+        while not self._stop.is_set():
+            try:
+                inbox.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, items, inboxes, results):
+        try:
+            for item in items:
+                if not all(self._put(inbox, item) for inbox in inboxes.values()):
+                    break
+        except Exception as e:
+            results.put((None, PipelineResult(None, stage="source", error=e)))
+        finally:
+            for inbox in inboxes.values():
+                self._put(inbox, _DONE)
+
+    @staticmethod
+    def _drain(inbox):
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                return
+            yield item
+
+    def _run_job(self, name, inbox, results):
+        try:
+            for result in self.pipelines[name].run(self._drain(inbox)):
+                results.put((name, result))
+        finally:
+            results.put((name, _DONE))
+
+    def run(self, items):
+        """Gera (nome da vaga, PipelineResult) à medida que cada vaga conclui cada PDF.
+
+        Um erro na listagem é gerado uma vez, com o nome da vaga None.
+        """
+        self._stop.clear()
+        inboxes = {name: queue.Queue(maxsize=self.lookahead) for name in self.pipelines}
+        results = queue.Queue()
+        threads = [threading.Thread(target=self._feed, args=(items, inboxes, results),
+                                    name="multijob-source", daemon=True)]
+        threads += [threading.Thread(target=self._run_job, args=(name, inbox, results),
+                                     name=f"multijob-{name}", daemon=True)
+                    for name, inbox in inboxes.items()]
+        for thread in threads:
+            thread.start()
+
+        running = len(self.pipelines)
+        try:
+            while running:
+                name, result = results.get()
+                if result is _DONE:
+                    running -= 1
+                    continue
+                if result.item is not None:
+                    self.shared.release(result.item['id'])
+                yield name, result
+        finally:
+            self.cancel()
+
+
+class MultiJobReport:
+    """Consolida uma execução com várias vagas: um `RunReport` por vaga e a matriz de notas."""
+
+    def __init__(self, job_names):
+        self.job_names = list(job_names)
+        self.reports = {name: RunReport() for name in self.job_names}
+        self.errors = []
+        self.matrix = {}
+        self.listing_complete = True
+        self._outcomes = {}
+
+    def record(self, job_name, result):
+        """Registra o resultado de uma vaga e devolve a classificação de `describe_result`."""
+        if job_name is None:
+            self.listing_complete = False
+            self.errors.append(f"Erro na listagem da pasta: {result.error}")
+            return "error", "Erro na listagem da pasta", str(result.error)
+        kind, title, detail = self.reports[job_name].record(result)
+        if result.item is None:
+            return kind, title, detail
+        pdf = result.item
+        row = self.matrix.setdefault(
+            pdf['id'], {"file_name": pdf['name'], "candidate_name": None, "scores": {}})
+        job = result.value if result.completed else None
+        if job and job.get("final_score") is not None:
+            row["scores"][job_name] = job["final_score"]
+            # O nome provisório ("Candidato de '...'") só é usado se nenhuma vaga leu o nome.
+            if not row["candidate_name"] or row["candidate_name"].startswith("Candidato de '"):
+                row["candidate_name"] = job["candidate_name"]
+        outcome = self._outcomes.setdefault(pdf['id'], {"time": pdf.get('modifiedTime'), "ok": True, "n": 0})
+        outcome["ok"] = outcome["ok"] and kind == "ok"
+        outcome["n"] += 1
+        return kind, title, detail
+
+    def sync_mark(self, current=None):
+        """Ponto de sincronização: um PDF só conta como concluído se deu certo em todas as vagas."""
+        succeeded, failed = [], []
+        for outcome in self._outcomes.values():
+            if outcome["time"]:
+                done = outcome["ok"] and outcome["n"] == len(self.job_names)
+                (succeeded if done else failed).append(outcome["time"])
+        return safe_high_water_mark(succeeded, failed, current=current, complete=self.listing_complete)
+
+    def matrix_rows(self):
+        """Linhas da matriz candidato × vaga, da maior para a menor nota em qualquer vaga."""
+        rows = [{"file_id": file_id, **row} for file_id, row in self.matrix.items() if row["scores"]]
+        return sorted(rows, key=lambda row: max(row["scores"].values()), reverse=True)
+
+    def summary_lines(self):
+        lines = []
+        for name in self.job_names:
+            lines += [f"[{name}] {line}" for line in self.reports[name].summary_lines()]
+        return lines
@@ -0,0 +1,118 @@
+"""Preparação de páginas digitalizadas para OCR.
+
+As páginas sem camada de texto são renderizadas pelo PyMuPDF já no tamanho de
+envio (lado maior de até `MAX_SIDE` pixels, em tons de cinza) e recodificadas
+em JPEG pelo Pillow dentro de um orçamento de bytes: o upload para o modelo
+multimodal fica uma ordem de grandeza menor que a imagem original. As páginas
+são agrupadas no máximo de imagens por chamada que o modelo aceita.
+
+O OCR local (Tesseract, via `pytesseract`) é opcional e dispensa a Groq.
+"""
+import base64
+import io
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+try:
+    import pytesseract
+except ImportError:  # OCR local opcional
+    pytesseract = None
+
+OCR_ENGINES = ("groq", "tesseract")
+# Resolução de renderização: 150 dpi bastam para o texto de um currículo.
+RENDER_DPI = 150
+MAX_SIDE = 1600
+MAX_IMAGE_BYTES = 400 * 1024
+JPEG_QUALITIES = (85, 70, 55, 40)
+# O modelo multimodal da Groq aceita até 5 imagens por requisição, e a requisição com as
+# imagens em base64 não pode passar de 4 MB (o base64 aumenta os bytes em 1/3).
+MAX_IMAGES_PER_REQUEST = 5
+MAX_REQUEST_BYTES = 3 * 1024 * 1024
+# Páginas digitalizadas lidas por currículo.
+MAX_OCR_PAGES = 10
+TESSERACT_LANGS = ("por", "eng")
+
+
+def _encode_jpeg(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def prepare_image(image, max_side=MAX_SIDE, max_bytes=MAX_IMAGE_BYTES):
+    """Reduz uma imagem (bytes em qualquer formato lido pelo Pillow, ou `Image`) a um JPEG em tons de cinza.
+
+    O lado maior fica em até `max_side` pixels; a qualidade e, se preciso, o tamanho
+    diminuem até o arquivo caber em `max_bytes`.
+    """
+    if isinstance(image, bytes):
+        image = Image.open(io.BytesIO(image))
+    image = image.convert("L")
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    for quality in JPEG_QUALITIES:
+        data = _encode_jpeg(image, quality)
+        if len(data) <= max_bytes:
+            return data
+    while len(data) > max_bytes and min(image.size) > 200:
+        image = image.resize((image.width * 3 // 4, image.height * 3 // 4), Image.LANCZOS)
+        data = _encode_jpeg(image, JPEG_QUALITIES[-1])
+    return data
+
+
+def render_page(page, max_side=MAX_SIDE, dpi=RENDER_DPI, max_bytes=MAX_IMAGE_BYTES):
+    """Renderiza uma página do PyMuPDF diretamente no tamanho de envio e a codifica em JPEG."""
+    zoom = min(dpi / 72, max_side / max(page.rect.width, page.rect.height))
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    image = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    return prepare_image(image, max_side, max_bytes)
+
+
+def render_scanned_pages(doc, page_texts, min_chars, max_pages=MAX_OCR_PAGES):
+    """Imagens das páginas com menos de `min_chars` caracteres de texto, por índice da página."""
+    images = {}
+    for index, text in enumerate(page_texts):
+        if len(images) >= max_pages:
+            break
+        if len(text.strip()) < min_chars:
+            images[index] = render_page(doc[index])
+    return images
+
+
+def batch_images(images, max_images=MAX_IMAGES_PER_REQUEST, max_bytes=MAX_REQUEST_BYTES):
+    """Agrupa as imagens, em ordem, no menor número de requisições dentro dos limites do modelo."""
+    batches, current, size = [], [], 0
+    for image in images:
+        if current and (len(current) >= max_images or size + len(image) > max_bytes):
+            batches.append(current)
+            current, size = [], 0
+        current.append(image)
+        size += len(image)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def image_data_url(jpeg_bytes):
+    return f"data:image/jpeg;base64,{base64.b64encode(jpeg_bytes).decode('ascii')}"
+
+
+def tesseract_available():
+    """O pacote `pytesseract` está instalado e o executável do Tesseract foi encontrado."""
+    if pytesseract is None:
+        return False
+    try:
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def ocr_with_tesseract(images):
+    """Texto de cada imagem (JPEG) pelo Tesseract local, em português e inglês quando instalados."""
+    if pytesseract is None:
+        raise RuntimeError("O OCR local requer o pacote pytesseract e o Tesseract instalados.")
+    installed = set(pytesseract.get_languages(config=""))
+    lang = "+".join(code for code in TESSERACT_LANGS if code in installed) or None
+    return [pytesseract.image_to_string(Image.open(io.BytesIO(data)), lang=lang) for data in images]
@@ -0,0 +1,86 @@
+"""Extração local do nome do candidato e da nota final a partir do texto de análise.
+
+Os prompts de avaliação exigem os marcadores "Nome do candidato: N" e
+"Nota final: X"; na grande maioria das respostas eles podem ser lidos com
+expressões regulares, sem uma segunda chamada à LLM.
+"""
+import re
+import unicodedata
+
+# Marcadores de formatação Markdown que costumam envolver os rótulos e os valores.
+_MARKDOWN = re.compile(r"[*_`#>]+")
+
+_NAME_RE = re.compile(
+    r"nome\s+do\s*\(?a?\)?\s+candidat[oa](?:\s*\(a\))?\s*[:\-–—]\s*(?P<name>[^\n]+)",
+    re.IGNORECASE)
+
+_SCORE_RE = re.compile(
+    r"(?:nota|pontua[cç][aã]o)\s+final(?:\s*\([^)\n]*\))?\s*(?:[:=\-–—]|[eé])?\s*"
+    r"(?P<score>\d{1,3}(?:[.,]\d+)?)"
+    r"(?:[ \t]*(?:/|de|em)[ \t]*(?P<scale>100|10)(?!\d))?",
+    re.IGNORECASE)
+
+# Nota escrita como conta ("35 + 18 + 15 = 68"): vale o resultado depois do último "=".
+_TOTAL_RE = re.compile(
+    r"=[ \t]*(?P<score>\d{1,3}(?:[.,]\d+)?)(?:[ \t]*(?:/|de|em)[ \t]*(?P<scale>100|10)(?!\d))?[^=]*$")
+
+# Valores que indicam que o modelo repetiu o marcador sem preenchê-lo.
+_PLACEHOLDER_NAMES = {"n", "nome", "[nome]", "<nome>", "nome completo", "nao informado",
+                      "não informado", "desconhecido", "n/a"}
+
+
+def _strip_markdown(text):
+    return _MARKDOWN.sub("", unicodedata.normalize("NFC", text))
+
+
+def _clean_name(raw):
+    name = raw.strip().strip("\"'“”‘’").strip()
+    name = re.split(r"\s{2,}|\s[|•]\s", name)[0]
+    name = name.rstrip(" .;,")
+    if not name or len(name) > 100 or name.lower() in _PLACEHOLDER_NAMES:
+        return None
+    if not any(c.isalpha() for c in name):
+        return None
+    return name
+
+
+def _to_score(raw, scale):
+    value = float(raw.replace(",", "."))
+    if scale:
+        scale = int(scale)
+        if scale <= 0:
+            return None
+        value = value * 100 / scale
+    score = int(round(value))
+    return score if 0 <= score <= 100 else None
+
+
+def parse_candidate_name(analysis_text):
+    match = _NAME_RE.search(_strip_markdown(analysis_text))
+    return _clean_name(match.group("name")) if match else None
+
+
+def parse_final_score(analysis_text):
+    """Lê a última ocorrência de "Nota final" (a conclusão da análise)."""
+    text = _strip_markdown(analysis_text)
+    matches = list(_SCORE_RE.finditer(text))
+    if not matches:
+        return None
+    last = matches[-1]
+    rest = text[last.end():].split("\n", 1)[0]
+    if "+" in rest or "=" in rest:
+        # Sem um total legível, a nota fica para a LLM em vez de ser lida pela metade.
+        total = _TOTAL_RE.search(rest)
+        return _to_score(total.group("score"), total.group("scale")) if total else None
+    return _to_score(last.group("score"), last.group("scale"))
+
+
+def parse_analysis_locally(analysis_text):
+    """Retorna (nome, nota) ou None se algum dos marcadores não puder ser lido."""
+    if not analysis_text:
+        return None
+    candidate_name = parse_candidate_name(analysis_text)
+    final_score = parse_final_score(analysis_text)
+    if candidate_name is None or final_score is None:
+        return None
+    return candidate_name, final_score
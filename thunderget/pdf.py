@@ -0,0 +1,142 @@
+"""Extração de texto de PDFs em um pool de processos, com limites por documento.
+
+O PyMuPDF roda fora do processo principal: um PDF enorme ou malformado não
+trava a interface nem disputa o GIL com as threads do pipeline. O texto é lido
+página a página e a leitura para assim que o orçamento de caracteres é
+atingido.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+from thunderget.ocr import render_scanned_pages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 25 * 1024 * 1024
+DEFAULT_MAX_PAGES = 50
+DEFAULT_MAX_CHARS = 50_000
+DEFAULT_TIMEOUT = 60  # segundos
+# Abaixo desta média de caracteres por página o PDF é tratado como digitalizado (sem camada de texto).
+MIN_CHARS_PER_PAGE = 25
+
+
+class PdfExtractionError(Exception):
+    """O documento excedeu um limite ou não pôde ser lido."""
+
+
+def extract_text_from_pdf_bytes(pdf_bytes):
+    """Extração simples, no próprio processo, para arquivos pequenos (ex.: descrição da vaga)."""
+    try:
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            return "".join(page.get_text() for page in doc).strip()
+    except Exception as e:
+        logger.warning(f"Não foi possível extrair texto do PDF: {e}")
+        return ""
+
+
+def extract_pdf_text(pdf_bytes, max_pages=DEFAULT_MAX_PAGES, max_chars=DEFAULT_MAX_CHARS,
+                     render_scanned=False):
+    """Lê o texto página a página. Executada nos processos do pool.
+
+    Retorna um dict com `text`, `pages` (texto de cada página lida), `page_count`,
+    `truncated` (algum limite interrompeu a leitura), `needs_ocr` e `images`: com
+    `render_scanned`, as páginas sem texto de um PDF digitalizado renderizadas para OCR
+    (JPEG por índice da página, ver `render_scanned_pages`).
+    """
+    pages = []
+    total_chars = 0
+    truncated = False
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        page_count = doc.page_count
+        for index, page in enumerate(doc):
+            if index >= max_pages:
+                truncated = True
+                break
+            text = page.get_text()
+            if max_chars and total_chars + len(text) > max_chars:
+                pages.append(text[:max_chars - total_chars])
+                truncated = True
+                break
+            pages.append(text)
+            total_chars += len(text)
+
+        visible_chars = sum(len(page.strip()) for page in pages)
+        needs_ocr = bool(pages) and visible_chars < MIN_CHARS_PER_PAGE * len(pages)
+        images = render_scanned_pages(doc, pages, MIN_CHARS_PER_PAGE) if render_scanned and needs_ocr else {}
+
+    return {
+        "text": "".join(pages).strip(),
+        "pages": pages,
+        "page_count": page_count,
+        "truncated": truncated,
+        "needs_ocr": needs_ocr,
+        "images": images,
+    }
+
+
+class PdfExtractor:
+    """Pool de processos para `extract_pdf_text` com limites de tamanho, páginas e tempo."""
+
+    def __init__(self, workers=2, max_bytes=DEFAULT_MAX_BYTES, max_pages=DEFAULT_MAX_PAGES,
+                 max_chars=DEFAULT_MAX_CHARS, timeout=DEFAULT_TIMEOUT):
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        # "spawn" evita herdar por fork as threads e conexões abertas do processo principal;
+        # reciclar os processos periodicamente devolve a memória de documentos grandes.
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=100)
+
+    def _recycle(self, broken_executor):
+        """Encerra à força os processos de um pool travado e cria um novo."""
+        with self._lock:
+            if self._executor is not broken_executor:
+                return
+            for process in list((broken_executor._processes or {}).values()):
+                process.terminate()
+            broken_executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+
+    def extract(self, pdf_bytes, render_scanned=False, max_chars=None):
+        """Extrai o texto em um processo do pool; `max_chars` substitui o limite do extrator."""
+        max_chars = self.max_chars if max_chars is None else max_chars
+        if self.max_bytes and len(pdf_bytes) > self.max_bytes:
+            raise PdfExtractionError(
+                f"arquivo com {len(pdf_bytes) / 1024 / 1024:.1f} MB excede o limite de "
+                f"{self.max_bytes / 1024 / 1024:.0f} MB")
+
+        for attempt in range(2):
+            executor = self._executor
+            try:
+                future = executor.submit(
+                    extract_pdf_text, pdf_bytes, self.max_pages, max_chars, render_scanned)
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                self._recycle(executor)
+                raise PdfExtractionError(
+                    f"extração excedeu o limite de {self.timeout} s")
+            except BrokenProcessPool:
+                # O pool foi reciclado por causa de outro documento; tenta uma vez no novo pool.
+                self._recycle(executor)
+                if attempt:
+                    raise PdfExtractionError("o processo de extração foi encerrado")
+            except Exception as e:
+                if self._executor is not executor and not attempt:
+                    continue  # O pool foi substituído entre a leitura e o submit.
+                raise PdfExtractionError(f"não foi possível ler o PDF: {e}") from e
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,162 @@
+"""Motor de pipeline em estágios concorrentes.
+
+Cada item percorre uma sequência de estágios. Cada estágio tem sua própria fila
+de entrada e seu próprio conjunto de threads, de modo que o tempo de uma
+execução é limitado pela vazão do estágio mais lento, e não pela soma das
+latências de todos os itens.
+"""
+import contextlib
+import queue
+import threading
+from dataclasses import dataclass
+
+# Sentinela que indica o fim da fila de um estágio.
+_DONE = object()
+
+
+class SkipItem(Exception):
+    """Lançada por um estágio para retirar o item do pipeline com um motivo, sem tratá-lo como erro."""
+
+
+@dataclass
+class Stage:
+    """Um estágio do pipeline.
+
+    `func` recebe o valor produzido pelo estágio anterior (ou o próprio item, no
+    primeiro estágio) e devolve o valor seguinte. Devolver None interrompe o item,
+    como um `continue` no laço sequencial; lançar SkipItem o interrompe com um motivo.
+    """
+    name: str
+    func: object
+    workers: int = 1
+
+
+@dataclass
+class PipelineResult:
+    """Resultado de um item ao sair do pipeline."""
+    item: object
+    value: object = None
+    stage: str = None  # Último estágio executado para o item.
+    error: Exception = None
+    skip_reason: str = None
+    completed: bool = False  # True se o item percorreu todos os estágios.
+
+
+class Pipeline:
+    """Executa itens através de estágios concorrentes, entregando os resultados à medida que terminam."""
+
+    def __init__(self, stages, queue_size=None, on_thread_start=None, tracer=None):
+        self.stages = list(stages)
+        if not self.stages:
+            raise ValueError("O pipeline precisa de pelo menos um estágio.")
+        for stage in self.stages:
+            if stage.workers < 1:
+                raise ValueError(
+                    f"O estágio '{stage.name}' precisa de pelo menos um worker.")
+        # Filas limitadas aplicam contrapressão: um estágio rápido não acumula
+        # trabalho indefinidamente na frente de um estágio lento.
+        self.queue_size = queue_size or 2 * max(s.workers for s in self.stages)
+        # Chamado com cada thread antes de iniciá-la (ex.: para anexar o contexto do Streamlit).
+        self.on_thread_start = on_thread_start
+        # Objeto com `span(estágio, item)` (ex.: `telemetry.Telemetry`) que mede cada execução de estágio.
+        self.tracer = tracer
+        self._queues = []
+        self._stop = threading.Event()
+
+    def queue_depths(self):
+        """Quantidade de itens aguardando em cada estágio."""
+        return {stage.name: q.qsize() for stage, q in zip(self.stages, self._queues)}
+
+    def cancel(self):
+        """Interrompe a execução; itens ainda não iniciados são descartados."""
+        self._stop.set()
+
+    def run(self, items):
+        """Processa `items` (qualquer iterável) e gera um PipelineResult por item."""
+        self._stop.clear()
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results = queue.Queue()
+
+        threads = [threading.Thread(
+            target=self._feed, args=(items, results), name="pipeline-source", daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work, args=(index, results, remaining, lock),
+                    name=f"pipeline-{stage.name}-{n}", daemon=True))
+
+        for thread in threads:
+            if self.on_thread_start:
+                self.on_thread_start(thread)
+            thread.start()
+
+        try:
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                yield result
+        finally:
+            # Se o consumidor parar de iterar, as threads descartam o restante e encerram.
+            self._stop.set()
+
+    def _feed(self, items, results):
+        first = self._queues[0]
+        try:
+            for item in items:
+                if self._stop.is_set():
+                    break
+                first.put((item, item))
+        except Exception as e:
+            results.put(PipelineResult(None, stage="source", error=e))
+        finally:
+            for _ in range(self.stages[0].workers):
+                first.put(_DONE)
+
+    def _span(self, stage_name, item):
+        return self.tracer.span(stage_name, item) if self.tracer else contextlib.nullcontext()
+
+    def _work(self, index, results, remaining, lock):
+        stage = self.stages[index]
+        is_last_stage = index == len(self.stages) - 1
+        inbox = self._queues[index]
+        outbox = None if is_last_stage else self._queues[index + 1]
+
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                break
+            if self._stop.is_set():
+                continue
+            item, value = job
+            try:
+                with self._span(stage.name, item) as span:
+                    value = stage.func(value)
+                    if value is None and span is not None:
+                        span.status = "dropped"
+            except SkipItem as e:
+                results.put(PipelineResult(item, stage=stage.name, skip_reason=str(e)))
+                continue
+            except Exception as e:
+                results.put(PipelineResult(item, stage=stage.name, error=e))
+                continue
+            if value is None:
+                results.put(PipelineResult(item, stage=stage.name))
+            elif is_last_stage:
+                results.put(PipelineResult(
+                    item, value, stage=stage.name, completed=True))
+            else:
+                outbox.put((item, value))
+
+        # O último worker de cada estágio a terminar propaga o fim para o próximo.
+        with lock:
+            remaining[0] -= 1
+            is_last_worker = remaining[0] == 0
+        if is_last_worker:
+            if is_last_stage:
+                results.put(_DONE)
+            else:
+                for _ in range(self.stages[index + 1].workers):
+                    outbox.put(_DONE)
@@ -0,0 +1,146 @@
+"""Pré-triagem barata dos currículos antes da análise completa (cascata de modelos).
+
+Uma primeira camada atribui uma nota aproximada (0 a 100) a cada currículo:
+
+- "lexical": cobertura local das palavras-chave da descrição da vaga, sem chamada à IA;
+- "llm": um modelo pequeno e rápido da Groq, com uma resposta JSON curta.
+
+Somente os currículos com nota acima do corte, ou próxima da nota de aprovação,
+seguem para a análise completa com o modelo de 70B.
+"""
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+
+from thunderget.clients import create_chat_completion
+
+logger = logging.getLogger(__name__)
+
+PRESCREEN_MODES = ("lexical", "llm")
+PRESCREEN_MODEL = "llama-3.1-8b-instant"
+DEFAULT_CUTOFF = 40
+DEFAULT_MARGIN = 20
+# Fração das palavras-chave da vaga (ponderadas) que já corresponde à nota máxima:
+# nenhum currículo cobre todo o vocabulário de uma descrição de vaga.
+LEXICAL_SATURATION = 0.5
+MAX_KEYWORDS = 80
+# Caracteres do currículo enviados ao modelo pequeno.
+LLM_MAX_CHARS = 6000
+
+PRESCREEN_SYSTEM_PROMPT = """Você faz uma pré-triagem rápida de currículos.
+Compare o currículo com a descrição da vaga e estime a aderência de 0 a 100.
+Responda estritamente com um objeto JSON: {"score": N}"""
+
+_PROMPT_SECTIONS_RE = re.compile(r"<(context|evaluation_criteria)>(.*?)</\1>", re.DOTALL)
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+# Palavras comuns do português e termos genéricos de vagas e prompts de avaliação.
+_STOPWORDS = set("""
+a o e de da do das dos em no na nos nas um uma uns umas para por com sem sob sobre entre ate
+como que se ou ao aos as os ser ter estar sua seu suas seus ele ela eles elas voce mais
+menos muito muita bem ja nao sim tambem quando onde qual quais isso esta este essa esse
+pelo pela pelos pelas cada todo toda todos todas outro outra outros outras deve devem pode
+podem sera sao foi tem the and for with of to in on
+vaga vagas candidato candidata candidatos candidatas experiencia experiencias conhecimento
+conhecimentos area areas atuar atuacao desejavel desejaveis requisito requisitos obrigatorio
+obrigatorios diferencial diferenciais habilidade habilidades capacidade nota final pontos
+ponto criterio criterios avaliacao avaliar analise analisar curriculo curriculos role
+instructions context evaluation criteria general rules nome anos ano forma
+""".split())
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text):
+    return [word for word in _WORD_RE.findall(_normalize(text or ""))
+            if len(word) > 2 and word not in _STOPWORDS and not word.isdigit()]
+
+
+def job_text_from_prompt(system_prompt):
+    """Trecho do prompt que descreve a vaga (seções <context> e <evaluation_criteria>).
+
+    Usado quando a descrição original da vaga não está disponível; as instruções de
+    formato do prompt só acrescentariam ruído às palavras-chave.
+    """
+    sections = [body for _, body in _PROMPT_SECTIONS_RE.findall(system_prompt or "")]
+    return "\n".join(sections) if sections else system_prompt
+
+
+def extract_keywords(job_text, max_keywords=MAX_KEYWORDS):
+    """Palavras-chave da vaga com peso: termos repetidos na descrição pesam mais."""
+    counts = Counter(tokenize(job_text))
+    return {word: 1 + math.log(count) for word, count in counts.most_common(max_keywords)}
+
+
+def lexical_score(cv_text, keywords):
+    """Nota aproximada (0 a 100) e palavras-chave encontradas no currículo."""
+    if not keywords:
+        return 0, []
+    words = set(tokenize(cv_text))
+    found = [word for word in keywords if word in words]
+    coverage = sum(keywords[word] for word in found) / sum(keywords.values())
+    return min(100, round(coverage / LEXICAL_SATURATION * 100)), found
+
+
+def llm_score(api_key, job_text, cv_text):
+    """Nota aproximada dada pelo modelo pequeno, ou None se a chamada falhar."""
+    try:
+        response = create_chat_completion(
+            api_key,
+            messages=[
+                {"role": "system", "content": PRESCREEN_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Descrição da vaga:\n{job_text}\n\n"
+                                            f"Currículo:\n{cv_text[:LLM_MAX_CHARS]}"},
+            ],
+            model=PRESCREEN_MODEL,
+            max_tokens=20,
+            response_format={"type": "json_object"},
+        )
+        score = json.loads(response.choices[0].message.content).get("score")
+        return max(0, min(100, int(score)))
+    except Exception as e:
+        logger.warning(f"Falha na pré-triagem pela IA; o currículo segue para a análise completa: {e}")
+        return None
+
+
+class PreScreener:
+    """Decide quais currículos merecem a análise completa.
+
+    Um currículo segue para a análise se a nota aproximada for ao menos `cutoff` ou
+    estiver acima da nota de aprovação menos `margin` (ver `cutoff_for`).
+    """
+
+    def __init__(self, job_text, mode="lexical", api_key=None, cutoff=DEFAULT_CUTOFF,
+                 margin=DEFAULT_MARGIN):
+        if mode not in PRESCREEN_MODES:
+            raise ValueError(f"Modo de pré-triagem desconhecido: {mode}")
+        if mode == "llm" and not api_key:
+            raise ValueError("A pré-triagem pela IA precisa da chave da Groq.")
+        self.job_text = job_text
+        self.mode = mode
+        self.api_key = api_key
+        self.cutoff = cutoff
+        self.margin = margin
+        self.keywords = extract_keywords(job_text) if mode == "lexical" else {}
+
+    def score(self, cv_text):
+        """Devolve (nota, palavras-chave encontradas); nota None se não foi possível estimá-la."""
+        if self.mode == "llm":
+            return llm_score(self.api_key, self.job_text, cv_text), []
+        return lexical_score(cv_text, self.keywords)
+
+    def cutoff_for(self, threshold):
+        """Corte efetivo: um corte configurado acima da nota de aprovação não reprova quem passaria."""
+        return min(self.cutoff, threshold - self.margin)
+
+    def should_analyze(self, score, threshold):
+        if score is None:
+            return True
+        return score >= self.cutoff_for(threshold)
@@ -0,0 +1,507 @@
+"""Triagem de uma pasta de currículos: montagem do pipeline e consolidação dos resultados.
+
+Usado tanto pela interface Streamlit quanto pela linha de comando.
+"""
+import functools
+
+from thunderget.analysis import (ANALYSIS_MODEL, extract_text_from_images_groq, get_analysis_from_groq,
+                                 parse_analysis_data, stream_analysis_from_groq)
+from thunderget.cache import content_hash, make_cache_key
+from thunderget.compaction import DEFAULT_TOKEN_BUDGET, compact_cv_text
+from thunderget.drive import download_pdf_content, get_thread_drive_service
+from thunderget.journal import card_marker, prompt_version
+from thunderget.ocr import batch_images, ocr_with_tesseract
+from thunderget.pdf import PdfExtractionError
+from thunderget.pipeline import Pipeline, SkipItem, Stage
+from thunderget.sync import safe_high_water_mark
+from thunderget.telemetry import record_compaction
+from thunderget.trello import (CardNotFound, add_trello_comment, create_trello_card, find_trello_card,
+                               update_trello_card)
+
+APPROVAL_THRESHOLD = 80
+
+# Estágios do processamento de cada currículo e o número padrão de workers de cada um.
+STAGE_LABELS = {
+    "download": "Download",
+    "extract": "Extração de texto",
+    "ocr": "OCR (digitalizados)",
+    "dedupe": "Detecção de cópias",
+    "compact": "Compactação do texto",
+    "prescreen": "Pré-triagem",
+    "analyze": "Análise (Groq)",
+    "parse": "Extração da nota",
+    "card": "Criação de cards",
+}
+DEFAULT_STAGE_WORKERS = {
+    "download": 4,
+    "extract": 2,
+    "ocr": 2,
+    "dedupe": 1,
+    "compact": 1,
+    "prescreen": 4,
+    "analyze": 4,
+    "parse": 4,
+    "card": 2,
+}
+
+
+def build_cv_pipeline(drive_creds, groq_api_key, system_prompt, trello_api_key, trello_token,
+                      approved_list_id, reproved_list_id, stage_workers, pdf_extractor,
+                      cache=None, force_reanalysis=False, token_budget=DEFAULT_TOKEN_BUDGET,
+                      approval_threshold=APPROVAL_THRESHOLD, journal=None, prescreener=None,
+                      duplicates=None, stream_analysis=False, stop_after_score=False, on_analysis_progress=None,
+                      candidates=None, ocr_engine=None, shared=None, max_chars=None, on_thread_start=None):
+    """Monta o pipeline download → extração → análise → nota → card para os PDFs de uma pasta.
+
+    Com `cache`, currículos já avaliados com o mesmo prompt e modelo pulam a análise e a
+    extração da nota; `force_reanalysis` ignora os acertos (mas atualiza o cache).
+
+    Com `journal` (um `JobJournal`), cada etapa concluída é registrada por arquivo e versão
+    do prompt: uma execução interrompida é retomada sem repetir análises, e o card de cada
+    arquivo é criado uma única vez (uma nova análise atualiza o card existente).
+
+    Com `prescreener` (um `PreScreener`), a análise completa só é feita para currículos
+    cuja nota aproximada passa do corte ou fica perto da nota de aprovação; os demais
+    recebem um card de reprovado na pré-triagem.
+
+    Com `duplicates` (um `DuplicateIndex`) e `journal`, um currículo quase idêntico a outro
+    já analisado reaproveita a análise dele, sem chamada à IA, e é vinculado ao card
+    existente por um comentário, em vez de ganhar um card próprio.
+
+    Com `stream_analysis`, a análise é recebida em streaming e `on_analysis_progress(pdf,
+    progress)` acompanha o texto, o nome e a nota à medida que chegam (ver
+    `stream_analysis_from_groq`); `stop_after_score` encerra a geração após a nota.
+
+    Com `ocr_engine` ("groq" ou "tesseract", ver `thunderget.ocr`), as páginas sem texto de
+    PDFs digitalizados são lidas por OCR em vez de o currículo ser ignorado.
+
+    Com `candidates` (um `CandidateStore`), cada currículo com nota é gravado na base local
+    de busca, com a análise e o texto extraído.
+
+    Com `max_chars`, o limite de caracteres extraídos de cada PDF substitui o do `pdf_extractor`
+    (o mesmo pool de processos serve a execuções com limites diferentes).
+
+    Com `shared` (um `SharedSource`), o download, a extração e o OCR de cada arquivo são
+    compartilhados com os pipelines das outras vagas da mesma execução (ver `thunderget.multijob`).
+    """
+    version = prompt_version(system_prompt)
+    # Originais ainda em processamento nesta execução: só as cópias deles esperam (ver `dedupe`).
+    in_flight = set()
+
+    def record(job, state, **fields):
+        if journal is not None:
+            journal.mark(job["pdf"]['id'], version, state, **fields)
+
+    def resume(job):
+        # Análise já paga em uma execução anterior, para o mesmo arquivo (MD5) e prompt.
+        entry = journal.get(job["pdf"]['id'], version) if journal is not None else None
+        if not entry:
+            return False
+        job["journal_state"], job["card_id"] = entry["state"], entry["card_id"]
+        same_file = entry["md5"] is None or entry["md5"] == job["pdf"].get('md5Checksum')
+        if force_reanalysis or not same_file or not entry["analysis"]:
+            return False
+        job.update(analysis=entry["analysis"], cached=True, resumed=True)
+        if entry["final_score"] is not None:
+            job.update(candidate_name=entry["candidate_name"], final_score=entry["final_score"])
+        return True
+
+    def lookup(job, file_md5):
+        job["cache_key"] = make_cache_key(file_md5, system_prompt, ANALYSIS_MODEL)
+        cached = cache.get(job["cache_key"]) if cache is not None and not force_reanalysis else None
+        if cached:
+            job.update(cached, cached=True)
+        return bool(cached)
+
+    def once(job, key, func, *args):
+        # Com várias vagas, download, extração e OCR de cada arquivo são feitos uma só vez.
+        if shared is None:
+            return func(*args)
+        return shared.get(job["pdf"]['id'], key, functools.partial(func, *args))
+
+    def fetch(pdf):
+        service = get_thread_drive_service(drive_creds)
+        if service is None:
+            return None
+        content = download_pdf_content(service, pdf['id'], max_bytes=pdf_extractor.max_bytes,
+                                       expected_md5=pdf.get('md5Checksum'))
+        return content.getvalue() if content else None
+
+    def download(pdf):
+        job = {"pdf": pdf, "cached": False, "resumed": False}
+        if resume(job):
+            return job
+        # O Drive informa o MD5 na listagem: um acerto dispensa até o download.
+        if pdf.get('md5Checksum') and lookup(job, pdf['md5Checksum']):
+            return job
+        # O tamanho também vem na listagem: um arquivo grande demais nem é baixado.
+        size = int(pdf.get('size') or 0)
+        if pdf_extractor.max_bytes and size > pdf_extractor.max_bytes:
+            raise SkipItem(f"arquivo com {size / 1024 / 1024:.1f} MB excede o limite de "
+                           f"{pdf_extractor.max_bytes / 1024 / 1024:.0f} MB; download evitado")
+        job["content"] = once(job, "content", fetch, pdf)
+        if not job["content"]:
+            return None
+        file_md5 = pdf.get('md5Checksum') or content_hash(job["content"])
+        if not pdf.get('md5Checksum'):
+            lookup(job, file_md5)
+        record(job, "downloaded", file_name=pdf['name'], md5=file_md5)
+        return job
+
+    def extract(job):
+        if job["cached"]:
+            return job
+        try:
+            extraction = once(job, "extraction", pdf_extractor.extract, job.pop("content"),
+                              ocr_engine is not None, max_chars)
+        except PdfExtractionError as e:
+            raise SkipItem(str(e))
+        if extraction["needs_ocr"]:
+            job["needs_ocr"] = True
+            if ocr_engine is None:
+                raise SkipItem("PDF sem camada de texto (digitalizado); requer OCR")
+            job["ocr_images"] = extraction["images"]
+        job["text"] = extraction["text"]
+        job["pages"] = list(extraction["pages"])
+        job["truncated"] = extraction["truncated"]
+        if not job["text"] and not job.get("ocr_images"):
+            return None
+        if not job.get("ocr_images"):
+            record(job, "extracted")
+        return job
+
+    def read_pages(images):
+        if ocr_engine == "tesseract":
+            return ocr_with_tesseract(images)
+        texts = []
+        # Poucas chamadas com várias páginas cada, em vez de uma chamada por página.
+        for batch in batch_images(images):
+            batch_texts = extract_text_from_images_groq(groq_api_key, batch)
+            if batch_texts is None:
+                return None
+            texts.extend(batch_texts)
+        return texts
+
+    def ocr(job):
+        if job["cached"] or not job.get("ocr_images"):
+            return job
+        images = job.pop("ocr_images")
+        indexes = sorted(images)
+        texts = once(job, "ocr", read_pages, [images[index] for index in indexes])
+        if texts is None:
+            raise SkipItem("falha no OCR das páginas digitalizadas")
+        for index, text in zip(indexes, texts):
+            job["pages"][index] = text + "\n"
+        job["text"] = "".join(job["pages"]).strip()
+        job["ocr_pages"] = len(indexes)
+        if not job["text"]:
+            raise SkipItem("o OCR não encontrou texto no PDF digitalizado")
+        record(job, "extracted")
+        return job
+
+    def dedupe(job):
+        if job["cached"] or duplicates is None:
+            return job
+        pdf = job["pdf"]
+        original = duplicates.check(pdf['id'], pdf['name'], pdf.get('md5Checksum'), job["text"])
+        if original is None:
+            in_flight.add(pdf['id'])
+            return job
+        entry = journal.get(original["file_id"], version) if journal is not None else None
+        if not entry or entry["state"] != "carded" or not entry["card_id"] or entry["final_score"] is None:
+            # Um original que já tem card sem nota (reprovado na pré-triagem) passa de novo pelo
+            # pipeline a cada execução, mas não vai produzir a análise que a cópia esperaria.
+            carded = entry is not None and entry["state"] == "carded"
+            if original["file_id"] in in_flight and not carded:
+                raise SkipItem(f"cópia de '{original['file_name']}' ({original['similarity']:.0%} semelhante), "
+                               f"que ainda está em análise; será vinculada ao card dele na próxima execução")
+            # O original não tem análise a reaproveitar (reprovado na pré-triagem ou falhou): a
+            # cópia é avaliada como um currículo novo.
+            return job
+        job.update(cached=True, duplicate_of=original, analysis=entry["analysis"],
+                   candidate_name=entry["candidate_name"], final_score=entry["final_score"],
+                   card_id=entry["card_id"], original_list_id=entry["card_list_id"])
+        return job
+
+    def compact(job):
+        if job["cached"]:
+            return job
+        # O texto compactado é o que vai para a análise (e para o cache).
+        job["text"], token_stats = compact_cv_text(
+            job["text"], job.pop("pages"), token_budget)
+        job.update(token_stats)
+        record_compaction(token_stats)
+        return job
+
+    def prescreen(job):
+        if job["cached"] or prescreener is None:
+            return job
+        score, keywords = prescreener.score(job["text"])
+        job["prescore"] = score
+        if prescreener.should_analyze(score, approval_threshold):
+            return job
+        details = f"nota aproximada {score}, corte {prescreener.cutoff_for(approval_threshold)}"
+        if keywords:
+            details += f"; palavras-chave da vaga encontradas: {', '.join(keywords)}"
+        job.update(prescreened_out=True, candidate_name=None, final_score=score,
+                   analysis=f"Reprovado na pré-triagem ({details}). A análise completa não foi executada.")
+        return job
+
+    def analyze(job):
+        if job["cached"] or job.get("prescreened_out"):
+            return job
+        if stream_analysis:
+            job["analysis"] = stream_analysis_from_groq(
+                groq_api_key, system_prompt, job["text"], stop_after_score=stop_after_score,
+                on_progress=functools.partial(on_analysis_progress, job["pdf"]) if on_analysis_progress else None)
+        else:
+            job["analysis"] = get_analysis_from_groq(
+                groq_api_key, system_prompt, job["text"])
+        if not job["analysis"]:
+            return None
+        record(job, "analyzed", analysis=job["analysis"])
+        return job
+
+    def parse(job):
+        # Acertos do cache já trazem nome e nota; análises retomadas do diário podem não trazer.
+        if "final_score" not in job:
+            candidate_name, final_score, source = parse_analysis_data(
+                job["analysis"], groq_api_key)
+            job["candidate_name"], job["final_score"] = candidate_name, final_score
+            job["parse_source"] = source
+            # Uma extração que falhou não deve ficar gravada no cache.
+            if cache is not None and source and "cache_key" in job:
+                cache.put(job["cache_key"], job["text"], job["analysis"],
+                          candidate_name, final_score)
+        job["candidate_name"] = job["candidate_name"] or f"Candidato de '{job['pdf']['name']}'"
+        if job.get("prescreened_out"):
+            # Não fica no diário como análise: desligar a pré-triagem refaz a avaliação completa.
+            return job
+        record(job, "parsed", file_name=job["pdf"]['name'], md5=job["pdf"].get('md5Checksum'),
+               analysis=job["analysis"],
+               candidate_name=job["candidate_name"], final_score=job["final_score"])
+        if candidates is not None:
+            candidates.add(job["pdf"]['id'], version, job["pdf"]['name'], job["candidate_name"],
+                           job["final_score"], job["analysis"], job.get("text"))
+        return job
+
+    def card(job):
+        approved = not job.get("prescreened_out") and job["final_score"] >= approval_threshold
+        target_list_id = approved_list_id if approved else reproved_list_id
+        job["approved"] = approved
+        score_label = "Pré-triagem" if job.get("prescreened_out") else "Nota"
+        job["card_title"] = f"{job['candidate_name']} - {score_label}: {job['final_score']}"
+        description = job["analysis"]
+        if job.get("duplicate_of"):
+            original = job["duplicate_of"]
+            try:
+                comment = add_trello_comment(
+                    trello_api_key, trello_token, job["card_id"],
+                    f"Cópia deste currículo recebida como '{job['pdf']['name']}' "
+                    f"({original['similarity']:.0%} semelhante a '{original['file_name']}'); "
+                    f"não foi analisada de novo.")
+            except CardNotFound:
+                # O card do original foi excluído no Trello: a cópia ganha um card próprio,
+                # com a análise reaproveitada.
+                del job["duplicate_of"], job["original_list_id"]
+                job["card_id"] = None
+            else:
+                # Sem o comentário, a cópia não fica vinculada: o diário não a marca como
+                # concluída e a próxima execução tenta de novo.
+                job["card"] = {"id": job["card_id"]} if comment else None
+                if comment:
+                    record(job, "carded", card_id=job["card_id"], card_list_id=job["original_list_id"])
+                return job
+        if journal is None:
+            job["card"] = create_trello_card(
+                trello_api_key, trello_token, target_list_id, job["card_title"], description)
+            return job
+
+        marker = card_marker(job["pdf"]['id'], version)
+        description = f"{description}\n\n---\n{marker}"
+        state = job.get("journal_state")
+        if state == "carding":
+            # A execução anterior caiu entre criar o card e registrá-lo: procura antes de recriar.
+            entry = journal.get(job["pdf"]['id'], version)
+            found = find_trello_card(trello_api_key, trello_token, entry["card_list_id"], marker)
+            if found:
+                job["card_id"], state = found['id'], "carded"
+                record(job, "carded", card_id=found['id'])
+
+        if state == "carded" and job["card_id"]:
+            # Uma reprovação na pré-triagem não substitui o card de uma análise anterior.
+            if job["resumed"] or job.get("prescreened_out"):
+                job.update(card={"id": job["card_id"]}, card_reused=True)
+                return job
+            # Nova análise (forçada ou o PDF mudou): atualiza o card existente em vez de criar outro.
+            try:
+                job["card"] = update_trello_card(
+                    trello_api_key, trello_token, job["card_id"], target_list_id,
+                    job["card_title"], description)
+            except CardNotFound:
+                pass  # O card foi excluído no Trello: cria um novo abaixo.
+            else:
+                # Em outra falha (ex.: 5xx), o card ainda existe: criar outro o duplicaria. O diário
+                # fica como está e a próxima execução tenta de novo.
+                if job["card"]:
+                    job["card_updated"] = True
+                    record(job, "carded", card_list_id=target_list_id)
+                return job
+
+        record(job, "carding", card_list_id=target_list_id)
+        job["card"] = create_trello_card(
+            trello_api_key, trello_token, target_list_id, job["card_title"], description)
+        if job["card"]:
+            record(job, "carded", card_id=job["card"]['id'])
+        return job
+
+    stage_funcs = {"download": download, "extract": extract, "ocr": ocr, "dedupe": dedupe, "compact": compact,
+                   "prescreen": prescreen, "analyze": analyze, "parse": parse, "card": card}
+    after_dedupe = list(stage_funcs)[list(stage_funcs).index("dedupe") + 1:]
+    for name in after_dedupe:
+        stage_funcs[name] = _settling(stage_funcs[name], in_flight, last=name == after_dedupe[-1])
+    stages = [Stage(name, func, stage_workers.get(name, 1))
+              for name, func in stage_funcs.items()]
+    return Pipeline(stages, on_thread_start=on_thread_start)
+
+
+def _settling(func, in_flight, last=False):
+    """Envolve uma etapa: o arquivo sai de `in_flight` ao deixar o pipeline, com ou sem sucesso."""
+    @functools.wraps(func)
+    def run(job):
+        try:
+            value = func(job)
+        except Exception:
+            in_flight.discard(job["pdf"]['id'])
+            raise
+        if value is None or last:
+            in_flight.discard(job["pdf"]['id'])
+        return value
+    return run
+
+
+def describe_result(result):
+    """Classifica um PipelineResult como (tipo, título, detalhe).
+
+    O tipo é "ok", "card_failed", "error", "skipped" ou "dropped" (o item parou em
+    uma etapa que já registrou o motivo no log). Itens cujo card já existia, segundo
+    o diário, são "ok" com o título "Já processado".
+    """
+    if result.item is None:
+        return "error", "Erro na listagem da pasta", str(result.error)
+    pdf_name = result.item['name']
+    stage_label = STAGE_LABELS.get(result.stage, result.stage)
+    if result.error:
+        return "error", f"Erro na etapa '{stage_label}' para", f"{pdf_name} ({result.error})"
+    if result.skip_reason:
+        return "skipped", "Ignorado", f"{pdf_name} ({result.skip_reason})"
+    if not result.completed:
+        return "dropped", "Não processado", f"{pdf_name} (etapa '{stage_label}')"
+    job = result.value
+    if not job["card"]:
+        return "card_failed", "Falha ao criar card para", job['candidate_name']
+    if job.get("duplicate_of"):
+        return "ok", "Cópia de currículo já analisado", f"{pdf_name} → card '{job['card_title']}'"
+    if job.get("card_reused"):
+        return "ok", "Já processado", f"{job['card_title']} (card existente)"
+    if job.get("prescreened_out"):
+        return "ok", "Reprovado na pré-triagem", job['card_title']
+    return "ok", "Aprovado" if job["approved"] else "Reprovado", job['card_title']
+
+
+class RunReport:
+    """Consolida os resultados de uma execução (contagens, economia e ponto de sincronização)."""
+
+    def __init__(self):
+        self.processed = 0
+        self.cards_created = 0
+        self.cards_updated = 0
+        self.cache_hits = 0
+        self.resumed = 0
+        self.prescreened = 0
+        self.prescreened_out = 0
+        self.duplicates = 0
+        self.ocr_documents = 0
+        self.ocr_pages = 0
+        self.parse_sources = {"local": 0, "llm": 0, None: 0}
+        self.tokens_saved = 0
+        self.skipped = []
+        self.errors = []
+        self._succeeded_times = []
+        self._failed_times = []
+        self.listing_complete = True
+
+    def record(self, result):
+        """Registra um resultado e devolve a classificação (tipo, título, detalhe) de `describe_result`."""
+        kind, title, detail = describe_result(result)
+        if result.item is None:
+            self.listing_complete = False
+            self.errors.append(f"{title}: {detail}")
+            return kind, title, detail
+        self.processed += 1
+
+        job = result.value if result.completed else None
+        modified_time = result.item.get('modifiedTime')
+        if modified_time:
+            (self._succeeded_times if kind == "ok" else self._failed_times).append(modified_time)
+
+        if kind == "skipped":
+            self.skipped.append(detail)
+        elif kind == "error":
+            self.errors.append(f"{title}: {detail}")
+        if job:
+            self.duplicates += bool(job.get("duplicate_of"))
+            self.ocr_documents += "ocr_pages" in job
+            self.ocr_pages += job.get("ocr_pages", 0)
+            self.cache_hits += job["cached"] and not job["resumed"] and not job.get("duplicate_of")
+            self.resumed += job["resumed"]
+            self.prescreened += "prescore" in job
+            self.prescreened_out += bool(job.get("prescreened_out"))
+            if "parse_source" in job:
+                self.parse_sources[job["parse_source"]] += 1
+            self.tokens_saved += job.get("tokens_saved", 0)
+            if kind == "ok" and not job.get("card_reused") and not job.get("duplicate_of"):
+                if job.get("card_updated"):
+                    self.cards_updated += 1
+                else:
+                    self.cards_created += 1
+        return kind, title, detail
+
+    def sync_mark(self, current=None):
+        """Novo ponto de sincronização incremental para a pasta (ver `safe_high_water_mark`)."""
+        return safe_high_water_mark(self._succeeded_times, self._failed_times, current=current,
+                                    complete=self.listing_complete)
+
+    def summary_lines(self):
+        cards = f"{self.cards_created} card(s) criado(s)"
+        if self.cards_updated:
+            cards += f", {self.cards_updated} atualizado(s)"
+        lines = [f"{self.processed} currículo(s) processado(s), {cards}."]
+        if self.cache_hits:
+            lines.append(
+                f"{self.cache_hits} currículo(s) reaproveitado(s) do cache, sem nova chamada à IA.")
+        if self.resumed:
+            lines.append(
+                f"{self.resumed} currículo(s) retomado(s) de uma execução anterior, sem nova análise "
+                f"nem card duplicado.")
+        if self.duplicates:
+            lines.append(
+                f"{self.duplicates} cópia(s) de currículos já analisados vinculada(s) ao card existente, "
+                f"sem nova análise.")
+        if self.ocr_documents:
+            lines.append(
+                f"{self.ocr_documents} currículo(s) digitalizado(s) lido(s) por OCR ({self.ocr_pages} página(s)).")
+        if self.prescreened:
+            lines.append(
+                f"Pré-triagem: {self.prescreened_out} de {self.prescreened} currículo(s) reprovado(s) "
+                f"sem a análise completa ({self.prescreened_out} chamada(s) ao modelo de 70B evitada(s)).")
+        parsed_total = sum(self.parse_sources.values())
+        if parsed_total:
+            lines.append(
+                f"Nome e nota extraídos localmente em {self.parse_sources['local']} de {parsed_total} "
+                f"análise(s) ({self.parse_sources['local'] / parsed_total:.0%}); "
+                f"LLM usada em {self.parse_sources['llm']}, falha em {self.parse_sources[None]}.")
+        if self.tokens_saved:
+            lines.append(
+                f"Compactação do texto economizou ~{self.tokens_saved:,} tokens de entrada (estimativa local).")
+        return lines
@@ -0,0 +1,25 @@
+"""Localização e abertura do banco SQLite local do ThunderGet."""
+import os
+import sqlite3
+
+
+def data_dir():
+    """Diretório de dados local (pode ser alterado pela variável THUNDERGET_HOME)."""
+    return os.environ.get("THUNDERGET_HOME") or os.path.join(os.path.expanduser("~"), ".thunderget")
+
+
+def default_db_path():
+    return os.path.join(data_dir(), "thunderget.db")
+
+
+def connect(path=None):
+    """Abre uma conexão que pode ser compartilhada entre threads (o chamador serializa o acesso)."""
+    path = path or default_db_path()
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    if path != ":memory:":
+        # WAL permite leituras concorrentes enquanto outra conexão escreve.
+        conn.execute("PRAGMA journal_mode=WAL")
+    return conn
@@ -0,0 +1,61 @@
+"""Pontos de sincronização incremental por pasta do Drive.
+
+Cada pasta guarda a maior `modifiedTime` já processada com sucesso; a
+execução seguinte lista apenas arquivos modificados depois dela. Arquivos
+apenas movidos para a pasta mantêm a `modifiedTime` original e não são vistos
+pelo modo incremental.
+"""
+import threading
+import time
+
+from thunderget.storage import connect
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drive_sync (
+    folder_id TEXT PRIMARY KEY,
+    modified_after TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def safe_high_water_mark(succeeded, failed, current=None, complete=True):
+    """Calcula o novo ponto de sincronização a partir das `modifiedTime` da execução.
+
+    O ponto nunca ultrapassa um arquivo que falhou, para que ele seja tentado de
+    novo na próxima execução. Se a listagem ou a execução não chegaram ao fim
+    (`complete=False`), arquivos não vistos podem ser mais antigos que os concluídos
+    e o ponto fica em `current`. As datas RFC 3339 do Drive (UTC, mesmo formato)
+    podem ser comparadas como texto.
+    """
+    if not complete:
+        return current
+    oldest_failure = min(failed) if failed else None
+    candidates = [t for t in succeeded if oldest_failure is None or t < oldest_failure]
+    if current:
+        candidates.append(current)
+    return max(candidates) if candidates else None
+
+
+class SyncCheckpoints:
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, folder_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT modified_after FROM drive_sync WHERE folder_id = ?", (folder_id,)).fetchone()
+        return row["modified_after"] if row else None
+
+    def set(self, folder_id, modified_after):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO drive_sync (folder_id, modified_after, updated_at) VALUES (?, ?, ?)",
+                (folder_id, modified_after, time.time()))
+
+    def clear(self, folder_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM drive_sync WHERE folder_id = ?", (folder_id,))
@@ -0,0 +1,390 @@
+"""Telemetria das execuções: spans por currículo e etapa, tokens da Groq e métricas.
+
+Cada etapa de cada currículo gera um span com duração, status, tokens consumidos
+(`usage` das respostas da Groq), novas tentativas e erros. Os spans podem ser
+gravados em JSON lines no formato dos spans do OpenTelemetry e as métricas
+agregadas em um arquivo de texto do Prometheus (para o textfile collector do
+node_exporter).
+
+As chamadas à Groq feitas dentro de uma etapa são associadas ao span da thread
+atual, sem precisar passar o span adiante.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+
+from thunderget.pipeline import SkipItem
+
+# Preço por milhão de tokens (entrada, saída), em US$, segundo a tabela pública da Groq.
+# Usado apenas para estimar o custo; ajuste se os preços mudarem.
+MODEL_PRICES = {
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "meta-llama/llama-4-scout-17b-16e-instruct": (0.11, 0.34),
+    "openai/gpt-oss-20b": (0.075, 0.30),
+}
+
+# Limites dos buckets do histograma de duração das etapas, em segundos.
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TIMING_LABELS = {"time_to_first_token": "primeiro token", "time_to_score": "nota disponível"}
+
+_current = threading.local()
+
+
+def current_span():
+    return getattr(_current, "span", None)
+
+
+def record_usage(model, usage):
+    """Associa o `usage` de uma resposta da Groq ao span da thread atual (se houver)."""
+    span = current_span()
+    if span is None or usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    span.add(requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+    span.telemetry._add_tokens(model, prompt_tokens, completion_tokens)
+
+
+def record_retry(reason):
+    """Registra uma nova tentativa de chamada à Groq ("429", "5xx" ou "connection")."""
+    span = current_span()
+    if span is not None:
+        span.add(retries=1)
+        span.telemetry._count("retries", reason)
+
+
+def record_timing(name, seconds):
+    """Registra um marco da etapa atual (ex.: "time_to_first_token" e "time_to_score" no streaming)."""
+    span = current_span()
+    if span is not None:
+        span.timings[name] = seconds
+        span.telemetry._add_timing(name, seconds)
+
+
+def record_compaction(token_stats):
+    """Registra no span da etapa atual os tokens do currículo antes e depois da compactação."""
+    span = current_span()
+    if span is not None:
+        span.add(**token_stats)
+
+
+def record_error(reason):
+    """Registra uma chamada à Groq que falhou em definitivo."""
+    span = current_span()
+    if span is not None:
+        span.add(errors=1)
+        span.telemetry._count("groq_errors", reason)
+
+
+def percentile(samples, fraction):
+    """Percentil por posição mais próxima (suficiente para relatórios)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _otel_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    return {"stringValue": str(value)}
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+class Span:
+    """Uma etapa executada para um currículo."""
+
+    def __init__(self, telemetry, stage, item):
+        self.telemetry = telemetry
+        self.stage = stage
+        self.item = item
+        self.status = "ok"  # ok, skipped, dropped ou error
+        self.error = None
+        self.attributes = {}
+        self.timings = {}
+        self.span_id = secrets.token_hex(8)
+        self.start_ns = time.time_ns()
+        self._start = time.perf_counter()
+        self.duration = None
+
+    def add(self, **counts):
+        for name, amount in counts.items():
+            self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def to_otel(self):
+        """Representação no formato JSON do OTLP (um span do OpenTelemetry)."""
+        item = self.item if isinstance(self.item, dict) else {}
+        attributes = {
+            "thunderget.run_id": self.telemetry.run_id,
+            "thunderget.stage": self.stage,
+            "thunderget.file_id": item.get('id'),
+            "thunderget.file_name": item.get('name'),
+            "thunderget.status": self.status,
+            "gen_ai.usage.input_tokens": self.attributes.get("prompt_tokens", 0),
+            "gen_ai.usage.output_tokens": self.attributes.get("completion_tokens", 0),
+            "thunderget.groq.requests": self.attributes.get("requests", 0),
+            "thunderget.groq.retries": self.attributes.get("retries", 0),
+            "thunderget.groq.errors": self.attributes.get("errors", 0),
+            # Só no span da compactação (ver `record_compaction`).
+            "thunderget.compaction.tokens_before": self.attributes.get("tokens_before"),
+            "thunderget.compaction.tokens_after": self.attributes.get("tokens_after"),
+            "thunderget.compaction.tokens_saved": self.attributes.get("tokens_saved"),
+            **{f"thunderget.{name}_ms": round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+        }
+        status = {"code": "STATUS_CODE_ERROR", "message": str(self.error)} if self.status == "error" \
+            else {"code": "STATUS_CODE_OK"}
+        return {
+            "traceId": self.telemetry.trace_id(item.get('id')),
+            "spanId": self.span_id,
+            "name": self.stage,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.start_ns + int(self.duration * 1e9)),
+            "attributes": [{"key": key, "value": _otel_value(value)}
+                           for key, value in attributes.items() if value is not None],
+            "status": status,
+        }
+
+
+class Telemetry:
+    """Coleta os spans de uma execução e agrega as métricas por etapa e por modelo.
+
+    `attach(pipeline)` liga a coleta a um `Pipeline`; `snapshot()` resume o estado
+    atual para exibição; `write_prometheus(path)` exporta as métricas.
+    """
+
+    def __init__(self, spans_path=None, run_id=None):
+        self.run_id = run_id or secrets.token_hex(8)
+        self.spans_path = spans_path
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._stage_order = []
+        self._workers = {}
+        self._durations = {}
+        self._statuses = {}
+        self._buckets = {}
+        self._tokens = {}
+        self._timings = {}
+        self._counts = {"retries": {}, "groq_errors": {}}
+        self._spans_file = None
+        if spans_path:
+            os.makedirs(os.path.dirname(os.path.abspath(spans_path)), exist_ok=True)
+            self._spans_file = open(spans_path, "a", encoding="utf-8")
+
+    def attach(self, pipeline):
+        self._pipeline = pipeline
+        self._stage_order = [stage.name for stage in pipeline.stages]
+        self._workers = {stage.name: stage.workers for stage in pipeline.stages}
+        self.started_at = time.monotonic()
+        pipeline.tracer = self
+        return pipeline
+
+    def trace_id(self, file_id):
+        # Um trace por currículo e execução: os spans de todas as etapas ficam agrupados.
+        return self.run_id + hashlib.md5(str(file_id).encode("utf-8")).hexdigest()[:16]
+
+    @contextlib.contextmanager
+    def span(self, stage, item):
+        """Mede uma etapa; o span fica disponível para `record_usage` na thread atual."""
+        span = Span(self, stage, item)
+        previous, _current.span = current_span(), span
+        try:
+            yield span
+        except SkipItem as e:
+            span.status, span.error = "skipped", e
+            raise
+        except Exception as e:
+            span.status, span.error = "error", e
+            raise
+        finally:
+            _current.span = previous
+            span.duration = time.perf_counter() - span._start
+            self._finish(span)
+
+    def _finish(self, span):
+        with self._lock:
+            self._durations.setdefault(span.stage, []).append(span.duration)
+            statuses = self._statuses.setdefault(span.stage, {})
+            statuses[span.status] = statuses.get(span.status, 0) + 1
+            buckets = self._buckets.setdefault(span.stage, [0] * len(DURATION_BUCKETS))
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    buckets[index] += 1
+            if self._spans_file:
+                self._spans_file.write(json.dumps(span.to_otel(), ensure_ascii=False) + "\n")
+                self._spans_file.flush()
+
+    def _add_tokens(self, model, prompt_tokens, completion_tokens):
+        with self._lock:
+            totals = self._tokens.setdefault(model, {"requests": 0, "prompt": 0, "completion": 0})
+            totals["requests"] += 1
+            totals["prompt"] += prompt_tokens
+            totals["completion"] += completion_tokens
+
+    def _add_timing(self, name, seconds):
+        with self._lock:
+            self._timings.setdefault(name, []).append(seconds)
+
+    def _count(self, kind, reason):
+        with self._lock:
+            self._counts[kind][reason] = self._counts[kind].get(reason, 0) + 1
+
+    def close(self):
+        if self._spans_file:
+            self._spans_file.close()
+            self._spans_file = None
+
+    def snapshot(self):
+        """Resumo do momento: vazão, etapas (p50/p95, fila, ocupação, status) e tokens consumidos.
+
+        A ocupação é a fração do tempo em que os workers de uma etapa estiveram ocupados;
+        a etapa mais ocupada é o gargalo (`bottleneck`).
+        """
+        with self._lock:
+            durations = {stage: list(samples) for stage, samples in self._durations.items()}
+            statuses = {stage: dict(counts) for stage, counts in self._statuses.items()}
+            tokens = {model: dict(totals) for model, totals in self._tokens.items()}
+            counts = {kind: dict(values) for kind, values in self._counts.items()}
+            timings = {name: list(samples) for name, samples in self._timings.items()}
+        queues = self._pipeline.queue_depths() if self._pipeline is not None else {}
+        elapsed = time.monotonic() - self.started_at
+        last_stage = self._stage_order[-1] if self._stage_order else None
+        completed = statuses.get(last_stage, {}).get("ok", 0)
+
+        stages = {}
+        for stage in self._stage_order or list(durations):
+            samples = durations.get(stage, [])
+            stages[stage] = {
+                "n": len(samples),
+                "p50_ms": percentile(samples, 0.50) * 1000 if samples else None,
+                "p95_ms": percentile(samples, 0.95) * 1000 if samples else None,
+                "busy_s": sum(samples),
+                "utilization": sum(samples) / (self._workers.get(stage, 1) * elapsed) if elapsed else 0.0,
+                "queue": queues.get(stage, 0),
+                "statuses": statuses.get(stage, {}),
+            }
+        prompt_tokens = sum(t["prompt"] for t in tokens.values())
+        completion_tokens = sum(t["completion"] for t in tokens.values())
+        busy_stages = [stage for stage, stats in stages.items() if stats["n"]]
+        return {
+            "elapsed_s": elapsed,
+            "bottleneck": max(busy_stages, key=lambda stage: stages[stage]["utilization"], default=None),
+            "completed": completed,
+            "cvs_per_minute": completed / elapsed * 60 if elapsed else 0.0,
+            "stages": stages,
+            "tokens": tokens,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "groq_requests": sum(t["requests"] for t in tokens.values()),
+            "retries": sum(counts["retries"].values()),
+            "groq_errors": sum(counts["groq_errors"].values()),
+            "cost_usd": sum(estimate_cost(model, t["prompt"], t["completion"]) for model, t in tokens.items()),
+            "counts": counts,
+            "timings_p50_ms": {name: percentile(samples, 0.50) * 1000 for name, samples in timings.items()},
+        }
+
+    def summary_lines(self, stage_labels=None):
+        snapshot = self.snapshot()
+        lines = []
+        if snapshot["groq_requests"]:
+            lines.append(
+                f"Groq: {snapshot['groq_requests']} chamada(s), {snapshot['prompt_tokens']:,} tokens de entrada "
+                f"e {snapshot['completion_tokens']:,} de saída (custo estimado: US$ {snapshot['cost_usd']:.4f}).")
+        if snapshot["retries"] or snapshot["groq_errors"]:
+            reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(snapshot["counts"]["retries"].items()))
+            lines.append(f"{snapshot['retries']} nova(s) tentativa(s) na Groq"
+                         f"{f' ({reasons})' if reasons else ''}; {snapshot['groq_errors']} falha(s) definitiva(s).")
+        timings = snapshot["timings_p50_ms"]
+        if timings:
+            lines.append("Streaming (p50): " + "; ".join(
+                f"{TIMING_LABELS.get(name, name)} em {ms:.0f} ms" for name, ms in timings.items()) + ".")
+        bottleneck = snapshot["bottleneck"]
+        if bottleneck:
+            stats = snapshot["stages"][bottleneck]
+            label = (stage_labels or {}).get(bottleneck, bottleneck)
+            lines.append(f"Gargalo: etapa '{label}', com os workers ocupados {stats['utilization']:.0%} do tempo "
+                         f"(p50 {stats['p50_ms']:.0f} ms, p95 {stats['p95_ms']:.0f} ms).")
+        return lines
+
+    def prometheus_text(self):
+        """Métricas no formato de exposição de texto do Prometheus."""
+        snapshot = self.snapshot()
+        with self._lock:
+            buckets = {stage: list(values) for stage, values in self._buckets.items()}
+        lines = [
+            "# HELP thunderget_stage_duration_seconds Duração de cada etapa por currículo.",
+            "# TYPE thunderget_stage_duration_seconds histogram",
+        ]
+        for stage, stats in snapshot["stages"].items():
+            for bound, count in zip(DURATION_BUCKETS, buckets.get(stage, [0] * len(DURATION_BUCKETS))):
+                lines.append(f'thunderget_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'thunderget_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats["n"]}')
+            lines.append(f'thunderget_stage_duration_seconds_sum{{stage="{stage}"}} {stats["busy_s"]:.6f}')
+            lines.append(f'thunderget_stage_duration_seconds_count{{stage="{stage}"}} {stats["n"]}')
+
+        lines += ["# HELP thunderget_stage_items_total Itens que passaram por cada etapa, por status.",
+                  "# TYPE thunderget_stage_items_total counter"]
+        for stage, stats in snapshot["stages"].items():
+            for status, count in sorted(stats["statuses"].items()):
+                lines.append(f'thunderget_stage_items_total{{stage="{stage}",status="{status}"}} {count}')
+
+        lines += ["# HELP thunderget_stage_utilization Fração do tempo com os workers da etapa ocupados.",
+                  "# TYPE thunderget_stage_utilization gauge"]
+        for stage, stats in snapshot["stages"].items():
+            lines.append(f'thunderget_stage_utilization{{stage="{stage}"}} {stats["utilization"]:.4f}')
+
+        lines += ["# HELP thunderget_queue_depth Itens aguardando na fila de cada etapa.",
+                  "# TYPE thunderget_queue_depth gauge"]
+        for stage, stats in snapshot["stages"].items():
+            lines.append(f'thunderget_queue_depth{{stage="{stage}"}} {stats["queue"]}')
+
+        lines += ["# HELP thunderget_groq_tokens_total Tokens consumidos na Groq.",
+                  "# TYPE thunderget_groq_tokens_total counter"]
+        for model, totals in sorted(snapshot["tokens"].items()):
+            lines.append(f'thunderget_groq_tokens_total{{model="{model}",type="prompt"}} {totals["prompt"]}')
+            lines.append(f'thunderget_groq_tokens_total{{model="{model}",type="completion"}} {totals["completion"]}')
+        lines += ["# HELP thunderget_groq_requests_total Chamadas bem-sucedidas à Groq.",
+                  "# TYPE thunderget_groq_requests_total counter"]
+        for model, totals in sorted(snapshot["tokens"].items()):
+            lines.append(f'thunderget_groq_requests_total{{model="{model}"}} {totals["requests"]}')
+        lines += ["# HELP thunderget_groq_retries_total Novas tentativas de chamadas à Groq.",
+                  "# TYPE thunderget_groq_retries_total counter"]
+        for reason, count in sorted(snapshot["counts"]["retries"].items()):
+            lines.append(f'thunderget_groq_retries_total{{reason="{reason}"}} {count}')
+        lines += ["# HELP thunderget_groq_errors_total Chamadas à Groq que falharam após as tentativas.",
+                  "# TYPE thunderget_groq_errors_total counter"]
+        for reason, count in sorted(snapshot["counts"]["groq_errors"].items()):
+            lines.append(f'thunderget_groq_errors_total{{reason="{reason}"}} {count}')
+
+        lines += ["# HELP thunderget_groq_cost_usd Custo estimado das chamadas à Groq.",
+                  "# TYPE thunderget_groq_cost_usd gauge",
+                  f"thunderget_groq_cost_usd {snapshot['cost_usd']:.6f}",
+                  "# HELP thunderget_cvs_completed_total Currículos que concluíram todas as etapas.",
+                  "# TYPE thunderget_cvs_completed_total counter",
+                  f"thunderget_cvs_completed_total {snapshot['completed']}",
+                  "# HELP thunderget_run_elapsed_seconds Duração da execução até o momento.",
+                  "# TYPE thunderget_run_elapsed_seconds gauge",
+                  f"thunderget_run_elapsed_seconds {snapshot['elapsed_s']:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Grava as métricas de forma atômica (o coletor nunca lê um arquivo pela metade)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
@@ -0,0 +1,90 @@
+"""Acesso à API REST do Trello."""
+import logging
+import os
+
+import requests
+
+from thunderget.clients import get_http_session
+
+logger = logging.getLogger(__name__)
+
+# Pode ser trocado por um servidor local (ex.: o benchmark em `bench/`).
+TRELLO_API_URL = os.environ.get("THUNDERGET_TRELLO_API_URL", "https://api.trello.com/1")
+
+
+class CardNotFound(Exception):
+    """O card não existe mais no Trello (foi excluído)."""
+
+
+def get_trello_boards(api_key, token):
+    url = f"{TRELLO_API_URL}/members/me/boards?key={api_key}&token={token}"
+    try:
+        response = get_http_session().get(url)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erro ao buscar quadros do Trello: {e}")
+        return []
+
+
+def get_trello_lists(api_key, token, board_id):
+    url = f"{TRELLO_API_URL}/boards/{board_id}/lists?key={api_key}&token={token}"
+    try:
+        response = get_http_session().get(url)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erro ao buscar listas do Trello: {e}")
+        return []
+
+
+def create_trello_card(api_key, token, list_id, card_name, card_description):
+    url = f"{TRELLO_API_URL}/cards?key={api_key}&token={token}"
+    payload = {'idList': list_id, 'name': card_name, 'desc': card_description}
+    try:
+        response = get_http_session().post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erro ao criar cartão no Trello para '{card_name}': {e}")
+        return None
+
+
+def update_trello_card(api_key, token, card_id, list_id, card_name, card_description):
+    """Atualiza o card; devolve None em caso de falha e lança CardNotFound se ele foi excluído."""
+    url = f"{TRELLO_API_URL}/cards/{card_id}?key={api_key}&token={token}"
+    payload = {'idList': list_id, 'name': card_name, 'desc': card_description}
+    try:
+        response = get_http_session().put(url, json=payload)
+        if response.status_code == 404:
+            raise CardNotFound(card_id)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erro ao atualizar o cartão '{card_name}' no Trello: {e}")
+        return None
+
+
+def find_trello_card(api_key, token, list_id, marker):
+    """Procura na lista um card cuja descrição contenha `marker`."""
+    url = f"{TRELLO_API_URL}/lists/{list_id}/cards?key={api_key}&token={token}&fields=id,name,desc"
+    response = get_http_session().get(url)
+    response.raise_for_status()
+    for card in response.json():
+        if marker in (card.get('desc') or ""):
+            return card
+    return None
+
+
+def add_trello_comment(api_key, token, card_id, text):
+    """Comenta no card; devolve None em caso de falha e lança CardNotFound se ele foi excluído."""
+    url = f"{TRELLO_API_URL}/cards/{card_id}/actions/comments?key={api_key}&token={token}"
+    try:
+        response = get_http_session().post(url, json={'text': text})
+        if response.status_code == 404:
+            raise CardNotFound(card_id)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Erro ao comentar no cartão {card_id} do Trello: {e}")
+        return None